@@ -0,0 +1,308 @@
+"""
+Generate the benchmark fixtures in benchmarks/fixtures.
+
+The fixtures are deterministic and checked in; rerun this only when changing
+them, since results saved against the old fixtures are no longer comparable.
+
+    python -m benchmarks.make_fixtures
+"""
+import json
+import random
+from pathlib import Path
+from typing import List
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+RESPONSIBILITIES = [
+    "Design, build and operate backend services handling millions of requests per day",
+    "Own features end to end, from technical design through rollout and monitoring",
+    "Work closely with product managers and designers to shape the roadmap",
+    "Review code and mentor engineers across the team",
+    "Improve the reliability, latency and cost of our data pipelines",
+    "Contribute to architecture decisions and write clear design documents",
+    "Participate in an on-call rotation shared fairly across the team",
+    "Automate deployment and testing to keep release cycles short",
+    "Investigate production incidents and drive follow-up actions to completion",
+    "Collaborate with data scientists to bring models into production",
+]
+
+REQUIREMENTS = [
+    "5+ years of professional experience with Python or a similar language",
+    "Experience with FastAPI, Django or Flask in production",
+    "Solid understanding of relational databases such as PostgreSQL",
+    "Familiarity with AWS, GCP or Azure and infrastructure as code",
+    "Experience with Docker and Kubernetes",
+    "Strong written and verbal communication skills",
+    "A track record of shipping and operating distributed systems",
+    "Comfort working in an agile, iterative environment",
+    "Knowledge of asynchronous programming and event-driven architectures",
+    "Experience with observability tooling such as Prometheus and Grafana",
+]
+
+BENEFITS = [
+    "Competitive salary and equity package",
+    "25 days of paid holiday plus bank holidays",
+    "Private health insurance for you and your family",
+    "Flexible hybrid working from our London office",
+    "Annual learning and development budget",
+    "Enhanced parental leave",
+]
+
+BOILERPLATE = [
+    "We are an equal opportunity employer and value diversity at our company.",
+    "We do not discriminate on the basis of race, religion, colour, national origin, gender, sexual orientation, age, marital status or disability status.",
+    "By applying you agree to our Privacy Policy and Terms of Use.",
+]
+
+LOREM = (
+    "Acme Analytics helps retailers understand their customers through real-time data. "
+    "Our platform processes billions of events every day and powers decisions at some of the "
+    "largest brands in Europe. We are a team of 200 people across London, Berlin and Lisbon."
+)
+
+
+def _description_html(rng: random.Random) -> str:
+    """Job description body as the sites render it: paragraphs and bullet lists."""
+    parts = [f"<p>{LOREM}</p>", "<p><strong>What you will do</strong></p><ul>"]
+    parts += [f"<li>{item}.</li>" for item in rng.sample(RESPONSIBILITIES, 8)]
+    parts += ["</ul>", "<p><strong>What we are looking for</strong></p><ul>"]
+    parts += [f"<li>{item}.</li>" for item in rng.sample(REQUIREMENTS, 8)]
+    parts += ["</ul>", "<p><strong>Benefits</strong></p><ul>"]
+    parts += [f"<li>{item}</li>" for item in BENEFITS]
+    parts += ["</ul>"] + [f"<p>{sentence}</p>" for sentence in BOILERPLATE]
+    return "\n".join(parts)
+
+
+def _job_posting_ld(rng: random.Random, description_html: str) -> str:
+    posting = {
+        "@context": "https://schema.org/",
+        "@type": "JobPosting",
+        "title": "Senior Backend Engineer",
+        "description": description_html,
+        "datePosted": "2024-05-01",
+        "employmentType": "FULL_TIME",
+        "hiringOrganization": {"@type": "Organization", "name": "Acme Analytics"},
+        "jobLocation": {
+            "@type": "Place",
+            "address": {"@type": "PostalAddress", "addressLocality": "London", "addressCountry": "GB"},
+        },
+        "baseSalary": {
+            "@type": "MonetaryAmount", "currency": "GBP",
+            "value": {"@type": "QuantitativeValue", "minValue": 80000, "maxValue": 100000, "unitText": "YEAR"},
+        },
+        "identifier": {"@type": "PropertyValue", "name": "Acme", "value": str(rng.randint(10**9, 10**10))},
+    }
+    return f'<script type="application/ld+json">{json.dumps(posting)}</script>'
+
+
+def _inline_script(rng: random.Random, kilobytes: int) -> str:
+    """Minified-looking application state, the bulk of a real job page."""
+    entries = []
+    size = 0
+    while size < kilobytes * 1024:
+        entry = f'"k{rng.randint(0, 10**6)}":{{"id":{rng.randint(0, 10**9)},"v":"{rng.getrandbits(128):032x}"}}'
+        entries.append(entry)
+        size += len(entry)
+    return "<script>window.__STATE__={" + ",".join(entries) + "};</script>"
+
+
+def _chrome_links(rng: random.Random, count: int) -> str:
+    return "".join(f'<li><a href="/link/{rng.randint(0, 10**6)}">Link {i}</a></li>' for i in range(count))
+
+
+def _similar_jobs(rng: random.Random, count: int, card_class: str) -> str:
+    cards = []
+    for i in range(count):
+        cards.append(
+            f'<li class="{card_class}"><a href="/jobs/{rng.randint(10**6, 10**7)}">'
+            f'<h3>{rng.choice(["Backend", "Platform", "Data", "Python"])} Engineer</h3></a>'
+            f'<span class="company">Company {i}</span><span class="location">London</span>'
+            f'<time>{rng.randint(1, 30)} days ago</time></li>'
+        )
+    return "<ul>" + "".join(cards) + "</ul>"
+
+
+def _page(head: str, body: str) -> str:
+    return f"<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">{head}</head><body>{body}</body></html>"
+
+
+def linkedin_page(rng: random.Random) -> str:
+    description = _description_html(rng)
+    head = (
+        "<title>Senior Backend Engineer | Acme Analytics | LinkedIn</title>"
+        + "".join(f'<meta name="m{i}" content="{rng.getrandbits(64):x}">' for i in range(40))
+        + _job_posting_ld(rng, description)
+        + "<style>" + "".join(f".c{i}{{margin:{i}px}}" for i in range(2000)) + "</style>"
+    )
+    body = (
+        f"<header><nav><ul>{_chrome_links(rng, 60)}</ul></nav></header>"
+        "<main><section class=\"top-card-layout\"><h1>Senior Backend Engineer</h1>"
+        "<a href=\"/company/acme\">Acme Analytics</a><span>London, England, United Kingdom</span>"
+        "<button>Apply Now</button><button>Save Job</button></section>"
+        f"<section class=\"description\"><div class=\"description__text description__text--rich\">"
+        f"<div class=\"show-more-less-html__markup\">{description}</div></div></section>"
+        f"<section class=\"similar-jobs\"><h2>Similar jobs</h2>{_similar_jobs(rng, 60, 'job-card')}</section></main>"
+        f"<footer><ul>{_chrome_links(rng, 80)}</ul><p>Cookie Policy</p></footer>"
+        + _inline_script(rng, 160)
+    )
+    return _page(head, body)
+
+
+def indeed_page(rng: random.Random) -> str:
+    description = _description_html(rng)
+    head = (
+        "<title>Senior Backend Engineer - London - Indeed.com</title>"
+        + _job_posting_ld(rng, description)
+        + "<style>" + "".join(f".jobsearch-{i}{{padding:{i}px}}" for i in range(1500)) + "</style>"
+    )
+    body = (
+        f"<div id=\"gnav\"><ul>{_chrome_links(rng, 40)}</ul></div>"
+        "<div class=\"jobsearch-ViewJobLayout\"><div class=\"jobsearch-JobInfoHeader\"><h1>Senior Backend Engineer</h1>"
+        "<div class=\"jobsearch-JobMetadataHeader-item\">Full-time</div></div>"
+        f"<div id=\"jobDescriptionText\" class=\"jobsearch-jobDescriptionText\">{description}</div>"
+        f"<div class=\"jobsearch-RelatedLinks\">{_similar_jobs(rng, 40, 'jobsearch-SerpJobCard')}</div></div>"
+        f"<footer><ul>{_chrome_links(rng, 50)}</ul></footer>"
+        + _inline_script(rng, 120)
+    )
+    return _page(head, body)
+
+
+def reed_page(rng: random.Random) -> str:
+    description = _description_html(rng)
+    head = (
+        "<title>Senior Backend Engineer Job in London - Reed.co.uk</title>"
+        + _job_posting_ld(rng, description)
+        + "<style>" + "".join(f".reed-{i}{{color:#{i:06x}}}" for i in range(1000)) + "</style>"
+    )
+    body = (
+        f"<header><nav><ul>{_chrome_links(rng, 50)}</ul></nav></header>"
+        "<main><article class=\"job-details\"><h1>Senior Backend Engineer</h1>"
+        "<div class=\"salary\">80,000 - 100,000 per annum</div>"
+        f"<div class=\"description\" data-qa=\"job-description\" itemprop=\"description\">{description}</div>"
+        f"</article><aside>{_similar_jobs(rng, 30, 'job-result-card')}</aside></main>"
+        f"<footer><ul>{_chrome_links(rng, 60)}</ul></footer>"
+        + _inline_script(rng, 80)
+    )
+    return _page(head, body)
+
+
+def careers_page(rng: random.Random) -> str:
+    """A company careers page none of the site selectors match, for the fallback extractor."""
+    description = _description_html(rng)
+    body = (
+        f"<header><nav><ul>{_chrome_links(rng, 30)}</ul></nav></header>"
+        "<div id=\"app\"><div class=\"hero\"><h1>Senior Backend Engineer</h1><p>London or remote</p></div>"
+        f"<div class=\"content-block\">{description}</div>"
+        f"<div class=\"openings\">{_similar_jobs(rng, 25, 'opening')}</div></div>"
+        f"<footer><ul>{_chrome_links(rng, 30)}</ul></footer>"
+        + _inline_script(rng, 60)
+    )
+    return _page("<title>Careers at Acme Analytics</title>", body)
+
+
+def _cv_sections(rng: random.Random, roles: int) -> List[str]:
+    sections = [
+        "<h1>Jane Doe</h1>",
+        "<p>jane.doe@example.com | +44 20 7946 0000 | London | linkedin.com/in/janedoe</p>",
+        "<h2>Professional Summary</h2>",
+        "<p>Backend engineer with ten years of experience building and operating high-traffic "
+        "Python services. Known for pragmatic designs, measurable performance wins and mentoring.</p>",
+        "<h2>Experience</h2>",
+    ]
+    for i in range(roles):
+        sections.append(f"<h3>Senior Software Engineer - Company {i}</h3>")
+        sections.append(f"<h4>{2023 - 2 * i} - {2025 - 2 * i}</h4><ul>")
+        sections += [f"<li><strong>{item.split()[0]}</strong> {' '.join(item.split()[1:])}.</li>"
+                     for item in rng.sample(RESPONSIBILITIES, 5)]
+        sections.append("</ul>")
+    sections += [
+        "<h2>Skills</h2>",
+        "<p>Python, FastAPI, asyncio, PostgreSQL, Redis, Kafka, Docker, Kubernetes, AWS, Terraform, Prometheus</p>",
+        "<h2>Education</h2>",
+        "<p><strong>BSc Computer Science</strong>, University of Manchester, 2014</p>",
+    ]
+    return sections
+
+
+def cv_html(rng: random.Random, roles: int) -> str:
+    return "\n".join(_cv_sections(rng, roles))
+
+
+def cover_letter_html() -> str:
+    paragraphs = [
+        "<h1>Application for Senior Backend Engineer</h1>",
+        "<p>Dear Hiring Manager,</p>",
+        f"<p>I am writing to apply for the Senior Backend Engineer role at Acme Analytics. {LOREM}</p>",
+        "<p>In my current role I <strong>reduced p99 latency by 60%</strong> on our core API by "
+        "restructuring our caching and moving CPU-bound work out of the event loop.</p>",
+        "<p>I would welcome the chance to discuss how my experience could help your team.</p>",
+        "<p>Kind regards,<br>Jane Doe</p>",
+    ]
+    return "\n".join(paragraphs)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def cv_pdf(rng: random.Random, pages: int) -> bytes:
+    """
+    A plain text PDF of the given page count, written by hand so generating the
+    fixtures needs no PDF library.
+    """
+    lines_per_page = 55
+    font_id = 3 + 2 * pages
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(pages))}] /Count {pages} >>",
+        font_id: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    pool = RESPONSIBILITIES + REQUIREMENTS + [LOREM[:90], LOREM[90:180]]
+    for page in range(pages):
+        lines = [f"Jane Doe - Curriculum Vitae - page {page + 1} of {pages}"]
+        lines += [rng.choice(pool) for _ in range(lines_per_page - 1)]
+        stream = "BT /F1 10 Tf 12 TL 50 800 Td\n" + "\n".join(f"({_pdf_escape(line)}) '" for line in lines) + "\nET"
+        page_id, content_id = 3 + 2 * page, 4 + 2 * page
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        objects[content_id] = f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n{objects[obj_id]}\nendobj\n".encode("latin-1")
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offsets[obj_id]:010d} 00000 n \n" for obj_id in sorted(objects)).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def main() -> None:
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    rng = random.Random(20240501)
+
+    for pages in (1, 3, 10):
+        (FIXTURES_DIR / f"cv_{pages}_page.pdf").write_bytes(cv_pdf(rng, pages))
+
+    pages = {
+        "linkedin.html": linkedin_page(rng),
+        "indeed.html": indeed_page(rng),
+        "reed.html": reed_page(rng),
+        "careers.html": careers_page(rng),
+        "llm_cv_short.html": cv_html(rng, 2),
+        "llm_cv_long.html": cv_html(rng, 8),
+        "llm_cover_letter.html": cover_letter_html(),
+    }
+    for name, html in pages.items():
+        (FIXTURES_DIR / name).write_text(html, encoding="utf-8")
+
+    for path in sorted(FIXTURES_DIR.iterdir()):
+        print(f"{path.name:24} {path.stat().st_size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Micro-benchmarks for the CPU-bound stages of the pipeline.
+
+Run from the backend directory:
+
+    python -m benchmarks.run                      # print results
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json --threshold 0.25
+
+With --compare the exit status is 1 when any benchmark's median time or peak
+memory grew by more than the threshold over the baseline. Timings are only
+comparable on the same machine and Python version.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@dataclass
+class Benchmark:
+    """
+    One benchmarked call.
+
+    setup runs before every iteration outside the timed region and returns the
+    arguments for fn, so benchmarks of functions that mutate their input (like
+    the fallback extractor decomposing a soup) time only the call itself.
+    """
+    name: str
+    fn: Callable[..., Any]
+    setup: Callable[[], Tuple[Any, ...]]
+    input_bytes: int
+
+
+class BenchmarkSkipped(Exception):
+    """Raised while building a benchmark whose dependencies are unavailable here."""
+
+
+def _read_text(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def _read_bytes(name: str) -> bytes:
+    return (FIXTURES_DIR / name).read_bytes()
+
+
+def cv_benchmarks() -> List[Benchmark]:
+    from services.cv_processor import CVProcessor
+
+    processor = CVProcessor()
+    benchmarks = []
+    for pages in (1, 3, 10):
+        content = _read_bytes(f"cv_{pages}_page.pdf")
+        benchmarks.append(Benchmark(
+            f"cv_extract_pdf[{pages}p]", processor._extract_text_from_pdf,
+            lambda content=content: (content,), len(content)))
+    return benchmarks
+
+
+def scraper_benchmarks() -> List[Benchmark]:
+    from services.job_scraper import JobScraper
+
+    scraper = JobScraper()
+    benchmarks = []
+    for site, parse in (
+        ("linkedin", scraper._scrape_linkedin),
+        ("indeed", scraper._scrape_indeed),
+        ("reed", scraper._scrape_reed),
+    ):
+        html = _read_text(f"{site}.html")
+        benchmarks.append(Benchmark(
+            f"scrape_parse[{site}]", parse, lambda html=html: (html,), len(html.encode("utf-8"))))
+
+    # The full parse stage: the JSON-LD JobPosting when the page has one, else the selectors
+    for site, domain in (("linkedin", "www.linkedin.com"), ("indeed", "uk.indeed.com"), ("reed", "www.reed.co.uk")):
+        html = _read_text(f"{site}.html")
+        benchmarks.append(Benchmark(
+            f"parse_job_page[{site}]", lambda html, domain=domain: scraper._parse_job_page(domain, html),
+            lambda html=html: (html,), len(html.encode("utf-8"))))
+
+    # The tree builders on their own, to show what the site parsers pay for parsing
+    linkedin = _read_text("linkedin.html")
+    benchmarks.append(Benchmark(
+        "parse_tree[html.parser]", lambda html: BeautifulSoup(html, "html.parser"),
+        lambda: (linkedin,), len(linkedin.encode("utf-8"))))
+    benchmarks.append(Benchmark(
+        "parse_tree[lxml]", lxml_html.document_fromstring,
+        lambda: (linkedin,), len(linkedin.encode("utf-8"))))
+
+    careers = _read_text("careers.html")
+    benchmarks.append(Benchmark(
+        "extract_fallback[careers]", scraper._extract_fallback_content,
+        lambda: (lxml_html.document_fromstring(careers),), len(careers.encode("utf-8"))))
+
+    for site in ("linkedin", "careers"):
+        raw_text = BeautifulSoup(_read_text(f"{site}.html"), "html.parser").get_text()
+        benchmarks.append(Benchmark(
+            f"clean_text[{site}]", scraper._clean_text,
+            lambda raw_text=raw_text: (raw_text,), len(raw_text.encode("utf-8"))))
+    return benchmarks
+
+
+def pdf_benchmarks() -> List[Benchmark]:
+    try:
+        from services.pdf_generator import PDFGenerator
+        generator = PDFGenerator()
+        generator.warm_up()
+    except Exception as e:
+        # WeasyPrint needs Pango and friends, which not every dev machine has
+        raise BenchmarkSkipped(f"WeasyPrint unavailable: {str(e)}")
+
+    benchmarks = []
+    for name in ("llm_cv_short", "llm_cv_long", "llm_cover_letter"):
+        html = _read_text(f"{name}.html")
+        benchmarks.append(Benchmark(
+            f"html_to_pdf[{name.removeprefix('llm_')}]", generator.html_to_pdf,
+            lambda html=html: (html,), len(html.encode("utf-8"))))
+    return benchmarks
+
+
+SUITES: Dict[str, Callable[[], List[Benchmark]]] = {
+    "cv": cv_benchmarks,
+    "scraper": scraper_benchmarks,
+    "pdf": pdf_benchmarks,
+}
+
+
+def measure(benchmark: Benchmark, min_time: float, min_rounds: int) -> Dict[str, Any]:
+    """
+    Time a benchmark and measure its peak allocations.
+
+    Rounds run until both min_time seconds and min_rounds rounds have passed; the
+    median round is reported. Peak memory comes from one further call under
+    tracemalloc, kept apart because tracing slows the timed rounds down. It
+    counts Python allocations only, so lxml trees, which libxml2 allocates,
+    are not included.
+    """
+    benchmark.fn(*benchmark.setup())  # warm-up: imports, regex compilation, caches
+
+    timings: List[float] = []
+    started = time.perf_counter()
+    while len(timings) < min_rounds or time.perf_counter() - started < min_time:
+        args = benchmark.setup()
+        t0 = time.perf_counter()
+        benchmark.fn(*args)
+        timings.append(time.perf_counter() - t0)
+
+    args = benchmark.setup()
+    tracemalloc.start()
+    try:
+        benchmark.fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "rounds": len(timings),
+        "median_ms": median * 1000,
+        "min_ms": min(timings) * 1000,
+        "ops_per_sec": 1 / median if median else 0.0,
+        "mb_per_sec": benchmark.input_bytes / median / 1e6 if median else 0.0,
+        "peak_kib": peak / 1024,
+        "input_kib": benchmark.input_bytes / 1024,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float, memory_threshold: float) -> List[str]:
+    """
+    Compare results against a saved baseline.
+
+    Returns:
+        List of regression descriptions; empty when nothing regressed
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        time_ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        memory_ratio = result["peak_kib"] / base["peak_kib"] if base["peak_kib"] else 1.0
+        result["time_change"] = time_ratio - 1
+        result["memory_change"] = memory_ratio - 1
+        if time_ratio > 1 + threshold:
+            regressions.append(
+                f"{name}: median {base['median_ms']:.2f}ms -> {result['median_ms']:.2f}ms ({time_ratio - 1:+.0%})")
+        if memory_ratio > 1 + memory_threshold:
+            regressions.append(
+                f"{name}: peak memory {base['peak_kib']:.0f}KiB -> {result['peak_kib']:.0f}KiB ({memory_ratio - 1:+.0%})")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, Any]], skipped: Dict[str, str]) -> None:
+    header = f"{'benchmark':30} {'median ms':>10} {'ops/s':>9} {'MB/s':>8} {'peak KiB':>9} {'vs base':>8} {'mem vs':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        time_change = f"{r['time_change']:+.0%}" if "time_change" in r else "-"
+        memory_change = f"{r['memory_change']:+.0%}" if "memory_change" in r else "-"
+        print(f"{name:30} {r['median_ms']:10.2f} {r['ops_per_sec']:9.1f} {r['mb_per_sec']:8.2f} "
+              f"{r['peak_kib']:9.0f} {time_change:>8} {memory_change:>7}")
+    for suite, reason in skipped.items():
+        print(f"skipped {suite}: {reason}")
+
+
+def run(suites: List[str], pattern: Optional[str], min_time: float, min_rounds: int) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    skipped: Dict[str, str] = {}
+    for suite in suites:
+        try:
+            benchmarks = SUITES[suite]()
+        except BenchmarkSkipped as e:
+            skipped[suite] = str(e)
+            continue
+        for benchmark in benchmarks:
+            if pattern and pattern not in benchmark.name:
+                continue
+            results[benchmark.name] = measure(benchmark, min_time, min_rounds)
+    return results, skipped
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suite to run; repeatable (default: all)")
+    parser.add_argument("-k", dest="pattern", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Minimum seconds spent timing each benchmark")
+    parser.add_argument("--min-rounds", type=int, default=5, help="Minimum timed rounds per benchmark")
+    parser.add_argument("--save", type=Path, help="Write results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON file saved with --save")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median time increase, as a fraction")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed peak memory increase, as a fraction")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    # The services log every parse failure and fallback; keep the output readable
+    logging.basicConfig(level=logging.ERROR)
+
+    results, skipped = run(args.suite or list(SUITES), args.pattern, args.min_time, args.min_rounds)
+
+    regressions: List[str] = []
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline["results"], args.threshold, args.memory_threshold)
+
+    if args.json:
+        print(json.dumps({"results": results, "skipped": skipped, "regressions": regressions}, indent=2))
+    else:
+        print_table(results, skipped)
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }, indent=2), encoding="utf-8")
+        print(f"Saved results to {args.save}", file=sys.stderr)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond the threshold:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Local stand-ins for the Gemini API and the job sites, for load testing.
+
+FakeGemini answers the generateContent, streamGenerateContent and
+cachedContents calls the google-genai client makes, with a configurable time
+to first token and token rate. FakeJobSites serves the benchmark fixture
+pages under /linkedin, /indeed and /reed. The API is pointed at them with
+GEMINI_BASE_URL and SCRAPER_HOST_OVERRIDES; run this module on its own to get
+the servers plus the environment to start the API with:
+
+    python -m loadtest.fake_servers
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+
+SITES = {
+    "linkedin": ("linkedin.com", "linkedin.html"),
+    "indeed": ("indeed.com", "indeed.html"),
+    "reed": ("reed.co.uk", "reed.html"),
+}
+
+# Text every fixture job page contains, in the body and in its JSON-LD
+DESCRIPTION_MARKER = "Acme Analytics helps retailers"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+
+@dataclass
+class FakeGeminiConfig:
+    """Latency model of the fake LLM."""
+    first_token_seconds: float = 0.5
+    tokens_per_second: float = 200.0
+    jitter: float = 0.2  # +/- fraction applied to both
+    error_rate: float = 0.0  # fraction of calls answered with a 503
+    chunk_tokens: int = 20
+
+
+class FakeGemini:
+    """Answers Gemini API calls with fixture HTML at a simulated generation speed."""
+
+    def __init__(self, config: FakeGeminiConfig):
+        self.config = config
+        self.outputs = {
+            "cover_letter": (FIXTURES_DIR / "llm_cover_letter.html").read_text(encoding="utf-8"),
+            "cv": (FIXTURES_DIR / "llm_cv_long.html").read_text(encoding="utf-8"),
+        }
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.errors = 0
+
+    def routes(self) -> List[web.RouteDef]:
+        return [
+            web.post("/{version}/models/{model}:generateContent", self.generate),
+            web.post("/{version}/models/{model}:streamGenerateContent", self.stream),
+            web.post("/{version}/cachedContents", self.create_cache),
+            web.delete("/{version}/cachedContents/{name}", self.delete_cache),
+        ]
+
+    def _jittered(self, value: float) -> float:
+        return value * random.uniform(1 - self.config.jitter, 1 + self.config.jitter)
+
+    def _output_for(self, body: Dict) -> str:
+        prompt = json.dumps(body)
+        return self.outputs["cover_letter"] if "cover letter" in prompt.lower() else self.outputs["cv"]
+
+    def _failure(self) -> Optional[web.Response]:
+        if self.config.error_rate > 0 and random.random() < self.config.error_rate:
+            self.errors += 1
+            return web.json_response(
+                {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}},
+                status=503)
+        return None
+
+    @staticmethod
+    def _response(model: str, text: str, prompt_tokens: int, finished: bool) -> Dict:
+        candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finished:
+            candidate["finishReason"] = "STOP"
+        return {
+            "candidates": [candidate],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": estimate_tokens(text),
+                "totalTokenCount": prompt_tokens + estimate_tokens(text),
+            },
+            "modelVersion": model,
+        }
+
+    def _enter(self) -> None:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    async def generate(self, request: web.Request) -> web.Response:
+        self._enter()
+        try:
+            body = await request.json()
+            failure = self._failure()
+            if failure is not None:
+                return failure
+            text = self._output_for(body)
+            await asyncio.sleep(
+                self._jittered(self.config.first_token_seconds)
+                + estimate_tokens(text) / self._jittered(self.config.tokens_per_second))
+            return web.json_response(self._response(
+                request.match_info["model"], text, estimate_tokens(json.dumps(body)), finished=True))
+        finally:
+            self.in_flight -= 1
+
+    async def stream(self, request: web.Request) -> web.StreamResponse:
+        self._enter()
+        try:
+            body = await request.json()
+            failure = self._failure()
+            if failure is not None:
+                return failure
+            text = self._output_for(body)
+            model = request.match_info["model"]
+            prompt_tokens = estimate_tokens(json.dumps(body))
+
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            await asyncio.sleep(self._jittered(self.config.first_token_seconds))
+
+            chunk_chars = self.config.chunk_tokens * 4
+            chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+            rate = self._jittered(self.config.tokens_per_second)
+            for i, chunk in enumerate(chunks):
+                if i:
+                    await asyncio.sleep(estimate_tokens(chunk) / rate)
+                payload = self._response(model, chunk, prompt_tokens, finished=i == len(chunks) - 1)
+                await response.write(f"data: {json.dumps(payload)}\r\n\r\n".encode("utf-8"))
+            await response.write_eof()
+            return response
+        finally:
+            self.in_flight -= 1
+
+    async def create_cache(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response({
+            "name": f"cachedContents/{uuid.uuid4().hex[:12]}",
+            "model": body.get("model"),
+            "displayName": body.get("displayName", ""),
+            "expireTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 900)),
+        })
+
+    async def delete_cache(self, request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "errors": self.errors, "max_in_flight": self.max_in_flight}
+
+
+class FakeJobSites:
+    """
+    Serves the fixture job pages under /<site>/....
+
+    The last path segment is worked into the description, so distinct job URLs
+    give distinct descriptions and prompts, and LLM response cache hits happen
+    only when the load test repeats URLs.
+    """
+
+    def __init__(self, latency_seconds: float = 0.05):
+        self.latency_seconds = latency_seconds
+        self.pages = {site: (FIXTURES_DIR / fixture).read_text(encoding="utf-8") for site, (_, fixture) in SITES.items()}
+        self.requests = 0
+
+    def routes(self) -> List[web.RouteDef]:
+        return [web.get("/{site}/{path:.*}", self.page)]
+
+    async def page(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        html = self.pages.get(request.match_info["site"])
+        if html is None:
+            raise web.HTTPNotFound()
+        if self.latency_seconds > 0:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency_seconds)
+        job_ref = re.sub(r"[^A-Za-z0-9-]", "", request.match_info["path"].rstrip("/").rsplit("/", 1)[-1])[:40]
+        html = html.replace(DESCRIPTION_MARKER, f"Job reference {job_ref}. {DESCRIPTION_MARKER}")
+        return web.Response(text=html, content_type="text/html")
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests}
+
+
+class FakeServers:
+    """Runs FakeGemini and FakeJobSites on local ports."""
+
+    def __init__(self, gemini: FakeGemini, job_sites: FakeJobSites, host: str = "127.0.0.1", gemini_port: int = 8701, sites_port: int = 8702):
+        self.gemini = gemini
+        self.job_sites = job_sites
+        self.host = host
+        self.gemini_port = gemini_port
+        self.sites_port = sites_port
+        self._runners: List[web.AppRunner] = []
+
+    async def start(self) -> None:
+        for service, port in ((self.gemini, self.gemini_port), (self.job_sites, self.sites_port)):
+            app = web.Application(client_max_size=32 * 1024 * 1024)
+            app.add_routes(service.routes())
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, self.host, port).start()
+            self._runners.append(runner)
+
+    async def stop(self) -> None:
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners = []
+
+    def api_environment(self) -> Dict[str, str]:
+        """Environment variables pointing the API at these servers."""
+        sites_url = f"http://{self.host}:{self.sites_port}"
+        return {
+            "GOOGLE_AI_API_KEY": "load-test",
+            "GEMINI_MODEL_ID": "fake-gemini",
+            "GEMINI_BASE_URL": f"http://{self.host}:{self.gemini_port}",
+            "SCRAPER_HOST_OVERRIDES": ",".join(f"{domain}={sites_url}/{site}" for site, (domain, _) in SITES.items()),
+        }
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"gemini": self.gemini.stats(), "job_sites": self.job_sites.stats()}
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options shared by this module and the load test driver."""
+    group = parser.add_argument_group("fake upstreams")
+    group.add_argument("--llm-first-token", type=float, default=0.5, help="Fake LLM seconds to first token")
+    group.add_argument("--llm-tokens-per-second", type=float, default=200.0, help="Fake LLM generation speed")
+    group.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of fake LLM calls failing with 503")
+    group.add_argument("--site-latency", type=float, default=0.05, help="Mean fake job site response time in seconds")
+    group.add_argument("--gemini-port", type=int, default=8701)
+    group.add_argument("--sites-port", type=int, default=8702)
+
+
+def from_arguments(args: argparse.Namespace) -> FakeServers:
+    gemini = FakeGemini(FakeGeminiConfig(
+        first_token_seconds=args.llm_first_token,
+        tokens_per_second=args.llm_tokens_per_second,
+        error_rate=args.llm_error_rate,
+    ))
+    return FakeServers(gemini, FakeJobSites(args.site_latency), gemini_port=args.gemini_port, sites_port=args.sites_port)
+
+
+async def _serve(servers: FakeServers) -> None:
+    await servers.start()
+    print("Fake upstreams running; start the API with:")
+    for name, value in servers.api_environment().items():
+        print(f"  export {name}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servers.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the fake Gemini and job site servers")
+    add_arguments(parser)
+    try:
+        asyncio.run(_serve(from_arguments(parser.parse_args())))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+End-to-end load test of the API against local fake upstreams.
+
+Starts the fake Gemini and job site servers, starts the API (uvicorn main:app)
+pointed at them, and drives a mix of endpoints with a fixed number of
+concurrent clients for each concurrency level. Reports per endpoint and level:
+throughput, p50/p90/p99 latency, time to first byte for streams, and errors by
+status. Run from the backend directory:
+
+    python -m loadtest.run --concurrency 1,8,32 --duration 20 --output run.json
+    python -m loadtest.run --concurrency 1,8,32 --duration 20 --compare run.json
+
+Pass API settings to compare configurations with --api-env, e.g.
+--api-env LLM_MAX_CONCURRENCY=8. Use --target to drive an API you started
+yourself with the environment printed by `python -m loadtest.fake_servers`.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from loadtest.fake_servers import FIXTURES_DIR, add_arguments, from_arguments
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+JOB_URLS = (
+    "https://www.linkedin.com/jobs/view/{n}",
+    "https://uk.indeed.com/viewjob/{n}",
+    "https://www.reed.co.uk/jobs/senior-backend-engineer/{n}",
+)
+
+
+@dataclass
+class Endpoint:
+    path: str
+    stream: bool = False
+    form: Dict[str, str] = field(default_factory=dict)
+
+
+ENDPOINTS = {
+    "adapt-cv": Endpoint("/api/adapt-cv"),
+    "cover-letter": Endpoint("/api/generate-cover-letter"),
+    "general-purpose": Endpoint(
+        "/api/general-purpose", form={"additional_instructions": "List the five most important requirements."}),
+    "application-pack": Endpoint("/api/application-pack"),
+    "adapt-cv-stream": Endpoint("/api/adapt-cv/stream", stream=True),
+    "cover-letter-stream": Endpoint("/api/generate-cover-letter/stream", stream=True),
+}
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: str  # HTTP status, "stream_error" for an SSE error event, or the exception name
+    latency: float
+    ttfb: Optional[float] = None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(int(round(pct / 100 * len(ordered))) - 1, 0))]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    endpoints: Dict[str, Dict[str, Any]] = {}
+    for name in sorted({s.endpoint for s in samples}):
+        mine = [s for s in samples if s.endpoint == name]
+        ok = [s for s in mine if s.status == "200"]
+        latencies = [s.latency * 1000 for s in ok]
+        summary = {
+            "requests": len(mine),
+            "ok": len(ok),
+            "errors": dict(Counter(s.status for s in mine if s.status != "200")),
+            "error_rate": 1 - len(ok) / len(mine),
+            "rps": len(ok) / elapsed,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies, default=0.0),
+                "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            },
+        }
+        ttfbs = [s.ttfb * 1000 for s in ok if s.ttfb is not None]
+        if ttfbs:
+            summary["ttfb_ms"] = {"p50": percentile(ttfbs, 50), "p99": percentile(ttfbs, 99)}
+        endpoints[name] = summary
+    return endpoints
+
+
+class LoadDriver:
+    """Closed-loop clients: each sends its next request as soon as the previous one finishes."""
+
+    def __init__(self, base_url: str, endpoints: List[str], distinct_jobs: int, reuse_cv: bool, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.endpoints = endpoints
+        self.distinct_jobs = distinct_jobs
+        self.reuse_cv = reuse_cv
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cv_pdf = (FIXTURES_DIR / "cv_1_page.pdf").read_bytes()
+        self.cv_id: Optional[str] = None
+        self._job_counter = itertools.count()
+
+    def _job_url(self) -> str:
+        n = next(self._job_counter)
+        if self.distinct_jobs > 0:
+            n %= self.distinct_jobs
+        return JOB_URLS[n % len(JOB_URLS)].format(n=1000000 + n)
+
+    def _form(self, endpoint: Endpoint) -> aiohttp.FormData:
+        form = aiohttp.FormData()
+        if self.cv_id:
+            form.add_field("cv_id", self.cv_id)
+        else:
+            form.add_field("cv_file", self.cv_pdf, filename="cv.pdf", content_type="application/pdf")
+        form.add_field("job_url", self._job_url())
+        for name, value in endpoint.form.items():
+            form.add_field(name, value)
+        return form
+
+    async def upload_cv(self, session: aiohttp.ClientSession) -> None:
+        form = aiohttp.FormData()
+        form.add_field("cv_file", self.cv_pdf, filename="cv.pdf", content_type="application/pdf")
+        async with session.post(f"{self.base_url}/api/cv", data=form) as response:
+            response.raise_for_status()
+            self.cv_id = (await response.json())["cv_id"]
+
+    async def _request(self, session: aiohttp.ClientSession, name: str) -> Sample:
+        endpoint = ENDPOINTS[name]
+        started = time.perf_counter()
+        ttfb = None
+        try:
+            async with session.post(f"{self.base_url}{endpoint.path}", data=self._form(endpoint)) as response:
+                status = str(response.status)
+                if endpoint.stream:
+                    body = bytearray()
+                    async for chunk in response.content.iter_any():
+                        if ttfb is None:
+                            ttfb = time.perf_counter() - started
+                        body += chunk
+                    if status == "200" and b"event: error" in body:
+                        status = "stream_error"
+                else:
+                    await response.read()
+        except Exception as e:
+            status = type(e).__name__
+        return Sample(name, status, time.perf_counter() - started, ttfb)
+
+    async def run_level(self, concurrency: int, duration: float) -> Dict[str, Any]:
+        samples: List[Sample] = []
+        deadline = time.perf_counter() + duration
+        connector = aiohttp.TCPConnector(limit=concurrency)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            if self.reuse_cv and self.cv_id is None:
+                await self.upload_cv(session)
+
+            async def client(index: int) -> None:
+                for name in itertools.islice(itertools.cycle(self.endpoints), index % len(self.endpoints), None):
+                    if time.perf_counter() >= deadline:
+                        return
+                    samples.append(await self._request(session, name))
+
+            started = time.perf_counter()
+            await asyncio.gather(*[client(i) for i in range(concurrency)])
+            elapsed = time.perf_counter() - started
+
+        return {"concurrency": concurrency, "elapsed_s": elapsed, "endpoints": summarize(samples, elapsed)}
+
+
+def start_api(port: int, environment: Dict[str, str], log_path: str) -> subprocess.Popen:
+    env = {**os.environ, **environment}
+    # The API logs every request at INFO; keep that out of the report
+    with open(log_path, "ab") as log:
+        return subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_until_healthy(base_url: str, api: Optional[subprocess.Popen], timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if api is not None and api.poll() is not None:
+                raise RuntimeError(f"API exited with status {api.returncode} during startup")
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"API at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+async def fetch_stats(base_url: str) -> Dict[str, Any]:
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base_url}/stats") as response:
+                return await response.json()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    previous = {}
+    if baseline:
+        for level in baseline["levels"]:
+            for name, summary in level["endpoints"].items():
+                previous[(level["concurrency"], name)] = summary
+
+    def change(current: float, key: tuple, path: tuple) -> str:
+        base = previous.get(key)
+        if base is None:
+            return ""
+        for part in path:
+            base = base[part]
+        return f" ({(current / base - 1):+.0%})" if base else ""
+
+    header = f"{'conc':>4} {'endpoint':20} {'ok':>6} {'err%':>6} {'rps':>14} {'p50 ms':>16} {'p99 ms':>16} {'ttfb p50':>9}"
+    print(header)
+    print("-" * len(header))
+    for level in report["levels"]:
+        for name, s in level["endpoints"].items():
+            key = (level["concurrency"], name)
+            latency = s["latency_ms"]
+            ttfb = f"{s['ttfb_ms']['p50']:.0f}" if "ttfb_ms" in s else "-"
+            print(
+                f"{level['concurrency']:>4} {name:20} {s['ok']:>6} {s['error_rate']:>6.1%} "
+                f"{s['rps']:>6.2f}{change(s['rps'], key, ('rps',)):>8} "
+                f"{latency['p50']:>7.0f}{change(latency['p50'], key, ('latency_ms', 'p50')):>9} "
+                f"{latency['p99']:>7.0f}{change(latency['p99'], key, ('latency_ms', 'p99')):>9} {ttfb:>9}")
+            if s["errors"]:
+                print(f"{'':>4} {'':20} errors: {s['errors']}")
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    servers = from_arguments(args)
+    await servers.start()
+    api = None
+    try:
+        base_url = args.target
+        if base_url is None:
+            environment = {
+                **servers.api_environment(),
+                # One client address sends every request; the rate limiter would cap the test
+                "RATE_LIMIT_ENABLED": "false",
+            }
+            environment.update(dict(item.split("=", 1) for item in args.api_env))
+            api = start_api(args.port, environment, args.api_log)
+            base_url = f"http://127.0.0.1:{args.port}"
+        await wait_until_healthy(base_url, api)
+
+        driver = LoadDriver(base_url, args.endpoints, args.distinct_jobs, args.reuse_cv, args.request_timeout)
+        levels = []
+        for concurrency in args.concurrency:
+            print(f"Running {concurrency} concurrent clients for {args.duration:.0f}s...", file=sys.stderr)
+            levels.append(await driver.run_level(concurrency, args.duration))
+
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "machine": platform.platform(),
+            "config": {
+                "endpoints": args.endpoints,
+                "duration_s": args.duration,
+                "distinct_jobs": args.distinct_jobs,
+                "reuse_cv": args.reuse_cv,
+                "api_env": args.api_env,
+                "llm_first_token_s": args.llm_first_token,
+                "llm_tokens_per_second": args.llm_tokens_per_second,
+                "llm_error_rate": args.llm_error_rate,
+                "site_latency_s": args.site_latency,
+            },
+            "levels": levels,
+            "upstreams": servers.stats(),
+            "api_stats": await fetch_stats(base_url),
+        }
+    finally:
+        if api is not None:
+            api.terminate()
+            try:
+                api.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                api.kill()
+        await servers.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 8, 32],
+                        help="Comma-separated concurrent client counts, one run each")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--endpoints", type=lambda v: v.split(","), default=["adapt-cv", "cover-letter", "adapt-cv-stream"],
+                        help=f"Comma-separated mix of {', '.join(ENDPOINTS)}")
+    parser.add_argument("--distinct-jobs", type=int, default=0,
+                        help="Cycle through this many job URLs (0: every request uses a new one, so no cache hits)")
+    parser.add_argument("--reuse-cv", action="store_true", help="Upload the CV once and send cv_id instead of the file")
+    parser.add_argument("--request-timeout", type=float, default=300.0)
+    parser.add_argument("--port", type=int, default=8700, help="Port for the API started by the harness")
+    parser.add_argument("--target", help="Base URL of an already running API instead of starting one")
+    parser.add_argument("--api-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra environment for the API; repeatable")
+    parser.add_argument("--api-log", default=os.devnull, help="File receiving the API's log output")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="Earlier JSON report to show changes against")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.endpoints if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+
+    report = asyncio.run(main_async(args))
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print_report(report, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote report to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,67 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
+from starlette.datastructures import UploadFile as StarletteUploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import uvicorn
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional
+import io
+import json
 import logging
+import math
 import os
 
-from services.cv_processor import CVProcessor
+from services.admission import AdmissionController, AdmissionMiddleware
+from services.cv_processor import CVLimitError, CVProcessor
 from services.job_scraper import JobScraper
 from services.llm_adapter import LLMAdapter
+from services.metrics import MetricsMiddleware, instrument_services, render_metrics
+from services.model_chain import served_models
 from services.pdf_generator import PDFGenerator
-from models.schemas import AdaptCVResponse, CoverLetterResponse, GeneralPurposeResponse, ErrorResponse
+from services.pdf_renderer import PDFRenderService, RenderQueueFullError
+from services.job_queue import Job, JobQueue, JobQueueFullError
+from services.profiling import install_profiling
+from services.pipeline import PipelineContext, PipelineInputError, RequestPipeline
+from services.resilience import CircuitOpenError
+from models.schemas import (
+    AdaptCVResponse, ApplicationPackResponse, CoverLetterResponse, GeneralPurposeResponse,
+    CVUploadResponse, JobStatusResponse, JobSubmitResponse, ErrorResponse
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown."""
+    await job_scraper.start()
+    await cv_processor.start()
+    await pdf_renderer.start()
+    await job_queue.start()
+    yield
+    await job_queue.close()
+    await job_scraper.close()
+    await cv_processor.close()
+    await pdf_renderer.close()
+    await llm_adapter.context_cache.close()
+    llm_adapter.response_cache.close()
+
 app = FastAPI(
     title="CV Adapter API",
     description="API for adapting CVs and generating cover letters using LLM",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Opt-in cProfile hook; not installed at all unless PROFILING_ENABLED is set
+install_profiling(app)
+
+# Shed excess load on the LLM routes before it reaches the handlers; added before
+# CORS so rejections still carry CORS headers
+admission = AdmissionController()
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -33,11 +73,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so shed and failed requests are counted too
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
 # Initialize services
 cv_processor = CVProcessor()
 job_scraper = JobScraper()
 llm_adapter = LLMAdapter()
 pdf_generator = PDFGenerator()
+pdf_renderer = PDFRenderService(pdf_generator)
+pipeline = RequestPipeline(cv_processor, job_scraper)
+
+def _charge_llm_calls(request: Request, calls: int) -> None:
+    """Charge the caller's rate limit for every LLM call a request fans out to."""
+    retry_after = admission.charge(request.scope, calls)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(math.ceil(retry_after), 1))}
+        )
 
 @app.get("/")
 async def root():
@@ -47,9 +102,81 @@ async def root():
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/stats")
+async def stats():
+    """Expose connection pool and cache counters for monitoring."""
+    return {
+        "scraper_pool": job_scraper.pool_stats(),
+        "job_cache": job_scraper.cache_stats(),
+        "llm_cache": llm_adapter.response_cache.stats(),
+        "prompt_budget": llm_adapter.prompt_compactor.stats(),
+        "context_cache": llm_adapter.context_cache.stats(),
+        "llm_models": llm_adapter.model_chain.stats(),
+        "admission": admission.stats(),
+        "upstreams": {
+            "llm": llm_adapter.resilience.stats(),
+            "job_sites": job_scraper.resilience.stats()
+        },
+        "pdf_renderer": pdf_renderer.stats(),
+        "jobs": job_queue.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Expose Prometheus metrics for this worker."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.post("/api/cv", response_model=CVUploadResponse)
+async def upload_cv(cv_file: UploadFile = File(...)):
+    """
+    Upload a CV once and get a handle for follow-up requests.
+
+    Args:
+        cv_file: PDF or TXT file containing the CV
+
+    Returns:
+        CVUploadResponse: The cv_id to send instead of cv_file, valid for expires_in_seconds
+    """
+    try:
+        logger.info("Processing CV upload")
+
+        if cv_file.content_type not in RequestPipeline.SUPPORTED_CONTENT_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid file type. Please upload a PDF or TXT file."
+            )
+
+        cv_id, cv_content = await cv_processor.register_file(cv_file)
+        if not cv_content.strip():
+            raise HTTPException(
+                status_code=400,
+                detail="Could not extract text from the CV file."
+            )
+
+        logger.info(f"CV uploaded successfully as {cv_id[:12]}")
+        return CVUploadResponse(
+            cv_id=cv_id,
+            cv_length=len(cv_content),
+            expires_in_seconds=cv_processor.expires_in_seconds(cv_id)
+        )
+
+    except HTTPException:
+        raise
+    except CVLimitError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error uploading CV: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
 @app.post("/api/adapt-cv", response_model=AdaptCVResponse)
 async def adapt_cv(
-    cv_file: UploadFile = File(...),
+    response: Response,
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
     job_url: str = Form(...),
     additional_instructions: Optional[str] = Form(None)
 ):
@@ -58,6 +185,7 @@ async def adapt_cv(
     
     Args:
         cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
         job_url: URL to the job description (LinkedIn, Indeed, Reed)
     
     Returns:
@@ -66,41 +194,24 @@ async def adapt_cv(
     try:
         logger.info(f"Processing CV adaptation request for URL: {job_url}")
         
-        # Validate file type
-        if cv_file.content_type not in ["application/pdf", "text/plain"]:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file type. Please upload a PDF or TXT file."
-            )
-        
-        # Read and process CV file
-        cv_content = await cv_processor.extract_text_from_file(cv_file)
-        if not cv_content.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract text from the CV file."
-            )
-        
-        # Scrape job description
-        job_description = await job_scraper.scrape_job_description(job_url)
-        if not job_description.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract job description from the provided URL."
-            )
-        
-        # Adapt CV using LLM
-        adapted_cv = await llm_adapter.adapt_cv(cv_content, job_description, additional_instructions=additional_instructions)
+        ctx, adapted_cv = await pipeline.execute(
+            cv_file, job_url,
+            lambda ctx: llm_adapter.adapt_cv(
+                ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions),
+            cv_id=cv_id
+        )
         
-        logger.info("CV adaptation completed successfully")
+        logger.info(f"CV adaptation completed successfully ({ctx.format_timings()})")
+        response.headers["Server-Timing"] = ctx.server_timing()
         return AdaptCVResponse(
             adapted_cv=adapted_cv,
-            job_description=job_description,
-            original_cv_length=len(cv_content),
-            job_description_length=len(job_description)
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
         )
         
-    except HTTPException:
+    except (HTTPException, PipelineInputError, CircuitOpenError):
         raise
     except Exception as e:
         logger.error(f"Error adapting CV: {str(e)}")
@@ -111,7 +222,9 @@ async def adapt_cv(
 
 @app.post("/api/generate-cover-letter", response_model=CoverLetterResponse)
 async def generate_cover_letter(
-    cv_file: UploadFile = File(...),
+    response: Response,
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
     job_url: str = Form(...),
     additional_instructions: Optional[str] = Form(None)
 ):
@@ -120,6 +233,7 @@ async def generate_cover_letter(
     
     Args:
         cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
         job_url: URL to the job description (LinkedIn, Indeed, Reed)
     
     Returns:
@@ -128,41 +242,24 @@ async def generate_cover_letter(
     try:
         logger.info(f"Processing cover letter generation request for URL: {job_url}")
         
-        # Validate file type
-        if cv_file.content_type not in ["application/pdf", "text/plain"]:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file type. Please upload a PDF or TXT file."
-            )
-        
-        # Read and process CV file
-        cv_content = await cv_processor.extract_text_from_file(cv_file)
-        if not cv_content.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract text from the CV file."
-            )
-        
-        # Scrape job description
-        job_description = await job_scraper.scrape_job_description(job_url)
-        if not job_description.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract job description from the provided URL."
-            )
-        
-        # Generate cover letter using LLM
-        cover_letter = await llm_adapter.generate_cover_letter(cv_content, job_description, additional_instructions=additional_instructions)
+        ctx, cover_letter = await pipeline.execute(
+            cv_file, job_url,
+            lambda ctx: llm_adapter.generate_cover_letter(
+                ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions),
+            cv_id=cv_id
+        )
         
-        logger.info("Cover letter generation completed successfully")
+        logger.info(f"Cover letter generation completed successfully ({ctx.format_timings()})")
+        response.headers["Server-Timing"] = ctx.server_timing()
         return CoverLetterResponse(
             cover_letter=cover_letter,
-            job_description=job_description,
-            original_cv_length=len(cv_content),
-            job_description_length=len(job_description)
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
         )
         
-    except HTTPException:
+    except (HTTPException, PipelineInputError, CircuitOpenError):
         raise
     except Exception as e:
         logger.error(f"Error generating cover letter: {str(e)}")
@@ -173,7 +270,9 @@ async def generate_cover_letter(
 
 @app.post("/api/general-purpose", response_model=GeneralPurposeResponse)
 async def general_purpose(
-    cv_file: UploadFile = File(...),
+    response: Response,
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
     job_url: str = Form(...),
     additional_instructions: Optional[str] = Form(None)
 ):
@@ -182,6 +281,7 @@ async def general_purpose(
     
     Args:
         cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
         job_url: URL to the job description (LinkedIn, Indeed, Reed)
         additional_instructions: Custom instructions for processing
     
@@ -191,58 +291,602 @@ async def general_purpose(
     try:
         logger.info(f"Processing general purpose request for URL: {job_url}")
         
-        # Validate file type
-        if cv_file.content_type not in ["application/pdf", "text/plain"]:
+        # Validate that additional instructions are provided
+        if not additional_instructions or not additional_instructions.strip():
             raise HTTPException(
                 status_code=400,
-                detail="Invalid file type. Please upload a PDF or TXT file."
+                detail="Additional instructions are required for general purpose processing."
             )
         
-        # Read and process CV file
-        cv_content = await cv_processor.extract_text_from_file(cv_file)
-        if not cv_content.strip():
+        ctx, processed_content = await pipeline.execute(
+            cv_file, job_url,
+            lambda ctx: llm_adapter.general_purpose_process(
+                ctx.cv_content, ctx.job_description, additional_instructions),
+            cv_id=cv_id
+        )
+        
+        logger.info(f"General purpose processing completed successfully ({ctx.format_timings()})")
+        response.headers["Server-Timing"] = ctx.server_timing()
+        return GeneralPurposeResponse(
+            processed_content=processed_content,
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        )
+        
+    except (HTTPException, PipelineInputError, CircuitOpenError):
+        raise
+    except Exception as e:
+        logger.error(f"Error in general purpose processing: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.post("/api/application-pack", response_model=ApplicationPackResponse)
+async def application_pack(
+    request: Request,
+    response: Response,
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_url: str = Form(...),
+    additional_instructions: Optional[str] = Form(None),
+    general_purpose_instructions: Optional[str] = Form(None)
+):
+    """
+    Adapt a CV and write a cover letter for one job in a single request.
+
+    The CV is extracted and the job scraped once; the LLM calls then run
+    concurrently, so the request takes about as long as the slowest call.
+
+    Args:
+        cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
+        job_url: URL to the job description (LinkedIn, Indeed, Reed)
+        additional_instructions: Extra instructions for the CV and cover letter
+        general_purpose_instructions: If given, also run general purpose processing with these instructions
+
+    Returns:
+        ApplicationPackResponse: The adapted CV, cover letter and optional general purpose output
+    """
+    try:
+        logger.info(f"Processing application pack request for URL: {job_url}")
+
+        include_general_purpose = bool(general_purpose_instructions and general_purpose_instructions.strip())
+        _charge_llm_calls(request, 3 if include_general_purpose else 2)
+
+        def generate(ctx: PipelineContext):
+            stages = {
+                "llm_adapt_cv": llm_adapter.adapt_cv(
+                    ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions),
+                "llm_cover_letter": llm_adapter.generate_cover_letter(
+                    ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions),
+            }
+            if include_general_purpose:
+                stages["llm_general_purpose"] = llm_adapter.general_purpose_process(
+                    ctx.cv_content, ctx.job_description, general_purpose_instructions)
+            return pipeline.run_parallel(ctx, stages)
+
+        ctx, results = await pipeline.execute(cv_file, job_url, generate, cv_id=cv_id)
+
+        logger.info(f"Application pack completed successfully ({ctx.format_timings()})")
+        response.headers["Server-Timing"] = ctx.server_timing()
+        return ApplicationPackResponse(
+            adapted_cv=results["llm_adapt_cv"],
+            cover_letter=results["llm_cover_letter"],
+            processed_content=results.get("llm_general_purpose"),
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        )
+
+    except (HTTPException, PipelineInputError, CircuitOpenError):
+        raise
+    except Exception as e:
+        logger.error(f"Error building application pack: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(chunks: AsyncIterator[str], build_final: Callable[[str], dict], label: str, ctx: PipelineContext) -> StreamingResponse:
+    """
+    Relay LLM HTML chunks as Server-Sent Events.
+
+    Emits a `chunk` event per fragment, then a `done` event carrying the response
+    metadata, or an `error` event if generation fails mid-stream.
+    """
+    async def event_stream():
+        parts = []
+        served_models.set(ctx.models)
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield _sse_event("chunk", {"html": chunk})
+            logger.info(f"{label} stream completed successfully ({ctx.format_timings()})")
+            yield _sse_event("done", build_final("".join(parts)))
+        except Exception as e:
+            logger.error(f"Error streaming {label}: {str(e)}")
+            yield _sse_event("error", {"detail": f"Internal server error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "Server-Timing": ctx.server_timing()
+        }
+    )
+
+@app.post("/api/adapt-cv/stream")
+async def adapt_cv_stream(
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_url: str = Form(...),
+    additional_instructions: Optional[str] = Form(None)
+):
+    """
+    Stream a CV adaptation as Server-Sent Events.
+
+    Args:
+        cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
+        job_url: URL to the job description (LinkedIn, Indeed, Reed)
+
+    Returns:
+        StreamingResponse: `chunk` events with HTML fragments, then a `done` event
+        with the same fields as AdaptCVResponse
+    """
+    try:
+        logger.info(f"Processing streamed CV adaptation request for URL: {job_url}")
+        ctx = await pipeline.prepare(cv_file, job_url, cv_id)
+
+        chunks = llm_adapter.adapt_cv_stream(
+            ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions)
+        return _sse_response(chunks, lambda html: AdaptCVResponse(
+            adapted_cv=html,
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        ).model_dump(), "CV adaptation", ctx)
+
+    except (HTTPException, PipelineInputError, CircuitOpenError):
+        raise
+    except Exception as e:
+        logger.error(f"Error adapting CV: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.post("/api/generate-cover-letter/stream")
+async def generate_cover_letter_stream(
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_url: str = Form(...),
+    additional_instructions: Optional[str] = Form(None)
+):
+    """
+    Stream a cover letter as Server-Sent Events.
+
+    Args:
+        cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
+        job_url: URL to the job description (LinkedIn, Indeed, Reed)
+
+    Returns:
+        StreamingResponse: `chunk` events with HTML fragments, then a `done` event
+        with the same fields as CoverLetterResponse
+    """
+    try:
+        logger.info(f"Processing streamed cover letter request for URL: {job_url}")
+        ctx = await pipeline.prepare(cv_file, job_url, cv_id)
+
+        chunks = llm_adapter.generate_cover_letter_stream(
+            ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions)
+        return _sse_response(chunks, lambda html: CoverLetterResponse(
+            cover_letter=html,
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        ).model_dump(), "Cover letter", ctx)
+
+    except (HTTPException, PipelineInputError, CircuitOpenError):
+        raise
+    except Exception as e:
+        logger.error(f"Error generating cover letter: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.post("/api/general-purpose/stream")
+async def general_purpose_stream(
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_url: str = Form(...),
+    additional_instructions: Optional[str] = Form(None)
+):
+    """
+    Stream general purpose processing as Server-Sent Events.
+
+    Args:
+        cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
+        job_url: URL to the job description (LinkedIn, Indeed, Reed)
+        additional_instructions: Custom instructions for processing
+
+    Returns:
+        StreamingResponse: `chunk` events with HTML fragments, then a `done` event
+        with the same fields as GeneralPurposeResponse
+    """
+    try:
+        logger.info(f"Processing streamed general purpose request for URL: {job_url}")
+
+        if not additional_instructions or not additional_instructions.strip():
             raise HTTPException(
                 status_code=400,
-                detail="Could not extract text from the CV file."
+                detail="Additional instructions are required for general purpose processing."
             )
-        
-        # Scrape job description
-        job_description = await job_scraper.scrape_job_description(job_url)
-        if not job_description.strip():
+
+        ctx = await pipeline.prepare(cv_file, job_url, cv_id)
+
+        chunks = llm_adapter.general_purpose_process_stream(
+            ctx.cv_content, ctx.job_description, additional_instructions)
+        return _sse_response(chunks, lambda html: GeneralPurposeResponse(
+            processed_content=html,
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        ).model_dump(), "General purpose", ctx)
+
+    except (HTTPException, PipelineInputError, CircuitOpenError):
+        raise
+    except Exception as e:
+        logger.error(f"Error in general purpose processing: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.post("/api/adapt-cv/batch")
+async def adapt_cv_batch(
+    request: Request,
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_urls: List[str] = Form(...),
+    additional_instructions: Optional[str] = Form(None)
+):
+    """
+    Adapt one CV against many job postings, streaming results as NDJSON.
+
+    Args:
+        cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
+        job_urls: Job posting URLs, as repeated form fields or whitespace-separated
+        additional_instructions: Extra instructions applied to every adaptation
+
+    Returns:
+        StreamingResponse: One JSON line per URL in completion order, each with its
+        `index` and `status` ("ok" with the AdaptCVResponse fields, or "error" with
+        `detail`), followed by a final `complete` summary line
+    """
+    try:
+        urls = [url for value in job_urls for url in value.split()]
+        logger.info(f"Processing batch CV adaptation request for {len(urls)} URLs")
+
+        if not urls:
             raise HTTPException(
                 status_code=400,
-                detail="Could not extract job description from the provided URL."
+                detail="At least one job URL is required."
             )
-        
-        # Validate that additional instructions are provided
-        if not additional_instructions or not additional_instructions.strip():
+        if len(urls) > pipeline.batch_max_urls:
             raise HTTPException(
                 status_code=400,
-                detail="Additional instructions are required for general purpose processing."
+                detail=f"Too many job URLs; the maximum per batch is {pipeline.batch_max_urls}."
             )
-        
-        # Process with LLM using custom instructions
-        processed_content = await llm_adapter.general_purpose_process(
-            cv_content, job_description, additional_instructions
+        _charge_llm_calls(request, len(urls))
+
+        cv_ctx = await pipeline.prepare_cv(cv_file, cv_id)
+
+        async def ndjson_lines():
+            succeeded = 0
+            items = pipeline.iter_batch(
+                cv_ctx, urls,
+                lambda ctx: llm_adapter.adapt_cv(
+                    ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions)
+            )
+            async for item in items:
+                payload = {"index": item.index, "job_url": item.job_url}
+                if item.error is None:
+                    succeeded += 1
+                    payload["status"] = "ok"
+                    payload.update(AdaptCVResponse(
+                        adapted_cv=item.result,
+                        job_description=item.ctx.job_description,
+                        original_cv_length=len(item.ctx.cv_content),
+                        job_description_length=len(item.ctx.job_description),
+                        cv_id=item.ctx.cv_id
+                    ).model_dump())
+                    payload["timings_ms"] = {stage: round(ms, 1) for stage, ms in item.ctx.timings.items()}
+                else:
+                    payload["status"] = "error"
+                    payload["detail"] = str(item.error)
+                yield json.dumps(payload) + "\n"
+
+            logger.info(f"Batch CV adaptation completed: {succeeded}/{len(urls)} succeeded")
+            yield json.dumps({
+                "status": "complete",
+                "total": len(urls),
+                "succeeded": succeeded,
+                "failed": len(urls) - succeeded
+            }) + "\n"
+
+        return StreamingResponse(
+            ndjson_lines(),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
         )
-        
-        logger.info("General purpose processing completed successfully")
-        return GeneralPurposeResponse(
-            processed_content=processed_content,
-            job_description=job_description,
-            original_cv_length=len(cv_content),
-            job_description_length=len(job_description)
+
+    except (HTTPException, PipelineInputError, CircuitOpenError):
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch CV adaptation: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
         )
-        
-    except HTTPException:
+
+JOB_TASKS = ("adapt-cv", "generate-cover-letter", "general-purpose", "application-pack")
+
+async def _run_generation_job(job: Job, set_stage: Callable[[str], None]) -> dict:
+    """Run the extract, scrape, LLM and optional PDF stages for a queued job."""
+    params = job.params
+    additional_instructions = params.get("additional_instructions")
+
+    set_stage("prepare")
+    ctx = await pipeline.prepare(params.get("cv_file"), params["job_url"], params.get("cv_id"))
+
+    set_stage("llm")
+    if job.task == "adapt-cv":
+        html = await pipeline.run_stage(ctx, "llm", llm_adapter.adapt_cv(
+            ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions))
+        result = AdaptCVResponse(
+            adapted_cv=html,
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        ).model_dump()
+    elif job.task == "generate-cover-letter":
+        html = await pipeline.run_stage(ctx, "llm", llm_adapter.generate_cover_letter(
+            ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions))
+        result = CoverLetterResponse(
+            cover_letter=html,
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        ).model_dump()
+    elif job.task == "general-purpose":
+        html = await pipeline.run_stage(ctx, "llm", llm_adapter.general_purpose_process(
+            ctx.cv_content, ctx.job_description, additional_instructions))
+        result = GeneralPurposeResponse(
+            processed_content=html,
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        ).model_dump()
+    else:
+        general_purpose_instructions = params.get("general_purpose_instructions")
+        stages = {
+            "llm_adapt_cv": llm_adapter.adapt_cv(
+                ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions),
+            "llm_cover_letter": llm_adapter.generate_cover_letter(
+                ctx.cv_content, ctx.job_description, additional_instructions=additional_instructions),
+        }
+        if general_purpose_instructions:
+            stages["llm_general_purpose"] = llm_adapter.general_purpose_process(
+                ctx.cv_content, ctx.job_description, general_purpose_instructions)
+        results = await pipeline.run_stage(ctx, "llm", pipeline.run_parallel(ctx, stages))
+        html = results["llm_adapt_cv"]
+        result = ApplicationPackResponse(
+            adapted_cv=results["llm_adapt_cv"],
+            cover_letter=results["llm_cover_letter"],
+            processed_content=results.get("llm_general_purpose"),
+            job_description=ctx.job_description,
+            original_cv_length=len(ctx.cv_content),
+            job_description_length=len(ctx.job_description),
+            cv_id=ctx.cv_id
+        ).model_dump()
+
+    if params.get("render_pdf"):
+        set_stage("pdf")
+        job.pdf = await pipeline.run_stage(ctx, "pdf", pdf_renderer.render(html))
+
+    logger.info(f"Job {job.job_id} ({job.task}) completed successfully ({ctx.format_timings()})")
+    return result
+
+job_queue = JobQueue(_run_generation_job)
+
+instrument_services(
+    cv_processor, job_scraper, llm_adapter, pdf_renderer,
+    extra_stats={
+        "admission": admission.stats,
+        "pdf_renderer": pdf_renderer.stats,
+        "jobs": job_queue.stats,
+        "prompt_budget": llm_adapter.prompt_compactor.stats,
+        "context_cache": llm_adapter.context_cache.stats,
+    }
+)
+
+def _get_job_or_404(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Unknown or expired job_id."
+        )
+    return job
+
+@app.post("/api/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(
+    request: Request,
+    task: str = Form(...),
+    cv_file: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_url: str = Form(...),
+    additional_instructions: Optional[str] = Form(None),
+    general_purpose_instructions: Optional[str] = Form(None),
+    render_pdf: bool = Form(False)
+):
+    """
+    Queue a generation job and return immediately.
+
+    Args:
+        task: One of adapt-cv, generate-cover-letter, general-purpose, application-pack
+        cv_file: PDF or TXT file containing the CV
+        cv_id: Handle from /api/cv, used in place of cv_file
+        job_url: URL to the job description (LinkedIn, Indeed, Reed)
+        additional_instructions: Extra instructions (required for general-purpose)
+        general_purpose_instructions: For application-pack, also run general purpose processing
+        render_pdf: Also render the main HTML result to PDF
+
+    Returns:
+        JobSubmitResponse: The job_id plus URLs to poll or subscribe to its status
+    """
+    try:
+        if task not in JOB_TASKS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown task. Use one of: {', '.join(JOB_TASKS)}."
+            )
+        if task == "general-purpose" and (not additional_instructions or not additional_instructions.strip()):
+            raise HTTPException(
+                status_code=400,
+                detail="Additional instructions are required for general purpose processing."
+            )
+        pipeline.validate_cv_source(cv_file, cv_id)
+        include_general_purpose = bool(general_purpose_instructions and general_purpose_instructions.strip())
+        if task == "application-pack":
+            _charge_llm_calls(request, 3 if include_general_purpose else 2)
+
+        buffered_cv = None
+        if cv_file is not None:
+            # The request's upload is closed once we respond, so keep a copy for the worker
+            content = await cv_file.read(cv_processor.max_bytes + 1)
+            if len(content) > cv_processor.max_bytes:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"CV file is too large; the maximum is {cv_processor.max_bytes // 1024} KB."
+                )
+            buffered_cv = StarletteUploadFile(
+                file=io.BytesIO(content), filename=cv_file.filename, headers=cv_file.headers)
+
+        # The job keeps the request's in-flight slot until it finishes, not just until the 202
+        release_slot = admission.hand_over(request.scope)
+        try:
+            job = job_queue.submit(task, {
+                "cv_file": buffered_cv,
+                "cv_id": cv_id,
+                "job_url": job_url,
+                "additional_instructions": additional_instructions,
+                "general_purpose_instructions": (general_purpose_instructions or "").strip() or None,
+                "render_pdf": render_pdf,
+            }, on_finish=release_slot)
+        except JobQueueFullError:
+            if release_slot is not None:
+                release_slot()
+            raise
+
+        logger.info(f"Queued job {job.job_id} ({task}) for URL: {job_url}")
+        return JobSubmitResponse(
+            job_id=job.job_id,
+            status=job.status.value,
+            status_url=f"/api/jobs/{job.job_id}",
+            events_url=f"/api/jobs/{job.job_id}/events"
+        )
+
+    except (HTTPException, PipelineInputError, CircuitOpenError):
         raise
+    except JobQueueFullError as e:
+        logger.warning(f"Rejecting job submission: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
     except Exception as e:
-        logger.error(f"Error in general purpose processing: {str(e)}")
+        logger.error(f"Error submitting job: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """Poll a job's status, stage and, once finished, its result or error."""
+    return JobStatusResponse(**_get_job_or_404(job_id).snapshot())
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Subscribe to a job's status as Server-Sent Events.
+
+    Emits a `status` event with the job snapshot on every change; the stream ends
+    after the snapshot with a terminal status.
+    """
+    _get_job_or_404(job_id)
+
+    async def event_stream():
+        async for snapshot in job_queue.subscribe(job_id):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield _sse_event("status", snapshot)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/jobs/{job_id}/pdf")
+async def get_job_pdf(job_id: str):
+    """Download the PDF rendered by a job submitted with render_pdf."""
+    job = _get_job_or_404(job_id)
+    if job.pdf is None:
+        raise HTTPException(
+            status_code=409 if not job.done else 404,
+            detail="PDF is not available for this job."
+        )
+    return Response(
+        content=job.pdf,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={job.task}.pdf"
+        }
+    )
+
+@app.delete("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job."""
+    _get_job_or_404(job_id)
+    job = job_queue.cancel(job_id)
+    logger.info(f"Job {job_id} is {job.status.value} after cancellation request")
+    return JobStatusResponse(**job.snapshot())
+
 @app.post("/api/convert-to-pdf")
 async def convert_html_to_pdf(
     content: str = Form(...)
@@ -265,8 +909,8 @@ async def convert_html_to_pdf(
                 detail="Content cannot be empty"
             )
         
-        # Generate PDF from HTML content
-        pdf_bytes = pdf_generator.html_to_pdf(content)
+        # Generate PDF from HTML content in the render pool
+        pdf_bytes = await pdf_renderer.render(content)
         
         logger.info("PDF generation completed successfully")
         
@@ -280,6 +924,13 @@ async def convert_html_to_pdf(
         
     except HTTPException:
         raise
+    except RenderQueueFullError as e:
+        logger.warning(f"Rejecting PDF conversion: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "2"}
+        )
     except Exception as e:
         logger.error(f"Error converting to PDF: {str(e)}")
         raise HTTPException(
@@ -291,7 +942,23 @@ async def convert_html_to_pdf(
 async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detail": exc.detail}
+        content={"detail": exc.detail},
+        headers=exc.headers
+    )
+
+@app.exception_handler(PipelineInputError)
+async def pipeline_input_exception_handler(request, exc):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)}
+    )
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_exception_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(int(exc.retry_after), 1))}
     )
 
 if __name__ == "__main__":
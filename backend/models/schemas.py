@@ -1,22 +1,57 @@
 from pydantic import BaseModel
+from typing import Any, Dict, Optional
 
 class AdaptCVResponse(BaseModel):
     adapted_cv: str
     job_description: str
     original_cv_length: int
     job_description_length: int
+    cv_id: Optional[str] = None
 
 class CoverLetterResponse(BaseModel):
     cover_letter: str
     job_description: str
     original_cv_length: int
     job_description_length: int
+    cv_id: Optional[str] = None
 
 class GeneralPurposeResponse(BaseModel):
     processed_content: str
     job_description: str
     original_cv_length: int
     job_description_length: int
+    cv_id: Optional[str] = None
     
+class ApplicationPackResponse(BaseModel):
+    adapted_cv: str
+    cover_letter: str
+    processed_content: Optional[str] = None
+    job_description: str
+    original_cv_length: int
+    job_description_length: int
+    cv_id: Optional[str] = None
+
+class CVUploadResponse(BaseModel):
+    cv_id: str
+    cv_length: int
+    expires_in_seconds: int
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    task: str
+    status: str
+    stage: str
+    created_at: float
+    updated_at: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    pdf_available: bool = False
+
 class ErrorResponse(BaseModel):
     detail: str
\ No newline at end of file
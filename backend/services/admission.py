@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Routes that end in one or more LLM calls; only POSTs to these are admission controlled
+LLM_ROUTE_PREFIXES = (
+    "/api/adapt-cv",
+    "/api/generate-cover-letter",
+    "/api/general-purpose",
+    "/api/application-pack",
+    "/api/jobs",
+)
+
+
+class AdmissionController:
+    """
+    Per-client token buckets plus a global cap on in-flight LLM requests.
+
+    Each client (API key if sent, otherwise IP address) gets a bucket refilled at
+    rate_per_minute up to burst tokens, and a token pays for one LLM call. A
+    request spends one token on admission; routes that fan out to several calls
+    (batches, application packs) charge the rest once they know the count.
+    Independently, no more than max_in_flight LLM requests run at once on this
+    worker; background jobs keep their slot until they finish. Requests over
+    either limit are rejected immediately rather than queued.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.rate_per_minute = float(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))
+        self.burst = float(os.getenv("RATE_LIMIT_BURST", "10"))
+        self.max_in_flight = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+        self.max_clients = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+        # Only honour X-Forwarded-For behind a proxy that sets it
+        self.trust_forwarded_for = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+        # client key -> (tokens, last refill); least recently seen first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+
+    def admit(self, client_key: str) -> Optional[float]:
+        """
+        Try to admit a request, reserving an in-flight slot on success.
+
+        Args:
+            client_key: Identity the rate limit applies to
+
+        Returns:
+            None if admitted (call release() when done), otherwise seconds to wait before retrying
+        """
+        if self.in_flight >= self.max_in_flight:
+            self.overloaded += 1
+            return 1.0
+
+        retry_after = self._take_token(client_key)
+        if retry_after is not None:
+            self.rate_limited += 1
+            return retry_after
+
+        self.in_flight += 1
+        self.admitted += 1
+        return None
+
+    def release(self) -> None:
+        """Free the in-flight slot of an admitted request."""
+        self.in_flight -= 1
+
+    def charge(self, scope: Dict[str, Any], calls: int) -> Optional[float]:
+        """
+        Charge an admitted request for all of its LLM calls.
+
+        The request already spent one token on admission. The bucket must hold the
+        whole cost, except that a cost above the burst only needs a full bucket and
+        leaves it in debt, so the largest batch is still possible but is paid back
+        before the client's next request.
+
+        Args:
+            scope: ASGI scope of the request, as marked by AdmissionMiddleware
+            calls: Number of LLM calls the request makes
+
+        Returns:
+            None if charged (or the request is not admission controlled), otherwise
+            seconds to wait before retrying; the admission token is refunded then
+        """
+        client_key = (scope.get("state") or {}).get("admission_client")
+        if client_key is None or calls <= 1:
+            return None
+
+        retry_after = self._take_token(client_key, cost=calls, credit=1)
+        if retry_after is not None:
+            self.rate_limited += 1
+        return retry_after
+
+    def hand_over(self, scope: Dict[str, Any]) -> Optional[Callable[[], None]]:
+        """
+        Detach a request's in-flight slot from its response, for work that outlives it.
+
+        Returns:
+            The callable that frees the slot once the work is done, or None if the
+            request holds no slot
+        """
+        state = scope.get("state") or {}
+        if not state.get("admission_slot"):
+            return None
+        state["admission_slot"] = False
+        return self.release
+
+    def client_key(self, scope: Dict[str, Any]) -> str:
+        """Identify the caller of an ASGI request by API key, else by IP address."""
+        headers = dict(scope.get("headers") or [])
+        api_key = headers.get(b"x-api-key")
+        if api_key:
+            # Hashed so keys never end up in logs or /stats
+            return "key:" + hashlib.sha256(api_key).hexdigest()[:16]
+
+        if self.trust_forwarded_for:
+            forwarded = headers.get(b"x-forwarded-for")
+            if forwarded:
+                return "ip:" + forwarded.decode("latin-1").split(",")[0].strip()
+
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return admission counters for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "admitted": self.admitted,
+            "rejected_rate_limited": self.rate_limited,
+            "rejected_overloaded": self.overloaded,
+            "clients": len(self._buckets),
+        }
+
+    def _take_token(self, client_key: str, cost: float = 1, credit: float = 0) -> Optional[float]:
+        now = time.monotonic()
+        refill_per_second = self.rate_per_minute / 60
+        tokens, updated = self._buckets.pop(client_key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * refill_per_second) + credit
+        required = min(cost, self.burst)
+
+        if tokens >= required:
+            tokens -= cost
+            retry_after = None
+        elif refill_per_second > 0:
+            retry_after = (required - tokens) / refill_per_second
+        else:
+            retry_after = 60.0
+
+        self._buckets[client_key] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to POSTs on the LLM routes."""
+
+    def __init__(self, app: Any, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if (
+            not self.controller.enabled
+            or scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(LLM_ROUTE_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client_key = self.controller.client_key(scope)
+        retry_after = self.controller.admit(client_key)
+        if retry_after is not None:
+            logger.warning(f"Rejected {scope['path']} for {client_key}, retry after {retry_after:.1f}s")
+            await self._reject(send, retry_after)
+            return
+
+        # Routes read these through request.scope to charge for extra LLM calls or
+        # hand the slot over to a background job
+        state = scope.setdefault("state", {})
+        state["admission_client"] = client_key
+        state["admission_slot"] = True
+        try:
+            # The slot is held until the response, including streamed bodies, is finished
+            await self.app(scope, receive, send)
+        finally:
+            if state["admission_slot"]:
+                self.controller.release()
+
+    async def _reject(self, send: Any, retry_after: float) -> None:
+        body = json.dumps({"detail": "Too many requests, please retry later"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(max(math.ceil(retry_after), 1)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """In-memory LRU cache with a per-entry TTL and a total size bound in bytes."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, sizeof: Optional[Callable[[Any], int]] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof or self._default_sizeof
+        # key -> (value, expires_at, size); ordered from least to most recently used
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value, evicting least recently used entries to stay within max_bytes."""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            # Never let a single oversized value flush the whole cache
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Return the seconds until an entry expires, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[1] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a key if present."""
+        if key in self._entries:
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    @staticmethod
+    def _default_sizeof(value: Any) -> int:
+        if isinstance(value, str):
+            return len(value.encode("utf-8"))
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        return sys.getsizeof(value)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single in-flight task."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once per key at a time; concurrent callers await the same result.
+
+        The shared task is shielded, so a caller that gives up does not cancel
+        the work for the others still waiting on it.
+
+        Args:
+            key: Identity of the call
+            fn: Zero-argument coroutine factory performing the work
+
+        Returns:
+            The result of fn, shared by every concurrent caller
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            task.add_done_callback(self._consume_exception)
+
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being computed."""
+        return len(self._calls)
+
+    @staticmethod
+    def _consume_exception(task: "asyncio.Task[Any]") -> None:
+        # Mark the exception as retrieved when every waiter has already gone away
+        if not task.cancelled():
+            task.exception()
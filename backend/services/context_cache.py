@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from google.genai import types
+
+from services.cache import SingleFlight, TTLCache
+from services.prompt_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ContextCacheHandle:
+    """A provider-side cached content and its local expiry."""
+    name: str
+    expires_at: float
+    tokens: int
+
+
+class GeminiContextCacheProvider:
+    """Creates and deletes cached contents through the Gemini caching API."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def create(self, model: str, text: str, ttl_seconds: float) -> str:
+        """Upload text as a cached content and return its resource name."""
+        cached = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+                ttl=f"{int(ttl_seconds)}s",
+                display_name="cv-maker-context"
+            )
+        )
+        return cached.name
+
+    async def delete(self, name: str) -> None:
+        await self.client.aio.caches.delete(name=name)
+
+
+class FakeContextCacheProvider:
+    """In-memory stand-in for the caching API, injected into LLMAdapter by tests."""
+
+    def __init__(self):
+        self.contents: Dict[str, str] = {}
+        self.created = 0
+        self.deleted = 0
+
+    async def create(self, model: str, text: str, ttl_seconds: float) -> str:
+        name = f"cachedContents/fake-{uuid.uuid4().hex}"
+        self.contents[name] = text
+        self.created += 1
+        return name
+
+    async def delete(self, name: str) -> None:
+        if self.contents.pop(name, None) is not None:
+            self.deleted += 1
+
+
+class ContextCacheRegistry:
+    """
+    Tracks provider-side cached contents for prompt prefixes shared across calls.
+
+    A prefix is uploaded the second time it is seen within the TTL (one-off
+    requests never pay for cache storage), and later calls reference the handle
+    instead of resending the text. Concurrent creations for the same prefix share
+    one upload, and failed uploads are not retried until the TTL passes.
+    """
+
+    def __init__(self, provider: Any):
+        self.provider = provider
+        self.enabled = os.getenv("CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+        self.ttl_seconds = float(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "900"))
+        # Providers reject cached contents below a model-specific minimum size
+        self.min_tokens = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+        self.min_uses = int(os.getenv("CONTEXT_CACHE_MIN_USES", "2"))
+        self.max_entries = int(os.getenv("CONTEXT_CACHE_MAX_ENTRIES", "1000"))
+        # Stop referencing a handle shortly before the provider expires it
+        self.expiry_margin = min(30.0, self.ttl_seconds / 10)
+
+        self._handles: "OrderedDict[str, ContextCacheHandle]" = OrderedDict()
+        # Prefix key -> number of times seen, or False after a failed upload
+        self._sightings = TTLCache(max_bytes=self.max_entries * 4, ttl_seconds=self.ttl_seconds, sizeof=lambda _: 1)
+        self._inflight = SingleFlight()
+        self.hits = 0
+        self.created = 0
+        self.failures = 0
+        self.tokens_reused = 0
+
+    async def get_or_create(self, model: str, text: str) -> Optional[str]:
+        """
+        Return the cached content name for a prefix, uploading it once it is reused.
+
+        Args:
+            model: Model the cached content is created for
+            text: Shared prompt prefix
+
+        Returns:
+            The cached content name, or None if the prompt should be sent in full
+        """
+        if not self.enabled:
+            return None
+
+        tokens = estimate_tokens(text)
+        if tokens < self.min_tokens:
+            return None
+
+        key = self.make_key(model, text)
+        handle = self._handles.get(key)
+        if handle is not None:
+            if handle.expires_at - self.expiry_margin > time.monotonic():
+                self._handles.move_to_end(key)
+                self.hits += 1
+                self.tokens_reused += handle.tokens
+                return handle.name
+            del self._handles[key]
+
+        seen = self._sightings.get(key)
+        if seen is False:
+            return None
+        seen = (seen or 0) + 1
+        self._sightings.set(key, seen)
+        if seen < self.min_uses:
+            return None
+
+        handle = await self._inflight.do(key, lambda: self._create(key, model, text, tokens))
+        return handle.name if handle is not None else None
+
+    def invalidate(self, name: str) -> None:
+        """Forget a handle the provider no longer recognises."""
+        for key, handle in list(self._handles.items()):
+            if handle.name == name:
+                del self._handles[key]
+
+    async def close(self) -> None:
+        """Delete every live cached content so storage is not billed until expiry."""
+        handles, self._handles = list(self._handles.values()), OrderedDict()
+        results = await asyncio.gather(
+            *[self.provider.delete(handle.name) for handle in handles], return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to delete cached context: {str(result)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return registry counters for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._handles),
+            "hits": self.hits,
+            "created": self.created,
+            "failures": self.failures,
+            "tokens_reused": self.tokens_reused,
+        }
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    async def _create(self, key: str, model: str, text: str, tokens: int) -> Optional[ContextCacheHandle]:
+        started = time.monotonic()
+        try:
+            name = await self.provider.create(model, text, self.ttl_seconds)
+        except Exception as e:
+            # Typically the model does not support caching or the prefix is below its minimum
+            logger.warning(f"Context cache creation failed, sending full prompts: {str(e)}")
+            self.failures += 1
+            self._sightings.set(key, False)
+            return None
+
+        handle = ContextCacheHandle(name=name, expires_at=started + self.ttl_seconds, tokens=tokens)
+        self._handles[key] = handle
+        self.created += 1
+        logger.info(f"Created context cache {name} (~{tokens} tokens)")
+
+        while len(self._handles) > self.max_entries:
+            _, evicted = self._handles.popitem(last=False)
+            asyncio.ensure_future(self._delete_quietly(evicted.name))
+        return handle
+
+    async def _delete_quietly(self, name: str) -> None:
+        try:
+            await self.provider.delete(name)
+        except Exception as e:
+            logger.warning(f"Failed to delete cached context {name}: {str(e)}")
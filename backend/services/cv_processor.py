@@ -1,71 +1,221 @@
 from fastapi import UploadFile
 import pypdf
+import asyncio
+import hashlib
 import io
 import logging
-from typing import Optional
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from services.cache import SingleFlight, TTLCache
 
 logger = logging.getLogger(__name__)
 
+
+class CVLimitError(ValueError):
+    """Raised when an upload exceeds the configured byte or page limits."""
+
+
+def _extract_pdf_pages(content: bytes, start: int, stop: Optional[int], max_pages: int) -> Tuple[int, List[str]]:
+    """
+    Extract the text of pages [start, stop) from a PDF.
+
+    Runs in a worker process. The page limit is checked before any page is
+    extracted so pathological documents are rejected early.
+
+    Returns:
+        Tuple of the document page count and the extracted page texts
+    """
+    try:
+        pdf_reader = pypdf.PdfReader(io.BytesIO(content))
+        page_count = len(pdf_reader.pages)
+        if page_count > max_pages:
+            raise CVLimitError(f"CV has {page_count} pages; the maximum is {max_pages}.")
+
+        stop = page_count if stop is None else min(stop, page_count)
+        return page_count, [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+    except CVLimitError:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading PDF: {str(e)}")
+        raise ValueError("Could not read PDF file. Please ensure it's not corrupted or password-protected.")
+
+
+def _warm_worker() -> int:
+    return os.getpid()
+
+
 class CVProcessor:
     """Service for processing CV files and extracting text content."""
-    
+
     def __init__(self):
         self.supported_formats = ["application/pdf", "text/plain"]
-    
+
+        # Limits that abort pathological uploads before they reach the parser
+        self.max_bytes = int(os.getenv("CV_MAX_BYTES", str(10 * 1024 * 1024)))
+        self.max_pages = int(os.getenv("CV_MAX_PAGES", "50"))
+
+        # PDF extraction runs in worker processes; larger documents are split into
+        # page ranges extracted in parallel
+        self.workers = int(os.getenv("CV_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.pages_per_task = max(int(os.getenv("CV_PAGES_PER_TASK", "4")), 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Extracted text keyed on the SHA-256 of the content type and uploaded bytes; the
+        # digest doubles as the cv_id handed out by the upload endpoint
+        self.cache_ttl = float(os.getenv("CV_CACHE_TTL_SECONDS", "3600"))
+        self.cache = TTLCache(
+            max_bytes=int(os.getenv("CV_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl_seconds=self.cache_ttl
+        )
+        self._inflight = SingleFlight()
+
+    async def start(self) -> None:
+        """Start the extraction pool and wait until its workers are up."""
+        if self.workers <= 0 or self._executor is not None:
+            return
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _warm_worker) for _ in range(self.workers)
+        ])
+        logger.info(f"CV extraction pool ready with {self.workers} workers")
+
+    async def close(self) -> None:
+        """Shut the extraction pool down."""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
     async def extract_text_from_file(self, file: UploadFile) -> str:
         """
         Extract text content from uploaded CV file.
-        
+
         Args:
             file: Uploaded file (PDF or TXT)
-            
+
         Returns:
             str: Extracted text content
         """
+        _, text = await self.register_file(file)
+        return text
+
+    async def register_file(self, file: UploadFile) -> Tuple[str, str]:
+        """
+        Extract an uploaded CV and cache its text under a content hash.
+
+        Args:
+            file: Uploaded file (PDF or TXT)
+
+        Returns:
+            Tuple of the cv_id (SHA-256 of the content type and file bytes) and the extracted text
+        """
         try:
-            content = await file.read()
-            
-            if file.content_type == "application/pdf":
-                return self._extract_text_from_pdf(content)
-            elif file.content_type == "text/plain":
-                return self._extract_text_from_txt(content)
-            else:
-                raise ValueError(f"Unsupported file type: {file.content_type}")
-                
+            # Read one byte past the limit so oversized uploads are detected without buffering them
+            content = await file.read(self.max_bytes + 1)
+            if len(content) > self.max_bytes:
+                raise CVLimitError(
+                    f"CV file is too large; the maximum is {self.max_bytes // 1024} KB.")
+
+            return await self.extract_text_from_bytes(content, file.content_type)
+
         except Exception as e:
             logger.error(f"Error extracting text from file: {str(e)}")
             raise
-    
+
+    async def extract_text_from_bytes(self, content: bytes, content_type: str) -> Tuple[str, str]:
+        """
+        Extract text from raw CV bytes, reusing the cached text for identical content.
+
+        Args:
+            content: File bytes
+            content_type: "application/pdf" or "text/plain"
+
+        Returns:
+            Tuple of the cv_id and the extracted text
+        """
+        # The same bytes extract differently as PDF and as text, so both go into the key
+        cv_id = hashlib.sha256(f"{content_type}\0".encode("utf-8") + content).hexdigest()
+        cached = self.cache.get(cv_id)
+        if cached is not None:
+            return cv_id, cached
+
+        async def extract() -> str:
+            if content_type == "application/pdf":
+                text = await self._extract_text_from_pdf_async(content)
+            elif content_type == "text/plain":
+                text = self._extract_text_from_txt(content)
+            else:
+                raise ValueError(f"Unsupported file type: {content_type}")
+            if text.strip():
+                self.cache.set(cv_id, text)
+            return text
+
+        return cv_id, await self._inflight.do(cv_id, extract)
+
+    def get_cached_text(self, cv_id: str) -> Optional[str]:
+        """Return the extracted text for a previously uploaded CV, if still cached."""
+        return self.cache.get(cv_id.strip().lower())
+
+    def expires_in_seconds(self, cv_id: str) -> int:
+        """Return how long a cached CV stays available, or 0 if it is not cached."""
+        return int(self.cache.ttl_remaining(cv_id.strip().lower()) or 0)
+
+    async def _extract_text_from_pdf_async(self, content: bytes) -> str:
+        """
+        Extract text from PDF content off the event loop.
+
+        The first page range is extracted together with the page count; any remaining
+        ranges are then extracted in parallel across the pool.
+        """
+        if self.workers <= 0:
+            return await asyncio.to_thread(self._extract_text_from_pdf, content)
+
+        if self._executor is None:
+            await self.start()
+
+        loop = asyncio.get_running_loop()
+        page_count, pages = await loop.run_in_executor(
+            self._executor, _extract_pdf_pages, content, 0, self.pages_per_task, self.max_pages)
+
+        if page_count > self.pages_per_task:
+            ranges = await asyncio.gather(*[
+                loop.run_in_executor(
+                    self._executor, _extract_pdf_pages, content,
+                    start, start + self.pages_per_task, self.max_pages)
+                for start in range(self.pages_per_task, page_count, self.pages_per_task)
+            ])
+            for _, range_pages in ranges:
+                pages.extend(range_pages)
+
+        return "\n".join(pages).strip()
+
     def _extract_text_from_pdf(self, content: bytes) -> str:
         """Extract text from PDF file content."""
-        try:
-            pdf_file = io.BytesIO(content)
-            pdf_reader = pypdf.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-            
-        except Exception as e:
-            logger.error(f"Error reading PDF: {str(e)}")
-            raise ValueError("Could not read PDF file. Please ensure it's not corrupted or password-protected.")
-    
+        _, pages = _extract_pdf_pages(content, 0, None, self.max_pages)
+        return "\n".join(pages).strip()
+
     def _extract_text_from_txt(self, content: bytes) -> str:
         """Extract text from TXT file content."""
         try:
             # Try different encodings
             encodings = ['utf-8', 'latin-1', 'cp1252']
-            
+
             for encoding in encodings:
                 try:
                     return content.decode(encoding).strip()
                 except UnicodeDecodeError:
                     continue
-            
+
             raise ValueError("Could not decode text file with supported encodings")
-            
+
         except Exception as e:
             logger.error(f"Error reading TXT file: {str(e)}")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,152 @@
+import html as html_lib
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional
+
+from lxml import html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# JSON-LD blocks are found with a regex over the raw page, so pages carrying one
+# never need a DOM
+JSON_LD_PATTERN = re.compile(
+    r'<script[^>]*type\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Block-level boundaries in description HTML, kept as whitespace so list items and
+# paragraphs do not run together in the text
+BLOCK_BOUNDARY_PATTERN = re.compile(r'<(?:br|/p|/li|/div|/h[1-6]|/ul|/ol|/tr)\b[^>]*>', re.IGNORECASE)
+
+
+@dataclass
+class JobPosting:
+    """The fields of a schema.org JobPosting that matter for adapting a CV."""
+    title: Optional[str]
+    company: Optional[str]
+    location: Optional[str]
+    employment_type: Optional[str]
+    date_posted: Optional[str]
+    description: str
+
+    @property
+    def summary(self) -> str:
+        """One line naming the role, e.g. "Backend Engineer | Acme | London, GB | FULL_TIME"."""
+        return " | ".join(part for part in (self.title, self.company, self.location, self.employment_type) if part)
+
+
+def extract_job_posting(page_html: str) -> Optional[JobPosting]:
+    """
+    Find a schema.org JobPosting in the page's JSON-LD blocks.
+
+    Args:
+        page_html: Raw page HTML
+
+    Returns:
+        JobPosting with the description as plain text, or None if the page has no
+        JobPosting with a description
+    """
+    for block in JSON_LD_PATTERN.findall(page_html):
+        posting = parse_json_ld_block(block)
+        if posting is not None:
+            return posting
+    return None
+
+
+def parse_json_ld_block(block: str) -> Optional[JobPosting]:
+    """
+    Read a JobPosting from the contents of one JSON-LD script element.
+
+    Args:
+        block: The JSON text between the script tags
+
+    Returns:
+        JobPosting with the description as plain text, or None if the block is
+        not valid JSON or holds no JobPosting with a description
+    """
+    try:
+        # strict=False accepts the raw newlines some sites leave inside strings
+        data = json.loads(block, strict=False)
+    except ValueError:
+        logger.debug("Skipping unparseable JSON-LD block")
+        return None
+
+    for node in _iter_nodes(data):
+        if _has_type(node, "JobPosting") and isinstance(node.get("description"), str):
+            description = _html_to_text(node["description"])
+            if description:
+                return JobPosting(
+                    title=_text(node.get("title")),
+                    company=_organization_name(node.get("hiringOrganization")),
+                    location=_location(node),
+                    employment_type=_join(node.get("employmentType")),
+                    date_posted=_text(node.get("datePosted")),
+                    description=description
+                )
+    return None
+
+
+def _iter_nodes(data: Any) -> Iterator[dict]:
+    """Yield the top-level objects of a JSON-LD document, including @graph members."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from _iter_nodes(data["@graph"])
+
+
+def _has_type(node: dict, type_name: str) -> bool:
+    types = node.get("@type")
+    return type_name in types if isinstance(types, list) else types == type_name
+
+
+def _html_to_text(description: str) -> str:
+    # Descriptions are HTML, sometimes entity-escaped a second time
+    if "&lt;" in description:
+        description = html_lib.unescape(description)
+    if "<" not in description:
+        return description.strip()
+    fragment = lxml_html.fragment_fromstring(BLOCK_BOUNDARY_PATTERN.sub(r"\g<0>\n", description), create_parent="div")
+    return fragment.text_content().strip()
+
+
+def _text(value: Any) -> Optional[str]:
+    return (value.strip() or None) if isinstance(value, str) else None
+
+
+def _join(value: Any) -> Optional[str]:
+    if isinstance(value, list):
+        return ", ".join(item for item in value if isinstance(item, str)) or None
+    return _text(value)
+
+
+def _organization_name(organization: Any) -> Optional[str]:
+    if isinstance(organization, dict):
+        return _text(organization.get("name"))
+    return _text(organization)
+
+
+def _location(node: dict) -> Optional[str]:
+    places = node.get("jobLocation")
+    places = places if isinstance(places, list) else [places]
+    locations: List[str] = []
+    for place in places:
+        address = place.get("address") if isinstance(place, dict) else place
+        if isinstance(address, dict):
+            country = address.get("addressCountry")
+            if isinstance(country, dict):
+                country = country.get("name")
+            parts = [_text(address.get("addressLocality")), _text(address.get("addressRegion")), _text(country)]
+            location = ", ".join(part for part in parts if part)
+        else:
+            location = _text(address)
+        if location and location not in locations:
+            locations.append(location)
+
+    if node.get("jobLocationType") == "TELECOMMUTE":
+        locations.append("Remote")
+    return "; ".join(locations) or None
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+TERMINAL_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class JobQueueFullError(Exception):
+    """Raised when the queue already holds max_queued jobs; maps to HTTP 503."""
+
+
+@dataclass
+class Job:
+    """A background generation job and its current state."""
+    job_id: str
+    task: str
+    params: Dict[str, Any]
+    status: JobStatus = JobStatus.QUEUED
+    stage: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    pdf: Optional[bytes] = None
+    _runner: Optional["asyncio.Task[Any]"] = None
+    _on_finish: Optional[Callable[[], None]] = None
+    _changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Public view of the job, safe to serialize."""
+        return {
+            "job_id": self.job_id,
+            "task": self.task,
+            "status": self.status.value,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "result": self.result,
+            "error": self.error,
+            "pdf_available": self.pdf is not None,
+        }
+
+
+JobHandler = Callable[[Job, Callable[[str], None]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """In-process job queue served by a fixed pool of asyncio workers."""
+
+    def __init__(self, handler: JobHandler):
+        self.handler = handler
+        self.workers = int(os.getenv("JOB_WORKERS", "4"))
+        self.max_queued = int(os.getenv("JOB_MAX_QUEUED", "100"))
+        self.result_ttl = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional["asyncio.Queue[Job]"] = None
+        self._tasks = []
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    async def start(self) -> None:
+        """Start the worker pool and the expiry sweeper."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep_expired()))
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def close(self) -> None:
+        """Stop the workers and cancel anything still running."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self._jobs.values():
+            if not job.done:
+                self._finish(job, JobStatus.CANCELLED, error="Server shutting down")
+
+    def submit(self, task: str, params: Dict[str, Any], on_finish: Optional[Callable[[], None]] = None) -> Job:
+        """
+        Queue a job and return it immediately.
+
+        Args:
+            task: Name of the work to run, interpreted by the handler
+            params: Handler inputs
+            on_finish: Called once when the job succeeds, fails or is cancelled
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            JobQueueFullError: If max_queued jobs are already waiting
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+
+        job = Job(job_id=uuid.uuid4().hex, task=task, params=params, _on_finish=on_finish)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("Too many queued jobs, please retry shortly")
+        self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if unknown or expired."""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            The job, or None if unknown. Finished jobs are returned unchanged.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return job
+
+        if job._runner is not None:
+            job._runner.cancel()
+        self._finish(job, JobStatus.CANCELLED, error="Cancelled by client")
+        return job
+
+    async def subscribe(self, job_id: str, heartbeat_seconds: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield a job snapshot on every change until it finishes.
+
+        None is yielded after heartbeat_seconds without changes so callers can keep
+        idle connections alive.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+
+        while True:
+            changed = job._changed
+            yield job.snapshot()
+            if job.done:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue counters for monitoring."""
+        by_status: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status.value] = by_status.get(job.status.value, 0) + 1
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queued": self.max_queued,
+            "jobs": by_status,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.done:
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                # Either the job was cancelled or the worker is shutting down
+                if not job.done:
+                    self._finish(job, JobStatus.CANCELLED, error="Cancelled")
+                if asyncio.current_task().cancelling():
+                    raise
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        self._update(job, status=JobStatus.RUNNING, stage="starting")
+        job._runner = asyncio.create_task(
+            self.handler(job, lambda stage: self._update(job, stage=stage)))
+        try:
+            result = await job._runner
+        except asyncio.CancelledError:
+            if not job.done:
+                self._finish(job, JobStatus.CANCELLED, error="Cancelled")
+            if asyncio.current_task().cancelling():
+                raise
+            return
+        except Exception as e:
+            logger.error(f"Job {job.job_id} ({job.task}) failed: {str(e)}")
+            self._finish(job, JobStatus.FAILED, error=str(e))
+            return
+        finally:
+            job._runner = None
+
+        if not job.done:
+            job.result = result
+            self._finish(job, JobStatus.SUCCEEDED)
+
+    def _update(self, job: Job, status: Optional[JobStatus] = None, stage: Optional[str] = None) -> None:
+        if job.done:
+            return
+        if status is not None:
+            job.status = status
+        if stage is not None:
+            job.stage = stage
+        self._notify(job)
+
+    def _finish(self, job: Job, status: JobStatus, error: Optional[str] = None) -> None:
+        job.status = status
+        job.stage = status.value
+        job.error = error
+        # Inputs such as the uploaded CV bytes are no longer needed
+        job.params = {}
+        if status == JobStatus.SUCCEEDED:
+            self.completed += 1
+        elif status == JobStatus.FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+        if job._on_finish is not None:
+            on_finish, job._on_finish = job._on_finish, None
+            on_finish()
+        self._notify(job)
+
+    def _notify(self, job: Job) -> None:
+        job.updated_at = time.time()
+        changed, job._changed = job._changed, asyncio.Event()
+        changed.set()
+
+    async def _sweep_expired(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.result_ttl, 60))
+            cutoff = time.time() - self.result_ttl
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.done and job.updated_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+            if expired:
+                logger.info(f"Expired {len(expired)} finished jobs")
@@ -1,13 +1,102 @@
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 import logging
-from urllib.parse import urlparse
+import os
+import time
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 import re
-from typing import Optional
+from typing import List, Optional
+
+from services.cache import SingleFlight, TTLCache
+from services.job_posting import JobPosting, extract_job_posting
+from services.page_reader import CHARSET_SNIFF_BYTES, PageCompletion, detect_charset, is_html_content_type
+from services.text_density import find_content_element, visible_text
+from services.resilience import CircuitOpenError, ResilientCaller, RetryPolicy, UpstreamError, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# Query parameters that only track the click and never change the posting
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid',
+    'trk', 'trkinfo', 'refid', 'trackingid', 'lipi', 'originalsubdomain', 'ebp', 'eid',
+    'from', 'tk', 'alid', 'advn', 'sjdu', 'acatk', 'pub', 'camk', 'xkcb',
+    'source', 'ref', 'referrer', 'sessionid'
+}
+
+
+def _compile_selector(selector: str) -> etree.XPath:
+    """Compile one of the simple CSS selectors used below ('.class', '#id', '[attr]', '[attr="value"]') to XPath."""
+    if selector.startswith('.'):
+        condition = f"contains(concat(' ', normalize-space(@class), ' '), ' {selector[1:]} ')"
+    elif selector.startswith('#'):
+        condition = f"@id='{selector[1:]}'"
+    elif selector.startswith('[') and selector.endswith(']'):
+        name, _, value = selector[1:-1].partition('=')
+        value = value.strip('"')
+        condition = f"@{name}='{value}'" if value else f"@{name}"
+    else:
+        raise ValueError(f"Unsupported selector: {selector}")
+    return etree.XPath(f"//*[{condition}]")
+
+
+# Job description containers per site, most specific first, compiled once at import
+LINKEDIN_SELECTORS = [_compile_selector(selector) for selector in (
+    '.description__text',
+    '.jobs-description__content',
+    '.jobs-box__html-content',
+    '[data-job-description]'
+)]
+INDEED_SELECTORS = [_compile_selector(selector) for selector in (
+    '#jobDescriptionText',
+    '.jobsearch-jobDescriptionText',
+    '.jobsearch-JobMetadataHeader-item'
+)]
+REED_SELECTORS = [_compile_selector(selector) for selector in (
+    '.description',
+    '.job-description',
+    '[data-qa="job-description"]'
+)]
+
+# lxml refuses str input that declares an encoding, which XHTML pages do; the
+# text is already decoded, so the declaration is dropped before parsing
+XML_DECLARATION_PATTERN = re.compile(r'^\ufeff?\s*<\?xml[^>]*\?>')
+
+# Attribute text identifying each site's primary description container in the raw
+# page, so a streamed fetch can stop once that element has been received
+DESCRIPTION_MARKERS = {
+    'linkedin.com': b'description__text',
+    'indeed.com': b'jobDescriptionText',
+    'reed.co.uk': b'data-qa="job-description"',
+}
+
+# JSON-LD descriptions shorter than this after cleaning are placeholders ("See
+# below.") and the page is parsed for its description element instead
+MIN_STRUCTURED_DESCRIPTION_CHARS = 100
+
+# Stopping mid-body closes the connection instead of returning it to the pool, so
+# only stop when at least this much of a page of known length is left unread
+EARLY_STOP_MIN_SAVING = 64 * 1024
+
+
+@dataclass
+class PageResponse:
+    """A fetched page, or a 304 answer to a conditional GET."""
+    status: int
+    html: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class CachedJobDescription:
+    """Extracted job description text plus the validators needed to revalidate it."""
+    text: str
+    fresh_until: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
 class JobScraper:
     """Service for scraping job descriptions from various job sites."""
     
@@ -16,10 +105,118 @@ class JobScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.timeout = aiohttp.ClientTimeout(total=30)
+
+        # One pooled session per worker, opened and closed through the app lifespan
+        self.pool_size = int(os.getenv("SCRAPER_POOL_SIZE", "100"))
+        self.pool_size_per_host = int(os.getenv("SCRAPER_POOL_SIZE_PER_HOST", "10"))
+        self.dns_cache_seconds = int(os.getenv("SCRAPER_DNS_CACHE_SECONDS", "300"))
+        self.keepalive_seconds = float(os.getenv("SCRAPER_KEEPALIVE_SECONDS", "30"))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self.requests_made = 0
+        self.sessions_created = 0
+
+        # "linkedin.com=http://127.0.0.1:8701/linkedin,..." sends requests for a job site
+        # (and its subdomains) to another base URL, e.g. the load-test stand-ins.
+        # Parsing, caching and circuit breakers still go by the original host.
+        self.host_overrides = self._parse_host_overrides(os.getenv("SCRAPER_HOST_OVERRIDES", ""))
+
+        # Pages are read incrementally up to a byte cap; with early stop, reading ends
+        # once the JSON-LD JobPosting or the description container has arrived
+        self.max_page_bytes = int(os.getenv("SCRAPER_MAX_PAGE_BYTES", str(5 * 1024 * 1024)))
+        self.early_stop = os.getenv("SCRAPER_EARLY_STOP", "true").lower() == "true"
+        self.bytes_read = 0
+        self.pages_truncated = 0
+        self.pages_stopped_early = 0
+
+        # Cache of extracted descriptions keyed on the normalized URL. Entries are
+        # served directly while fresh and revalidated with a conditional GET once
+        # stale; they are dropped entirely after the stale window.
+        self.cache_ttl = float(os.getenv("JOB_CACHE_TTL_SECONDS", "900"))
+        self.cache_stale_ttl = float(os.getenv("JOB_CACHE_STALE_SECONDS", "86400"))
+        self.cache = TTLCache(
+            max_bytes=int(os.getenv("JOB_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl_seconds=self.cache_stale_ttl,
+            sizeof=lambda entry: len(entry.text.encode("utf-8"))
+        )
+        self._inflight = SingleFlight()
+        self.revalidations = 0
+        self.not_modified = 0
+        self.structured_data_hits = 0
+
+        # Throttling and transient errors are retried with backoff; a job site that
+        # keeps failing is skipped by its circuit breaker until it recovers
+        self.resilience = ResilientCaller(
+            RetryPolicy(
+                attempts=int(os.getenv("SCRAPER_RETRY_ATTEMPTS", "3")),
+                base_delay=float(os.getenv("SCRAPER_RETRY_BASE_DELAY_SECONDS", "0.5")),
+                max_delay=float(os.getenv("SCRAPER_RETRY_MAX_DELAY_SECONDS", "8"))
+            ),
+            failure_threshold=int(os.getenv("SCRAPER_BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_seconds=float(os.getenv("SCRAPER_BREAKER_RESET_SECONDS", "30"))
+        )
     
+    async def start(self) -> None:
+        """Open the pooled HTTP session shared by every scrape."""
+        if self._session is not None and not self._session.closed:
+            return
+
+        self._connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size_per_host,
+            ttl_dns_cache=self.dns_cache_seconds,
+            use_dns_cache=True,
+            keepalive_timeout=self.keepalive_seconds
+        )
+        self._session = aiohttp.ClientSession(
+            connector=self._connector,
+            headers=self.headers,
+            timeout=self.timeout
+        )
+        self.sessions_created += 1
+        logger.info(
+            f"Job scraper session opened (pool={self.pool_size}, per_host={self.pool_size_per_host})")
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session and its connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Job scraper session closed")
+        self._session = None
+        self._connector = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, opening it on first use outside the app lifespan."""
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    def pool_stats(self) -> dict:
+        """Return connection pool counters for monitoring."""
+        connector = self._connector
+        open_session = self._session is not None and not self._session.closed
+        return {
+            "open": open_session,
+            "limit": self.pool_size,
+            "limit_per_host": self.pool_size_per_host,
+            "dns_cache_seconds": self.dns_cache_seconds,
+            "keepalive_seconds": self.keepalive_seconds,
+            # aiohttp has no public API for these, so read them defensively
+            "acquired": len(getattr(connector, '_acquired', ())) if connector else 0,
+            "idle": sum(len(conns) for conns in getattr(connector, '_conns', {}).values()) if connector else 0,
+            "requests": self.requests_made,
+            "sessions_created": self.sessions_created,
+            "bytes_read": self.bytes_read,
+            "pages_truncated": self.pages_truncated,
+            "pages_stopped_early": self.pages_stopped_early,
+        }
+
     async def scrape_job_description(self, url: str) -> str:
         """
         Scrape job description from the provided URL.
+
+        Results are cached per normalized URL and concurrent scrapes of the same
+        posting share a single fetch.
         
         Args:
             url: Job posting URL from LinkedIn, Indeed, or Reed
@@ -29,138 +226,266 @@ class JobScraper:
         """
         try:
             domain = self._get_domain(url)
-            
-            if 'linkedin.com' in domain:
-                return await self._scrape_linkedin(url)
-            elif 'indeed.com' in domain:
-                return await self._scrape_indeed(url)
-            elif 'reed.co.uk' in domain:
-                return await self._scrape_reed(url)
-            else:
+            if not any(site in domain for site in ('linkedin.com', 'indeed.com', 'reed.co.uk')):
                 raise ValueError(f"Unsupported job site: {domain}")
+
+            cache_key = self._normalize_url(url)
+            return await self._inflight.do(
+                cache_key, lambda: self._scrape_with_cache(cache_key, url, domain))
                 
         except Exception as e:
             logger.error(f"Error scraping job description from {url}: {str(e)}")
             raise
+
+    async def _scrape_with_cache(self, cache_key: str, url: str, domain: str) -> str:
+        """Serve a fresh cached description, revalidate a stale one, or scrape from scratch."""
+        cached = self.cache.get(cache_key)
+        if cached is not None and cached.fresh_until > time.monotonic():
+            return cached.text
+
+        if cached is not None and (cached.etag or cached.last_modified):
+            self.revalidations += 1
+            page = await self._fetch_page(url, etag=cached.etag, last_modified=cached.last_modified)
+            if page.status == 304:
+                self.not_modified += 1
+                cached.fresh_until = time.monotonic() + self.cache_ttl
+                self.cache.set(cache_key, cached)
+                return cached.text
+        else:
+            page = await self._fetch_page(url)
+
+        # Parsing a large page takes milliseconds of CPU; keep it off the event loop
+        text = await asyncio.to_thread(self._parse_job_page, domain, page.html)
+        if text.strip():
+            self.cache.set(cache_key, CachedJobDescription(
+                text=text,
+                fresh_until=time.monotonic() + self.cache_ttl,
+                etag=page.etag,
+                last_modified=page.last_modified
+            ))
+        return text
+
+    def _parse_job_page(self, domain: str, html: str) -> str:
+        """
+        Extract the job description from a fetched page.
+
+        A schema.org JobPosting embedded as JSON-LD is used when present; it is
+        found without building a DOM and carries the title, company and location
+        as well. Otherwise the page goes to the site-specific parser.
+        """
+        posting = extract_job_posting(html)
+        if posting is not None and self._is_usable_posting(posting):
+            description = self._clean_text(posting.description)
+            self.structured_data_hits += 1
+            return f"{posting.summary}\n\n{description}" if posting.summary else description
+
+        if 'linkedin.com' in domain:
+            return self._scrape_linkedin(html)
+        elif 'indeed.com' in domain:
+            return self._scrape_indeed(html)
+        elif 'reed.co.uk' in domain:
+            return self._scrape_reed(html)
+        else:
+            raise ValueError(f"Unsupported job site: {domain}")
     
+    def _is_usable_posting(self, posting: JobPosting) -> bool:
+        """Whether a JSON-LD JobPosting's description is substantial enough to use instead of the page."""
+        return len(self._clean_text(posting.description)) > MIN_STRUCTURED_DESCRIPTION_CHARS
+
     def _get_domain(self, url: str) -> str:
         """Extract domain from URL."""
         parsed_url = urlparse(url)
         return parsed_url.netloc.lower()
+
+    def _normalize_url(self, url: str) -> str:
+        """Normalize a job URL into a cache key, dropping fragments and tracking parameters."""
+        parsed = urlparse(url.strip())
+        query = sorted(
+            (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+        )
+        path = parsed.path.rstrip('/') or '/'
+        return urlunparse((
+            parsed.scheme.lower(), parsed.netloc.lower(), path, '', urlencode(query), ''
+        ))
     
-    async def _fetch_page(self, url: str) -> str:
-        """Fetch webpage content."""
+    async def _fetch_page(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> PageResponse:
+        """
+        Fetch webpage content, optionally as a conditional GET.
+
+        Args:
+            url: Page URL
+            etag: ETag from a previous response, sent as If-None-Match
+            last_modified: Last-Modified from a previous response, sent as If-Modified-Since
+
+        Returns:
+            PageResponse: Status 200 with the page HTML, or 304 if unchanged
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
         try:
-            async with aiohttp.ClientSession(headers=self.headers, timeout=self.timeout) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.text()
-                    else:
-                        raise Exception(f"HTTP {response.status}: Failed to fetch page")
-                        
+            return await self.resilience.call(
+                self._get_domain(url), lambda: self._fetch_page_once(url, headers))
+
+        except CircuitOpenError:
+            raise
         except asyncio.TimeoutError:
             raise Exception("Request timeout - the job site may be slow to respond")
         except Exception as e:
             raise Exception(f"Failed to fetch page: {str(e)}")
+
+    async def _fetch_page_once(self, url: str, headers: dict) -> PageResponse:
+        """Make a single GET attempt; error answers raise UpstreamError, non-HTML answers ValueError."""
+        session = await self._get_session()
+        self.requests_made += 1
+        async with session.get(self._route_url(url), headers=headers) as response:
+            if response.status == 304 and headers:
+                return PageResponse(status=304)
+            elif response.status == 200:
+                content_type = response.headers.get('Content-Type')
+                if not is_html_content_type(content_type):
+                    raise ValueError(f"Unsupported content type: {content_type}")
+
+                body = await self._read_body(response, self._get_domain(url))
+                charset = detect_charset(content_type, body[:CHARSET_SNIFF_BYTES])
+                return PageResponse(
+                    status=200,
+                    html=body.decode(charset, errors='replace'),
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+            else:
+                raise UpstreamError(
+                    f"HTTP {response.status}: Failed to fetch page",
+                    status=response.status,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                )
+
+    async def _read_body(self, response: aiohttp.ClientResponse, domain: str) -> bytes:
+        """
+        Read a page body in chunks, up to max_page_bytes.
+
+        Reading stops early once the page holds a usable JSON-LD JobPosting or the
+        whole description container, unless little of the page is left.
+        """
+        marker = next((marker for site, marker in DESCRIPTION_MARKERS.items() if site in domain), None)
+        completion = PageCompletion(marker, self._is_usable_posting) if self.early_stop else None
+        # Under gzip or br Content-Length counts compressed bytes while the body is read
+        # decompressed, so the size of the rest of the page is unknown
+        encoding = response.headers.get('Content-Encoding', 'identity').strip().lower()
+        content_length = response.content_length if encoding == 'identity' else None
+
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body += chunk
+            if len(body) >= self.max_page_bytes:
+                del body[self.max_page_bytes:]
+                self.pages_truncated += 1
+                logger.warning(f"Page from {domain} exceeds {self.max_page_bytes} bytes, parsing the first part only")
+                break
+            if completion is not None and completion.feed(body):
+                if content_length is None or content_length - len(body) >= EARLY_STOP_MIN_SAVING:
+                    self.pages_stopped_early += 1
+                    break
+                completion = None
+
+        self.bytes_read += len(body)
+        return bytes(body)
+
+    def _route_url(self, url: str) -> str:
+        """Rewrite a job URL to its host override, if one is configured."""
+        if not self.host_overrides:
+            return url
+        parsed = urlparse(url)
+        host = parsed.hostname or ''
+        for site, base_url in self.host_overrides.items():
+            if host == site or host.endswith('.' + site):
+                query = f"?{parsed.query}" if parsed.query else ''
+                return f"{base_url}{parsed.path}{query}"
+        return url
+
+    @staticmethod
+    def _parse_host_overrides(value: str) -> dict:
+        overrides = {}
+        for entry in value.split(','):
+            site, _, base_url = entry.strip().partition('=')
+            if site and base_url:
+                overrides[site.lower()] = base_url.rstrip('/')
+        return overrides
+
+    def cache_stats(self) -> dict:
+        """Return job description cache counters for monitoring."""
+        stats = self.cache.stats()
+        stats.update({
+            "revalidations": self.revalidations,
+            "not_modified": self.not_modified,
+            "structured_data_hits": self.structured_data_hits,
+            "coalesced": self._inflight.coalesced,
+            "in_flight": self._inflight.in_flight(),
+        })
+        return stats
     
-    async def _scrape_linkedin(self, url: str) -> str:
+    def _scrape_linkedin(self, html: str) -> str:
         """Scrape job description from LinkedIn."""
         try:
-            html = await self._fetch_page(url)
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # LinkedIn job description selectors
-            selectors = [
-                '.description__text',
-                '.jobs-description__content',
-                '.jobs-box__html-content',
-                '[data-job-description]'
-            ]
-            
-            for selector in selectors:
-                element = soup.select_one(selector)
-                if element:
-                    text = self._clean_text(element.get_text())
-                    if len(text) > 100:  # Ensure we got substantial content
-                        return text
-            
-            # Fallback: try to find any substantial text content
-            return self._extract_fallback_content(soup)
-            
+            return self._scrape_with_selectors(html, LINKEDIN_SELECTORS)
         except Exception as e:
             logger.error(f"Error scraping LinkedIn: {str(e)}")
             raise Exception(f"Failed to extract job description from LinkedIn: {str(e)}")
     
-    async def _scrape_indeed(self, url: str) -> str:
+    def _scrape_indeed(self, html: str) -> str:
         """Scrape job description from Indeed."""
         try:
-            html = await self._fetch_page(url)
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Indeed job description selectors
-            selectors = [
-                '#jobDescriptionText',
-                '.jobsearch-jobDescriptionText',
-                '.jobsearch-JobMetadataHeader-item'
-            ]
-            
-            for selector in selectors:
-                element = soup.select_one(selector)
-                if element:
-                    text = self._clean_text(element.get_text())
-                    if len(text) > 100:
-                        return text
-            
-            return self._extract_fallback_content(soup)
-            
+            return self._scrape_with_selectors(html, INDEED_SELECTORS)
         except Exception as e:
             logger.error(f"Error scraping Indeed: {str(e)}")
             raise Exception(f"Failed to extract job description from Indeed: {str(e)}")
     
-    async def _scrape_reed(self, url: str) -> str:
+    def _scrape_reed(self, html: str) -> str:
         """Scrape job description from Reed."""
         try:
-            html = await self._fetch_page(url)
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Reed job description selectors
-            selectors = [
-                '.description',
-                '.job-description',
-                '[data-qa="job-description"]'
-            ]
-            
-            for selector in selectors:
-                element = soup.select_one(selector)
-                if element:
-                    text = self._clean_text(element.get_text())
-                    if len(text) > 100:
-                        return text
-            
-            return self._extract_fallback_content(soup)
-            
+            return self._scrape_with_selectors(html, REED_SELECTORS)
         except Exception as e:
             logger.error(f"Error scraping Reed: {str(e)}")
             raise Exception(f"Failed to extract job description from Reed: {str(e)}")
+
+    def _scrape_with_selectors(self, html: str, selectors: List[etree.XPath]) -> str:
+        """
+        Return the text of the first selector match with substantial content.
+
+        The page is parsed with lxml, which builds the tree in C several times
+        faster than html.parser; the fallback extraction reuses the same tree.
+        """
+        if not html.strip():
+            return ""
+
+        document = lxml_html.document_fromstring(XML_DECLARATION_PATTERN.sub('', html, count=1))
+        for selector in selectors:
+            matches = selector(document)
+            if matches:
+                text = self._clean_text(matches[0].text_content())
+                if len(text) > 100:  # Ensure we got substantial content
+                    return text
+
+        # Fallback: try to find any substantial text content
+        return self._extract_fallback_content(document)
     
-    def _extract_fallback_content(self, soup: BeautifulSoup) -> str:
+    def _extract_fallback_content(self, document: lxml_html.HtmlElement) -> str:
         """Extract content using fallback method when specific selectors fail."""
         try:
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "header", "footer"]):
-                script.decompose()
-            
-            # Get text and clean it
-            text = self._clean_text(soup.get_text())
-            
-            # Try to find the largest text block that might be the job description
-            paragraphs = text.split('\n\n')
-            longest_paragraph = max(paragraphs, key=len) if paragraphs else text
-            
-            if len(longest_paragraph) > 200:
-                return longest_paragraph
-            
+            # Pick the block-level region with the most prose and fewest links
+            content = find_content_element(document)
+            if content is not None:
+                text = self._clean_text(visible_text(content))
+                if len(text) > 200:
+                    return text
+
             # If no substantial content found, return what we have
+            text = self._clean_text(visible_text(document))
             return text[:2000] if len(text) > 100 else text
             
         except Exception as e:
@@ -172,9 +497,10 @@ class JobScraper:
         if not text:
             return ""
         
-        # Remove extra whitespace and normalize
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
+        # Normalize whitespace within lines but keep the line breaks, so headings
+        # and list items stay apart for prompt compaction
+        lines = (re.sub(r'\s+', ' ', line).strip() for line in text.splitlines())
+        text = '\n'.join(line for line in lines if line)
         
         # Remove common navigation elements
         unwanted_phrases = [
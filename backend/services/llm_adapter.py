@@ -1,26 +1,97 @@
 from google import genai
+from google.genai import errors, types
+import asyncio
+import hashlib
 import logging
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
+import markdown as md
+
+from services.cache import TTLCache
+from services.context_cache import ContextCacheRegistry, GeminiContextCacheProvider
+from services.llm_cache import LLMResponseCache
+from services.model_chain import ModelChain
+from services.resilience import CircuitOpenError, ResilientCaller, RetryPolicy, UpstreamTimeoutError, is_retryable
+from services.prompt_budget import PromptCompactor, estimate_tokens
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Replaces the job description and CV in task prompts when they are sent as cached context
+SHARED_CONTEXT_REFERENCE = "The job description and the candidate's CV are provided in the context above."
+
+# Compacted job descriptions only need to outlive the tasks of one request
+COMPACTED_JOB_DESCRIPTIONS_MAX_BYTES = 4 * 1024 * 1024
+COMPACTED_JOB_DESCRIPTIONS_TTL_SECONDS = 600
+
+
+@dataclass
+class GenerationRequest:
+    """A task prompt in its full form and split into a shared, cacheable context and the task itself."""
+    system_prompt: str
+    prompt: str
+    shared_context: str
+    task_prompt: str
+
+    @property
+    def full_prompt(self) -> str:
+        return f"{self.system_prompt}\n\n{self.prompt}"
+
 
 class LLMAdapter:
     """Service for adapting CVs and generating cover letters using Large Language Models."""
 
-    def __init__(self):
+    def __init__(self, context_cache_provider: Optional[Any] = None):
         # Initialize Google AI Studio client
         self.google_api_key = os.getenv("GOOGLE_AI_API_KEY")
         if self.google_api_key:
-            self.client = genai.Client(api_key=self.google_api_key)
-            self.model = os.getenv("GEMINI_MODEL_ID")
+            # GEMINI_BASE_URL points the client at another endpoint, e.g. the load-test stand-in
+            base_url = os.getenv("GEMINI_BASE_URL")
+            self.client = genai.Client(
+                api_key=self.google_api_key,
+                http_options=types.HttpOptions(base_url=base_url) if base_url else None
+            )
+            # GEMINI_MODEL_CHAIN lists fallback models for hedged requests; the first
+            # one is the primary and defaults to GEMINI_MODEL_ID
+            self.model_chain = ModelChain(os.getenv("GEMINI_MODEL_ID"))
+            self.model = self.model_chain.primary.name
         else:
             raise ValueError("Google API key was not retrieved")
 
+        # Bound the number of generations in flight on this worker and how long each may take
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+        self.request_timeout = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # 429/5xx answers are retried with backoff, each model behind its own circuit
+        # breaker. Timeouts open the breaker but are not retried: hedging to the next
+        # model in the chain already covers slow calls.
+        self.resilience = ResilientCaller(
+            RetryPolicy(
+                attempts=int(os.getenv("LLM_RETRY_ATTEMPTS", "3")),
+                base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "1")),
+                max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "10"))
+            ),
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+            retry_timeouts=False
+        )
+
+        self.response_cache = LLMResponseCache()
+        self.prompt_compactor = PromptCompactor()
+
+        # The application pack runs several tasks on one CV and job description; each
+        # must see the same compacted job description to share a context cache entry
+        self._compacted_job_descriptions = TTLCache(COMPACTED_JOB_DESCRIPTIONS_MAX_BYTES, COMPACTED_JOB_DESCRIPTIONS_TTL_SECONDS)
+
+        # The CV and job description are shared by every task for a user, so they are
+        # uploaded once as cached content and referenced by later calls. Tests inject a
+        # FakeContextCacheProvider in place of the Gemini caching API.
+        self.context_cache = ContextCacheRegistry(context_cache_provider or GeminiContextCacheProvider(self.client))
+
     async def adapt_cv(self, cv_content: str, job_description: str, additional_instructions: Optional[str] = None) -> str:
         """
         Adapt CV content to match job description using LLM.
@@ -35,6 +106,8 @@ class LLMAdapter:
         try:
             return await self._adapt_with_google_ai(cv_content, job_description, additional_instructions)
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error adapting CV with LLM: {str(e)}")
             raise Exception(f"{str(e)}")
@@ -53,6 +126,8 @@ class LLMAdapter:
         try:
             return await self._generate_cover_letter_with_google_ai(cv_content, job_description, additional_instructions)
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error generating cover letter with LLM: {str(e)}")
             raise Exception(f"{str(e)}")
@@ -72,41 +147,78 @@ class LLMAdapter:
         try:
             return await self._general_purpose_with_google_ai(cv_content, job_description, additional_instructions)
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(
                 f"Error in general purpose processing with LLM: {str(e)}")
             raise Exception(f"{str(e)}")
 
+    async def adapt_cv_stream(self, cv_content: str, job_description: str, additional_instructions: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream the adapted CV as HTML chunks while the LLM generates it.
+
+        Args:
+            cv_content: Original CV text
+            job_description: Job description text
+
+        Yields:
+            str: Adapted CV HTML fragments in generation order
+        """
+        request = self._prepare_request(
+            self._get_cv_system_prompt(), self._create_adaptation_prompt, cv_content, job_description, additional_instructions)
+        async for chunk in self._stream_html(request, "CV"):
+            yield chunk
+
+    async def generate_cover_letter_stream(self, cv_content: str, job_description: str, additional_instructions: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream the cover letter as HTML chunks while the LLM generates it.
+
+        Args:
+            cv_content: Original CV text
+            job_description: Job description text
+
+        Yields:
+            str: Cover letter HTML fragments in generation order
+        """
+        request = self._prepare_request(
+            self._get_cover_letter_system_prompt(), self._create_cover_letter_prompt, cv_content, job_description, additional_instructions)
+        async for chunk in self._stream_html(request, "cover letter"):
+            yield chunk
+
+    async def general_purpose_process_stream(self, cv_content: str, job_description: str, additional_instructions: str) -> AsyncIterator[str]:
+        """
+        Stream general purpose output as HTML chunks while the LLM generates it.
+
+        Args:
+            cv_content: Original CV text
+            job_description: Job description text
+            additional_instructions: Custom user instructions for processing
+
+        Yields:
+            str: Processed HTML fragments in generation order
+        """
+        request = self._prepare_request(
+            self._get_general_purpose_system_prompt(), self._create_general_purpose_prompt, cv_content, job_description, additional_instructions)
+        async for chunk in self._stream_html(request, "general purpose"):
+            yield chunk
+
     async def _adapt_with_google_ai(self, cv_content: str, job_description: str, additional_instructions: Optional[str] = None) -> str:
         """Adapt CV using Google AI Studio API."""
         try:
             if not self.google_api_key:
                 raise Exception("Google AI API key not configured")
 
-            prompt = self._create_adaptation_prompt(
+            request = self._prepare_request(
+                self._get_cv_system_prompt(), self._create_adaptation_prompt,
                 cv_content, job_description, additional_instructions)
-            full_prompt = f"{self._get_cv_system_prompt()}\n\n{prompt}"
-
-            response = self.client.models.generate_content(
-                model=self.model, contents=full_prompt
-            )
-
-            if not response.text:
-                raise Exception("Empty response from Google AI")
-
-            adapted_cv = response.text.strip()
-
-            # Check if the response is markdown instead of HTML
-            # If it starts with # or contains markdown patterns, it's likely markdown
-            if adapted_cv.startswith('#') or '\n#' in adapted_cv[:200]:
-                logger.warning(
-                    "LLM returned markdown instead of HTML, converting...")
-                # Convert markdown to HTML
-                import markdown as md
-                adapted_cv = md.markdown(adapted_cv, extensions=['extra'])
+            adapted_cv = await self._generate_content(request)
+            adapted_cv = self._ensure_html(adapted_cv, "CV")
 
             return adapted_cv
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Google AI API error: {str(e)}")
             raise Exception(f"Failed to adapt CV using Google AI: {str(e)}")
@@ -117,28 +229,16 @@ class LLMAdapter:
             if not self.google_api_key:
                 raise Exception("Google AI API key not configured")
 
-            prompt = self._create_cover_letter_prompt(
+            request = self._prepare_request(
+                self._get_cover_letter_system_prompt(), self._create_cover_letter_prompt,
                 cv_content, job_description, additional_instructions)
-            full_prompt = f"{self._get_cover_letter_system_prompt()}\n\n{prompt}"
-
-            response = self.client.models.generate_content(
-                model=self.model, contents=full_prompt
-            )
-
-            if not response.text:
-                raise Exception("Empty response from Google AI")
-
-            cover_letter = response.text.strip()
-
-            # Check if the response is markdown instead of HTML
-            if cover_letter.startswith('#') or '\n#' in cover_letter[:200]:
-                logger.warning(
-                    "LLM returned markdown instead of HTML for cover letter, converting...")
-                import markdown as md
-                cover_letter = md.markdown(cover_letter, extensions=['extra'])
+            cover_letter = await self._generate_content(request)
+            cover_letter = self._ensure_html(cover_letter, "cover letter")
 
             return cover_letter
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Google AI API error: {str(e)}")
             raise Exception(
@@ -150,34 +250,303 @@ class LLMAdapter:
             if not self.google_api_key:
                 raise Exception("Google AI API key not configured")
 
-            prompt = self._create_general_purpose_prompt(
+            request = self._prepare_request(
+                self._get_general_purpose_system_prompt(), self._create_general_purpose_prompt,
                 cv_content, job_description, additional_instructions)
-            full_prompt = f"{self._get_general_purpose_system_prompt()}\n\n{prompt}"
-
-            response = self.client.models.generate_content(
-                model=self.model, contents=full_prompt
-            )
-
-            if not response.text:
-                raise Exception("Empty response from Google AI")
-
-            processed_content = response.text.strip()
-
-            # Check if the response is markdown instead of HTML
-            if processed_content.startswith('#') or '\n#' in processed_content[:200]:
-                logger.warning(
-                    "LLM returned markdown instead of HTML for general purpose, converting...")
-                import markdown as md
-                processed_content = md.markdown(
-                    processed_content, extensions=['extra'])
+            processed_content = await self._generate_content(request)
+            processed_content = self._ensure_html(
+                processed_content, "general purpose")
 
             return processed_content
 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Google AI API error: {str(e)}")
             raise Exception(
                 f"Failed to process with custom instructions using Google AI: {str(e)}")
 
+    def _prepare_request(
+        self,
+        system_prompt: str,
+        build_prompt: Callable[..., str],
+        cv_content: str,
+        job_description: str,
+        additional_instructions: Optional[str]
+    ) -> GenerationRequest:
+        """Compact the inputs and build the task prompt with and without the shared context inlined."""
+        job_description = self._compact_job_description(cv_content, job_description, additional_instructions)
+        return GenerationRequest(
+            system_prompt=system_prompt,
+            prompt=build_prompt(cv_content, job_description, additional_instructions),
+            shared_context=self._format_inputs(cv_content, job_description),
+            task_prompt=build_prompt(
+                cv_content, job_description, additional_instructions, inputs=SHARED_CONTEXT_REFERENCE)
+        )
+
+    async def _generate_content(self, request: GenerationRequest) -> str:
+        """
+        Generate a response, serving repeated prompts from the response cache.
+
+        Identical concurrent requests share a single upstream call.
+
+        Args:
+            request: Task prompt built from the CV and job description
+
+        Returns:
+            str: Stripped response text
+        """
+        key = self.response_cache.make_key(self.model, request.system_prompt, request.prompt)
+        return await self.response_cache.get_or_generate(
+            key, lambda: self._generate_hedged(request))
+
+    async def _generate_hedged(self, request: GenerationRequest) -> Tuple[str, bool]:
+        """
+        Generate across the model chain, hedging slow calls to the next model.
+
+        Returns:
+            The response text and whether it may be cached; the cache is keyed by
+            the primary model, so answers from a fallback model are not stored
+        """
+        model, text = await self.model_chain.call(
+            lambda model: self._generate_with_context_cache(request, model))
+        if model != self.model:
+            logger.info(f"Response served by fallback model {model}")
+        return text, model == self.model
+
+    async def _generate_with_context_cache(self, request: GenerationRequest, model: str) -> str:
+        """Reference the cached CV and job description when available, else send the full prompt."""
+        cache_name = await self.context_cache.get_or_create(model, request.shared_context)
+        if cache_name is not None:
+            try:
+                return await self._call_model(
+                    model,
+                    f"{request.system_prompt}\n\n{request.task_prompt}",
+                    types.GenerateContentConfig(cached_content=cache_name))
+            except errors.ClientError as e:
+                if is_retryable(e):
+                    raise
+                # The cached content expired or was rejected; resend everything inline
+                logger.warning(f"Cached context {cache_name} rejected, sending full prompt: {str(e)}")
+                self.context_cache.invalidate(cache_name)
+
+        return await self._call_model(model, request.full_prompt)
+
+    async def _call_model(self, model: str, contents: str, config: Optional[types.GenerateContentConfig] = None) -> str:
+        """
+        Run a single generation on the async client without blocking the event loop.
+
+        Transient failures are retried and the model's circuit breaker is consulted
+        before every attempt.
+
+        Args:
+            model: Model to call
+            contents: Prompt text sent with the request
+            config: Optional generation config, e.g. referencing cached content
+
+        Returns:
+            str: Stripped response text
+        """
+        return await self.resilience.call(
+            f"gemini:{model}", lambda: self._call_model_once(model, contents, config))
+
+    async def _call_model_once(self, model: str, contents: str, config: Optional[types.GenerateContentConfig]) -> str:
+        """Make a single generation attempt."""
+        async with self._semaphore:
+            try:
+                response = await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=model, contents=contents, config=config
+                    ),
+                    timeout=self.request_timeout
+                )
+            except asyncio.TimeoutError:
+                raise UpstreamTimeoutError(
+                    f"Google AI request timed out after {self.request_timeout:g}s")
+
+        if not response.text:
+            raise Exception("Empty response from Google AI")
+
+        return response.text.strip()
+
+    async def _stream_with_context_cache(self, request: GenerationRequest, model: str) -> AsyncIterator[str]:
+        """Streaming counterpart of _generate_with_context_cache."""
+        cache_name = await self.context_cache.get_or_create(model, request.shared_context)
+        if cache_name is not None:
+            started = False
+            try:
+                async for text in self._generate_content_stream(
+                        model,
+                        f"{request.system_prompt}\n\n{request.task_prompt}",
+                        types.GenerateContentConfig(cached_content=cache_name)):
+                    started = True
+                    yield text
+                return
+            except errors.ClientError as e:
+                if started or is_retryable(e):
+                    raise
+                logger.warning(f"Cached context {cache_name} rejected, sending full prompt: {str(e)}")
+                self.context_cache.invalidate(cache_name)
+
+        async for text in self._generate_content_stream(model, request.full_prompt):
+            yield text
+
+    async def _generate_content_stream(self, model: str, contents: str, config: Optional[types.GenerateContentConfig] = None) -> AsyncIterator[str]:
+        """
+        Stream raw response text from the async client.
+
+        The request timeout applies to the whole generation, not to each chunk.
+        Opening the stream is retried like _call_model; a stream that fails after
+        it started is not.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_timeout
+
+        async def open_stream_once() -> AsyncIterator[types.GenerateContentResponse]:
+            # The concurrency slot is taken per attempt, so backoff sleeps between
+            # retries do not hold it; a successful attempt keeps it for the stream
+            await self._semaphore.acquire()
+            try:
+                return await asyncio.wait_for(
+                    self.client.aio.models.generate_content_stream(
+                        model=model, contents=contents, config=config
+                    ),
+                    timeout=max(deadline - loop.time(), 0)
+                )
+            except BaseException:
+                self._semaphore.release()
+                raise
+
+        try:
+            stream = await self.resilience.call(f"gemini:{model}", open_stream_once)
+        except asyncio.TimeoutError:
+            raise Exception(
+                f"Google AI request timed out after {self.request_timeout:g}s")
+
+        try:
+            iterator = stream.__aiter__()
+            while True:
+                try:
+                    response = await asyncio.wait_for(
+                        iterator.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                if response.text:
+                    yield response.text
+        except asyncio.TimeoutError:
+            raise Exception(
+                f"Google AI request timed out after {self.request_timeout:g}s")
+        finally:
+            self._semaphore.release()
+
+    async def _stream_html(self, request: GenerationRequest, label: str) -> AsyncIterator[str]:
+        """
+        Stream a generation as HTML, applying the same markdown fallback as _ensure_html.
+
+        The first 200 characters are buffered so the markdown check sees the same
+        prefix as the non-streaming path. Markdown output is converted once complete;
+        HTML output is relayed as it arrives. Whitespace is trimmed at both ends so the
+        concatenated chunks match the non-streaming result. Cached responses are
+        replayed as a single chunk and completed streams from the primary model are
+        written to the cache.
+        """
+        key = self.response_cache.make_key(self.model, request.system_prompt, request.prompt)
+        cached = await self.response_cache.get(key)
+        if cached is not None:
+            yield self._ensure_html(cached, label)
+            return
+
+        raw_parts = []
+        buffer = ""
+        pending_whitespace = ""
+        is_markdown = None
+        emitted = False
+        served_by: List[str] = []
+
+        try:
+            async for text in self.model_chain.stream(
+                    lambda model: self._stream_with_context_cache(request, model),
+                    on_served=served_by.append):
+                raw_parts.append(text)
+                if is_markdown is None:
+                    buffer = (buffer + text).lstrip()
+                    if len(buffer) < 200:
+                        continue
+                    is_markdown = buffer.startswith('#') or '\n#' in buffer[:200]
+                    text = buffer
+                    buffer = ""
+
+                if is_markdown:
+                    buffer += text
+                    continue
+
+                stripped = text.rstrip()
+                if stripped:
+                    yield pending_whitespace + stripped
+                    emitted = True
+                    pending_whitespace = text[len(stripped):]
+                else:
+                    pending_whitespace += text
+
+            if is_markdown is None:
+                # Short response: the stream ended before the markdown check could run
+                if buffer.strip():
+                    yield self._ensure_html(buffer.strip(), label)
+                    emitted = True
+            elif is_markdown:
+                yield self._ensure_html(buffer.strip(), label)
+                emitted = True
+
+            if not emitted:
+                raise Exception("Empty response from Google AI")
+
+            # Keyed by the primary model, so answers from a fallback model are not stored
+            if served_by == [self.model]:
+                await self.response_cache.set(key, "".join(raw_parts).strip())
+
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Google AI streaming error: {str(e)}")
+            raise Exception(f"Failed to stream {label} using Google AI: {str(e)}")
+
+    def _ensure_html(self, content: str, label: str) -> str:
+        """Convert the response to HTML if the LLM answered in markdown."""
+        # If it starts with # or contains markdown patterns, it's likely markdown
+        if content.startswith('#') or '\n#' in content[:200]:
+            logger.warning(
+                f"LLM returned markdown instead of HTML for {label}, converting...")
+            return md.markdown(content, extensions=['extra'])
+        return content
+
+    def _compact_job_description(self, cv_content: str, job_description: str, additional_instructions: Optional[str]) -> str:
+        """
+        Strip boilerplate from the job description and fit it into the prompt token budget.
+
+        The result is the same for every task run on a CV and job description, so the
+        tasks of one request share a single context cache entry. It is compacted once,
+        against the largest task prompt, and reused by the other tasks.
+        """
+        key = hashlib.sha256(f"{cv_content}\0{job_description}".encode("utf-8")).hexdigest()
+        compacted = self._compacted_job_descriptions.get(key)
+        if compacted is not None:
+            return compacted
+
+        # Each task prompt without the job description: system prompt, template, CV and instructions
+        instructions = additional_instructions or ""
+        fixed_text = max(
+            (f"{system_prompt}\n\n{build_prompt(cv_content, '', instructions)}"
+             for system_prompt, build_prompt in (
+                 (self._get_cv_system_prompt(), self._create_adaptation_prompt),
+                 (self._get_cover_letter_system_prompt(), self._create_cover_letter_prompt),
+                 (self._get_general_purpose_system_prompt(), self._create_general_purpose_prompt),
+             )),
+            key=estimate_tokens
+        )
+        compacted = self.prompt_compactor.compact(job_description, fixed_text).job_description
+        self._compacted_job_descriptions.set(key, compacted)
+        return compacted
+
     def _get_cv_system_prompt(self) -> str:
         """Get the system prompt for CV adaptation."""
         return """You are an expert CV/resume writer and career counselor. Your task is to adapt a CV to better match a specific job description while maintaining truthfulness and accuracy.
@@ -230,17 +599,23 @@ Guidelines:
 
 The output should fulfill the user's specific requirements while maintaining professional quality."""
 
-    def _create_adaptation_prompt(self, cv_content: str, job_description: str, additional_instructions: Optional[str] = None) -> str:
+    def _format_inputs(self, cv_content: str, job_description: str, cv_heading: str = "CANDIDATE'S CV") -> str:
+        """Format the job description and CV block shared by the task prompts."""
+        return f"""JOB DESCRIPTION:
+{job_description}
+
+{cv_heading}:
+{cv_content}"""
+
+    def _create_adaptation_prompt(self, cv_content: str, job_description: str, additional_instructions: Optional[str] = None, inputs: Optional[str] = None) -> str:
         """Create the adaptation prompt."""
+        if inputs is None:
+            inputs = self._format_inputs(cv_content, job_description, "ORIGINAL CV")
         extra = f"\n\nADDITIONAL INSTRUCTIONS FROM USER:\n{additional_instructions.strip()}\n" if additional_instructions and additional_instructions.strip(
         ) else ""
         return f"""Please adapt the following CV to better match the job description provided. 
 
-JOB DESCRIPTION:
-{job_description}
-
-ORIGINAL CV:
-{cv_content}
+{inputs}
 
 Output the adapted CV in HTML format with the following requirements:
 - Use <h1> for the candidate's name
@@ -258,17 +633,15 @@ Output the adapted CV in HTML format with the following requirements:
 
 ADAPTED CV (HTML):"""
 
-    def _create_cover_letter_prompt(self, cv_content: str, job_description: str, additional_instructions: Optional[str] = None) -> str:
+    def _create_cover_letter_prompt(self, cv_content: str, job_description: str, additional_instructions: Optional[str] = None, inputs: Optional[str] = None) -> str:
         """Create the cover letter generation prompt."""
+        if inputs is None:
+            inputs = self._format_inputs(cv_content, job_description)
         extra = f"\n\nADDITIONAL INSTRUCTIONS FROM USER:\n{additional_instructions.strip()}\n" if additional_instructions and additional_instructions.strip(
         ) else ""
         return f"""Based on the CV and job description provided, create a compelling cover letter for this specific position.
 
-JOB DESCRIPTION:
-{job_description}
-
-CANDIDATE'S CV:
-{cv_content}
+{inputs}
 
 Requirements:
 - Address the specific role and company from the job description
@@ -284,15 +657,13 @@ Requirements:
 
 COVER LETTER (HTML):"""
 
-    def _create_general_purpose_prompt(self, cv_content: str, job_description: str, additional_instructions: str) -> str:
+    def _create_general_purpose_prompt(self, cv_content: str, job_description: str, additional_instructions: str, inputs: Optional[str] = None) -> str:
         """Create the general purpose processing prompt."""
+        if inputs is None:
+            inputs = self._format_inputs(cv_content, job_description)
         return f"""Process the following CV and job description according to the user's specific instructions.
 
-JOB DESCRIPTION:
-{job_description}
-
-CANDIDATE'S CV:
-{cv_content}
+{inputs}
 
 USER INSTRUCTIONS:
 {additional_instructions.strip()}
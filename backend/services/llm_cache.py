@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from services.cache import SingleFlight, TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteResponseStore:
+    """On-disk tier for LLM responses that survives restarts."""
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.purge_expired()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a stored response if it has not expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_responses WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        """Insert or replace a response."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl_seconds)
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """Content-addressed cache of LLM responses with single-flight deduplication."""
+
+    # Purge expired SQLite rows after this many writes
+    PURGE_EVERY = 100
+
+    def __init__(self):
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.ttl_seconds = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+        max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        sqlite_path = os.getenv("LLM_CACHE_SQLITE_PATH")
+
+        self.memory = TTLCache(max_bytes=max_bytes, ttl_seconds=self.ttl_seconds)
+        self.disk: Optional[SQLiteResponseStore] = None
+        if self.enabled and sqlite_path:
+            try:
+                self.disk = SQLiteResponseStore(sqlite_path, self.ttl_seconds)
+            except sqlite3.Error as e:
+                logger.error(f"Could not open LLM cache database {sqlite_path}: {str(e)}")
+
+        self._flight = SingleFlight()
+        self._writes = 0
+        self.disk_hits = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt: str) -> str:
+        """Hash the model id, system prompt and built prompt into a cache key."""
+        digest = hashlib.sha256()
+        for part in (model or "", system_prompt, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look a response up in memory, then on disk."""
+        if not self.enabled:
+            return None
+
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        if self.disk is not None:
+            try:
+                value = await asyncio.to_thread(self.disk.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed: {str(e)}")
+                return None
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a response in every enabled tier."""
+        if not self.enabled:
+            return
+
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self._writes += 1
+            try:
+                await asyncio.to_thread(self.disk.set, key, value)
+                if self._writes % self.PURGE_EVERY == 0:
+                    await asyncio.to_thread(self.disk.purge_expired)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed: {str(e)}")
+
+    async def get_or_generate(self, key: str, generate: Callable[[], Awaitable[Tuple[str, bool]]]) -> str:
+        """
+        Return a cached response or run generate once for all concurrent callers.
+
+        Args:
+            key: Cache key from make_key
+            generate: Coroutine factory calling the model; returns the response and
+                whether it may be stored under key
+
+        Returns:
+            str: The cached or freshly generated response
+        """
+        if not self.enabled:
+            value, _ = await generate()
+            return value
+
+        async def load() -> str:
+            cached = await self.get(key)
+            if cached is not None:
+                return cached
+            value, cacheable = await generate()
+            if cacheable:
+                await self.set(key, value)
+            return value
+
+        return await self._flight.do(key, load)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters for monitoring."""
+        stats = self.memory.stats()
+        stats.update({
+            "enabled": self.enabled,
+            "disk_enabled": self.disk is not None,
+            "disk_hits": self.disk_hits,
+            "coalesced": self._flight.coalesced,
+            "in_flight": self._flight.in_flight(),
+        })
+        return stats
+
+    def close(self) -> None:
+        """Close the on-disk tier."""
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
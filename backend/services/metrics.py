@@ -0,0 +1,281 @@
+import functools
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Tuple
+
+from google.genai import errors as genai_errors
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.routing import Match
+
+from services.resilience import CircuitBreaker, CircuitOpenError, UpstreamError, UpstreamTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a cached response (ms) up to a slow multi-page generation (minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+HTTP_REQUESTS = Counter(
+    "cv_maker_http_requests_total", "HTTP requests by route and status",
+    ["method", "route", "status"])
+HTTP_LATENCY = Histogram(
+    "cv_maker_http_request_duration_seconds", "HTTP request latency by route, including streamed bodies",
+    ["method", "route"], buckets=LATENCY_BUCKETS)
+HTTP_IN_FLIGHT = Gauge(
+    "cv_maker_http_requests_in_flight", "HTTP requests currently being served")
+
+STAGE_LATENCY = Histogram(
+    "cv_maker_stage_duration_seconds", "Pipeline stage latency; target is the site, model or file type",
+    ["stage", "target"], buckets=LATENCY_BUCKETS)
+STAGE_IN_FLIGHT = Gauge(
+    "cv_maker_stage_in_flight", "Pipeline stage calls currently running",
+    ["stage"])
+UPSTREAM_ERRORS = Counter(
+    "cv_maker_upstream_errors_total", "Failed upstream calls by upstream and error kind",
+    ["upstream", "kind"])
+
+BREAKER_STATES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+
+def site_label(domain: str) -> str:
+    """Collapse a job site host into a low-cardinality label."""
+    for site in ("linkedin", "indeed", "reed"):
+        if site in domain:
+            return site
+    return "other"
+
+
+def error_kind(error: BaseException) -> str:
+    """Classify an upstream failure for the error counter."""
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, UpstreamError):
+        return f"http_{error.status}"
+    if isinstance(error, genai_errors.APIError):
+        return f"http_{error.code}"
+    if isinstance(error, (UpstreamTimeoutError, TimeoutError)):
+        return "timeout"
+    return type(error).__name__
+
+
+class _StageTimer:
+    """Times one stage call into the stage histogram and in-flight gauge."""
+
+    def __init__(self, stage: str, target: str, upstream: Optional[str] = None):
+        self.stage = stage
+        self.target = target
+        self.upstream = upstream
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = time.perf_counter()
+        STAGE_IN_FLIGHT.labels(self.stage).inc()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        STAGE_IN_FLIGHT.labels(self.stage).dec()
+        STAGE_LATENCY.labels(self.stage, self.target).observe(time.perf_counter() - self.started)
+        if exc is not None and self.upstream is not None and isinstance(exc, Exception):
+            UPSTREAM_ERRORS.labels(self.upstream, error_kind(exc)).inc()
+
+
+def _wrap_async(owner: Any, name: str, labels: Callable[..., Tuple[str, str, Optional[str]]]) -> None:
+    """Replace owner.name with a timed version; labels maps the call arguments to (stage, target, upstream)."""
+    method = getattr(owner, name)
+
+    @functools.wraps(method)
+    async def timed(*args, **kwargs):
+        with _StageTimer(*labels(*args, **kwargs)):
+            return await method(*args, **kwargs)
+
+    setattr(owner, name, timed)
+
+
+def _wrap_sync(owner: Any, name: str, labels: Callable[..., Tuple[str, str, Optional[str]]]) -> None:
+    method = getattr(owner, name)
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        with _StageTimer(*labels(*args, **kwargs)):
+            return method(*args, **kwargs)
+
+    setattr(owner, name, timed)
+
+
+def _wrap_stream(owner: Any, name: str, labels: Callable[..., Tuple[str, str, Optional[str]]]) -> None:
+    """Like _wrap_async for async generators; the stage lasts until the stream is exhausted."""
+    method = getattr(owner, name)
+
+    @functools.wraps(method)
+    async def timed(*args, **kwargs) -> AsyncIterator[Any]:
+        with _StageTimer(*labels(*args, **kwargs)):
+            async for item in method(*args, **kwargs):
+                yield item
+
+    setattr(owner, name, timed)
+
+
+def _count_rejections(caller: Any, upstream_label: Callable[[str], str]) -> None:
+    """
+    Count calls an open circuit fails fast in the upstream error counter.
+
+    The breaker rejects before the timed upstream call starts, so the stage timers
+    never see these failures.
+    """
+    method = caller.call
+
+    @functools.wraps(method)
+    async def call(upstream: str, fn: Callable[[], Any]) -> Any:
+        try:
+            return await method(upstream, fn)
+        except CircuitOpenError as e:
+            UPSTREAM_ERRORS.labels(upstream_label(upstream), error_kind(e)).inc()
+            raise
+
+    caller.call = call
+
+
+class ServiceCollector:
+    """Reads cache, breaker and queue counters from the services at scrape time."""
+
+    def __init__(self, caches: Dict[str, Callable[[], Dict[str, Any]]], stats: Dict[str, Callable[[], Dict[str, Any]]], resilience: Dict[str, Any]):
+        self.caches = caches
+        self.stats = stats
+        self.resilience = resilience
+
+    def collect(self) -> Iterable[Any]:
+        hits = CounterMetricFamily("cv_maker_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cv_maker_cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("cv_maker_cache_hit_ratio", "Cache hit ratio since start", labels=["cache"])
+        for name, read in self.caches.items():
+            stats = read()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            lookups = stats["hits"] + stats["misses"]
+            ratio.add_metric([name], stats["hits"] / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+        state = GaugeMetricFamily(
+            "cv_maker_circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+            labels=["group", "upstream"])
+        rejected = CounterMetricFamily(
+            "cv_maker_circuit_breaker_rejections", "Calls failed fast by an open circuit",
+            labels=["group", "upstream"])
+        retries = CounterMetricFamily("cv_maker_upstream_retries", "Retried upstream calls", labels=["group"])
+        for group, caller in self.resilience.items():
+            retries.add_metric([group], caller.retries)
+            for name, breaker in caller.breakers.items():
+                state.add_metric([group, name], BREAKER_STATES[breaker.state])
+                rejected.add_metric([group, name], breaker.rejected)
+        yield state
+        yield rejected
+        yield retries
+
+        # Numeric fields of the remaining /stats sections, e.g. queue depths and rejections
+        for section, read in self.stats.items():
+            gauge = GaugeMetricFamily(
+                f"cv_maker_{section}", f"{section} counters", labels=["field"])
+            for field, value in read().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauge.add_metric([field], value)
+            yield gauge
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests per route template."""
+
+    def __init__(self, app: Any, routes: list):
+        self.app = app
+        # The application's route list, used to label requests answered before routing
+        self.routes = routes
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = self._route_template(scope)
+            HTTP_REQUESTS.labels(scope["method"], route, str(status["code"])).inc()
+            HTTP_LATENCY.labels(scope["method"], route).observe(time.perf_counter() - started)
+
+
+    def _route_template(self, scope: Dict[str, Any]) -> str:
+        # Templates rather than raw paths keep label cardinality bounded. The router
+        # records the matched route in the scope; requests rejected by an outer
+        # middleware never reach it, so match them here.
+        route = scope.get("route")
+        if route is None:
+            for candidate in self.routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    route = candidate
+                    break
+        return getattr(route, "path", "unmatched")
+
+
+def instrument_services(cv_processor: Any, job_scraper: Any, llm_adapter: Any, pdf_renderer: Any, extra_stats: Dict[str, Callable[[], Dict[str, Any]]]) -> None:
+    """
+    Wrap the services' stage methods with timers and register the service collector.
+
+    PDFGenerator runs inside the render worker processes, so PDF rendering is
+    timed around PDFRenderService.render, which includes queueing for a worker.
+
+    Args:
+        cv_processor: CVProcessor instance
+        job_scraper: JobScraper instance
+        llm_adapter: LLMAdapter instance
+        pdf_renderer: PDFRenderService instance
+        extra_stats: Further /stats sections exported as gauges
+    """
+    _wrap_async(cv_processor, "_extract_text_from_pdf_async",
+                lambda content: ("cv_extract", "pdf", None))
+    _wrap_sync(cv_processor, "_extract_text_from_txt",
+               lambda content: ("cv_extract", "txt", None))
+
+    _wrap_async(job_scraper, "_fetch_page_once",
+                lambda url, headers: ("scrape_fetch", site_label(job_scraper._get_domain(url)),
+                                      f"jobsite:{site_label(job_scraper._get_domain(url))}"))
+    _wrap_sync(job_scraper, "_parse_job_page",
+               lambda domain, html: ("scrape_parse", site_label(domain), None))
+
+    _wrap_async(llm_adapter, "_call_model_once",
+                lambda model, contents, config=None: ("llm", model, f"gemini:{model}"))
+    _wrap_stream(llm_adapter, "_generate_content_stream",
+                 lambda model, contents, config=None: ("llm_stream", model, f"gemini:{model}"))
+
+    _wrap_async(pdf_renderer, "render",
+                lambda html_content: ("pdf_render", "weasyprint", None))
+
+    # LLM breakers are already named gemini:<model>; job site breakers by host
+    _count_rejections(llm_adapter.resilience, lambda upstream: upstream)
+    _count_rejections(job_scraper.resilience, lambda domain: f"jobsite:{site_label(domain)}")
+
+    REGISTRY.register(ServiceCollector(
+        caches={
+            "llm_response": llm_adapter.response_cache.stats,
+            "job_description": job_scraper.cache.stats,
+            "cv_text": cv_processor.cache.stats,
+        },
+        stats=extra_stats,
+        resilience={"llm": llm_adapter.resilience, "job_sites": job_scraper.resilience}
+    ))
+    logger.info("Prometheus instrumentation installed")
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the exposition body and its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
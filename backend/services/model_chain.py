@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Models that served the generations of the current request; bound by the pipeline
+served_models: ContextVar[Optional[List[str]]] = ContextVar("served_models", default=None)
+
+
+def record_served_model(model: str) -> None:
+    """Note the model that answered, if the caller is collecting them."""
+    models = served_models.get()
+    if models is not None:
+        models.append(model)
+
+
+@dataclass
+class ModelTarget:
+    """A model in the fallback chain and the latency it is expected to answer within."""
+    name: str
+    slo_seconds: float
+
+
+class ModelChain:
+    """
+    Ordered models with per-model latency SLOs, called with hedged requests.
+
+    The first model is always tried first. If it has not answered after its hedge
+    delay, the next model is started as well and whichever succeeds first wins; the
+    others are cancelled. A failing model immediately hands over to the next one.
+    The hedge delay is a percentile of the model's recent latencies, clamped to its
+    SLO, so hedges only fire for the slow tail. A call cancelled because a hedge won
+    after it had outlasted its own hedge delay is recorded at the time it had run,
+    a lower bound on its latency; dropping those slow losers would pull the
+    percentile down and make hedges ever more frequent.
+    """
+
+    def __init__(self, default_model: str):
+        self.default_slo = float(os.getenv("LLM_DEFAULT_SLO_SECONDS", "30"))
+        self.models = self._parse_chain(os.getenv("GEMINI_MODEL_CHAIN", ""), default_model)
+
+        self.hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_min_delay = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "1"))
+        window = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+
+        # Full generation latency and time to first chunk are tracked separately
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {
+            (kind, model.name): deque(maxlen=window)
+            for kind in ("generate", "stream") for model in self.models
+        }
+        self.served: Dict[str, int] = {model.name: 0 for model in self.models}
+        self.failures: Dict[str, int] = {model.name: 0 for model in self.models}
+        self.hedges = 0
+
+    @property
+    def primary(self) -> ModelTarget:
+        return self.models[0]
+
+    def hedge_delay(self, target: ModelTarget, kind: str = "generate") -> float:
+        """Seconds to wait for a model before starting the next one in the chain."""
+        samples = self._latencies[(kind, target.name)]
+        if len(samples) < self.hedge_min_samples:
+            return target.slo_seconds
+        ordered = sorted(samples)
+        rank = max(math.ceil(self.hedge_percentile / 100 * len(ordered)) - 1, 0)
+        return min(max(ordered[rank], self.hedge_min_delay), target.slo_seconds)
+
+    async def call(self, fn: Callable[[str], Awaitable[T]]) -> Tuple[str, T]:
+        """
+        Run fn against the chain with hedging and failover.
+
+        Args:
+            fn: Coroutine factory receiving a model name
+
+        Returns:
+            Tuple of the model that answered and its result
+        """
+        pending: Dict["asyncio.Task[T]", Tuple[ModelTarget, float]] = {}
+        last_error: Optional[BaseException] = None
+        next_index = 0
+
+        def launch() -> None:
+            nonlocal next_index
+            target = self.models[next_index]
+            next_index += 1
+            task = asyncio.create_task(self._timed(target, "generate", fn(target.name)))
+            pending[task] = (target, time.perf_counter())
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if next_index < len(self.models):
+                    timeout = self.hedge_delay(self.models[next_index - 1])
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedges += 1
+                    logger.info(f"Hedging {self.models[next_index - 1].name} with {self.models[next_index].name}")
+                    launch()
+                    continue
+
+                for task in done:
+                    target, _ = pending.pop(task)
+                    if task.exception() is None:
+                        self._record_served(target)
+                        for loser, started in pending.values():
+                            self._record_censored("generate", loser, started)
+                        return target.name, task.result()
+                    last_error = task.exception()
+                    self.failures[target.name] += 1
+                    logger.warning(f"Model {target.name} failed: {str(last_error)}")
+
+                if next_index < len(self.models):
+                    launch()
+
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, open_stream: Callable[[str], AsyncIterator[str]], on_served: Optional[Callable[[str], None]] = None) -> AsyncIterator[str]:
+        """
+        Stream from the chain, hedging on the time to the first chunk.
+
+        Once a model produces its first chunk the other streams are closed and the
+        rest of the response comes from that model only.
+
+        Args:
+            open_stream: Async generator factory receiving a model name
+            on_served: Called with the name of the model whose stream won
+        """
+        pending: Dict["asyncio.Task[str]", Tuple[ModelTarget, AsyncIterator[str], float]] = {}
+        last_error: Optional[BaseException] = None
+        winner: Optional[AsyncIterator[str]] = None
+        next_index = 0
+
+        def launch() -> None:
+            nonlocal next_index
+            target = self.models[next_index]
+            next_index += 1
+            iterator = open_stream(target.name).__aiter__()
+            pending[asyncio.ensure_future(iterator.__anext__())] = (target, iterator, time.perf_counter())
+
+        launch()
+        try:
+            while pending and winner is None:
+                timeout = None
+                if next_index < len(self.models):
+                    timeout = self.hedge_delay(self.models[next_index - 1], "stream")
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedges += 1
+                    logger.info(f"Hedging stream from {self.models[next_index - 1].name} with {self.models[next_index].name}")
+                    launch()
+                    continue
+
+                for task in done:
+                    target, iterator, started = pending.pop(task)
+                    error = task.exception()
+                    if error is None and winner is None:
+                        self._latencies[("stream", target.name)].append(time.perf_counter() - started)
+                        self._record_served(target)
+                        if on_served is not None:
+                            on_served(target.name)
+                        winner = iterator
+                        first_chunk = task.result()
+                        continue
+                    if isinstance(error, StopAsyncIteration):
+                        error = Exception("Empty response from Google AI")
+                    if error is not None:
+                        last_error = error
+                        self.failures[target.name] += 1
+                        logger.warning(f"Model {target.name} failed: {str(error)}")
+                    await self._close_quietly(iterator)
+
+                if winner is None and next_index < len(self.models):
+                    launch()
+
+            if winner is not None:
+                for loser, _, started in pending.values():
+                    self._record_censored("stream", loser, started)
+            await self._close_all(pending)
+            if winner is None:
+                raise last_error
+
+            yield first_chunk
+            async for chunk in winner:
+                yield chunk
+        finally:
+            await self._close_all(pending)
+            if winner is not None:
+                await self._close_quietly(winner)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-model counters and current hedge delays."""
+        return {
+            "models": [
+                {
+                    "model": model.name,
+                    "slo_seconds": model.slo_seconds,
+                    "hedge_delay_seconds": round(self.hedge_delay(model), 3),
+                    "served": self.served[model.name],
+                    "failures": self.failures[model.name],
+                }
+                for model in self.models
+            ],
+            "hedges": self.hedges,
+        }
+
+    async def _timed(self, target: ModelTarget, kind: str, awaitable: Awaitable[T]) -> T:
+        started = time.perf_counter()
+        result = await awaitable
+        self._latencies[(kind, target.name)].append(time.perf_counter() - started)
+        return result
+
+    def _record_censored(self, kind: str, target: ModelTarget, started: float) -> None:
+        # Losers launched as hedges and cancelled early say nothing about their tail
+        elapsed = time.perf_counter() - started
+        if elapsed >= self.hedge_delay(target, kind):
+            self._latencies[(kind, target.name)].append(elapsed)
+
+    def _record_served(self, target: ModelTarget) -> None:
+        self.served[target.name] += 1
+        record_served_model(target.name)
+
+    async def _close_all(self, pending: Dict["asyncio.Task[str]", Tuple[ModelTarget, AsyncIterator[str], float]]) -> None:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for _, iterator, _ in pending.values():
+            await self._close_quietly(iterator)
+        pending.clear()
+
+    @staticmethod
+    async def _close_quietly(iterator: AsyncIterator[str]) -> None:
+        try:
+            await iterator.aclose()
+        except Exception:
+            pass
+
+    def _parse_chain(self, spec: str, default_model: str) -> List[ModelTarget]:
+        # "model-a:20,model-b:30" - model names with optional SLOs in seconds
+        models = []
+        for entry in spec.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            name, _, slo = entry.partition(":")
+            models.append(ModelTarget(name=name.strip(), slo_seconds=float(slo) if slo else self.default_slo))
+        return models or [ModelTarget(name=default_model, slo_seconds=self.default_slo)]
@@ -0,0 +1,166 @@
+import codecs
+import re
+from typing import Callable, Optional
+
+from services.job_posting import JobPosting, parse_json_ld_block
+
+# Content types worth parsing as a job page; a missing Content-Type is let through
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# The HTML spec expects a meta charset within the first 1024 bytes; allow some slack
+CHARSET_SNIFF_BYTES = 4096
+
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:\-]+)', re.IGNORECASE)
+HEADER_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([a-zA-Z0-9_.:\-]+)', re.IGNORECASE)
+
+# Browsers decode these labels as windows-1252, and pages rely on it
+WINDOWS_1252_ALIASES = {"iso-8859-1", "iso8859-1", "latin1", "latin-1", "us-ascii", "ascii"}
+
+JSON_LD_START_PATTERN = re.compile(rb'application/ld\+json', re.IGNORECASE)
+SCRIPT_END_PATTERN = re.compile(rb'</script', re.IGNORECASE)
+TAG_NAME_PATTERN = re.compile(rb'<([a-zA-Z][a-zA-Z0-9]*)')
+
+
+def is_html_content_type(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type header value names an HTML document (or is absent)."""
+    if not content_type:
+        return True
+    return content_type.split(";", 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def detect_charset(content_type: Optional[str], head: bytes) -> str:
+    """
+    Pick the encoding of an HTML document.
+
+    In order of precedence: a byte order mark, the Content-Type charset, a meta
+    charset in the first bytes of the page, then UTF-8. Unknown labels fall
+    through to the next source.
+
+    Args:
+        content_type: Content-Type header value, if any
+        head: The first bytes of the body
+
+    Returns:
+        str: A Python codec name
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    candidates = []
+    if content_type:
+        match = HEADER_CHARSET_PATTERN.search(content_type)
+        if match:
+            candidates.append(match.group(1))
+    match = META_CHARSET_PATTERN.search(head[:CHARSET_SNIFF_BYTES])
+    if match:
+        candidates.append(match.group(1).decode("ascii"))
+
+    for label in candidates:
+        label = label.lower()
+        if label in WINDOWS_1252_ALIASES:
+            return "cp1252"
+        try:
+            return codecs.lookup(label).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+class PageCompletion:
+    """
+    Tells from a partly received page whether it already holds what the parsers need.
+
+    A page is complete once it contains a whole JSON-LD block with a JobPosting
+    the parser would use, or the whole element carrying the site's description
+    marker (e.g. its id or class), counting nested elements of the same tag. A
+    JobPosting whose description is too thin to use does not end the read, since
+    the parser then falls back to the description element further down. Each
+    call to feed() only scans bytes it has not seen, so checking after every
+    chunk stays linear in the page size.
+    """
+
+    def __init__(self, description_marker: Optional[bytes], is_usable: Callable[[JobPosting], bool]):
+        self.description_marker = description_marker
+        self.is_usable = is_usable
+        self._ld_scan = 0
+        self._marker_scan = 0
+        self._container_pattern: Optional[re.Pattern] = None
+        self._container_scan = 0
+        self._container_depth = 0
+
+    def feed(self, buffer: bytes) -> bool:
+        """
+        Check the page received so far.
+
+        Args:
+            buffer: Every byte of the body received so far
+
+        Returns:
+            bool: True once the rest of the page is not needed
+        """
+        return self._has_job_posting(buffer) or self._has_description(buffer)
+
+    def _has_job_posting(self, buffer: bytes) -> bool:
+        while True:
+            start = JSON_LD_START_PATTERN.search(buffer, self._ld_scan)
+            if start is None:
+                # Keep a partly received marker in the next scan
+                self._ld_scan = max(self._ld_scan, len(buffer) - len(b'application/ld+json'))
+                return False
+            end = SCRIPT_END_PATTERN.search(buffer, start.end())
+            if end is None:
+                self._ld_scan = start.start()
+                return False
+            block = buffer[start.end():end.start()]
+            if b'JobPosting' in block and b'"description"' in block:
+                # Drop the rest of the start tag; JSON-LD is UTF-8 in practice
+                json_text = block[block.find(b'>') + 1:].decode('utf-8', errors='replace')
+                posting = parse_json_ld_block(json_text)
+                if posting is not None and self.is_usable(posting):
+                    return True
+            self._ld_scan = end.end()
+
+    def _has_description(self, buffer: bytes) -> bool:
+        if self.description_marker is None:
+            return False
+        if self._container_pattern is None and not self._find_container(buffer):
+            return False
+
+        for match in self._container_pattern.finditer(buffer, self._container_scan):
+            self._container_depth += -1 if match.group(1) else 1
+            self._container_scan = match.end()
+            if self._container_depth == 0:
+                return True
+        return False
+
+    def _find_container(self, buffer: bytes) -> bool:
+        """Locate the start tag holding the description marker; True once it has been received whole."""
+        while True:
+            index = buffer.find(self.description_marker, self._marker_scan)
+            if index == -1:
+                self._marker_scan = max(self._marker_scan, len(buffer) - len(self.description_marker))
+                return False
+
+            tag_start = buffer.rfind(b'<', 0, index)
+            if tag_start == -1 or buffer.rfind(b'>', 0, index) > tag_start:
+                # The marker is in text, a script or a stylesheet, not inside a tag
+                self._marker_scan = index + len(self.description_marker)
+                continue
+
+            name = TAG_NAME_PATTERN.match(buffer, tag_start)
+            if name is None:
+                # A closing tag, comment or doctype
+                self._marker_scan = index + len(self.description_marker)
+                continue
+            tag_end = buffer.find(b'>', index)
+            if tag_end == -1:
+                self._marker_scan = index
+                return False
+
+            self._container_pattern = re.compile(
+                rb'<(/?)' + re.escape(name.group(1)) + rb'[\s/>]', re.IGNORECASE)
+            self._container_scan = tag_end + 1
+            self._container_depth = 1
+            return True
@@ -11,6 +11,13 @@ class PDFGenerator:
     
     def __init__(self):
         self.font_config = FontConfiguration()
+        # Built once; the styles stay inline so they keep author origin and the
+        # usual cascade against any <style> or style="" in the CV HTML
+        self._style_block = f"<style>{self._get_cv_styles()}</style>"
+
+    def warm_up(self) -> None:
+        """Render a tiny document so WeasyPrint's modules and fonts are loaded up front."""
+        self.html_to_pdf("<p>warm-up</p>")
     
     def html_to_pdf(self, html_content: str, filename: Optional[str] = None) -> bytes:
         """
@@ -39,9 +46,7 @@ class PDFGenerator:
         <html>
         <head>
             <meta charset="utf-8">
-            <style>
-                {self._get_cv_styles()}
-            </style>
+            {self._style_block}
         </head>
         <body>
             {html_body}
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from services.pdf_generator import PDFGenerator
+
+logger = logging.getLogger(__name__)
+
+# Per-process generator, created by the pool initializer so WeasyPrint and fonts
+# are ready before the first real render
+_worker_generator: Optional[PDFGenerator] = None
+
+
+def _init_worker() -> None:
+    global _worker_generator
+    _worker_generator = PDFGenerator()
+    _worker_generator.warm_up()
+
+
+def _warm_worker() -> int:
+    return os.getpid()
+
+
+def _render_in_worker(html_content: str) -> bytes:
+    return _worker_generator.html_to_pdf(html_content)
+
+
+class RenderQueueFullError(Exception):
+    """Raised when too many renders are already queued; maps to HTTP 503."""
+
+
+class PDFRenderService:
+    """Renders PDFs in a pool of pre-warmed worker processes with a bounded queue."""
+
+    def __init__(self, pdf_generator: PDFGenerator):
+        # In-process generator used when the pool is disabled (PDF_RENDER_WORKERS=0)
+        self.pdf_generator = pdf_generator
+        self.workers = int(os.getenv("PDF_RENDER_WORKERS", str(os.cpu_count() or 1)))
+        self.max_pending = int(os.getenv("PDF_RENDER_MAX_PENDING", str(max(self.workers, 1) * 4)))
+        self.render_timeout = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "60"))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.rendered = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        """Start the worker pool and wait until every worker has warmed up."""
+        if self.workers <= 0 or self._executor is not None:
+            return
+
+        self._executor = self._create_executor()
+        loop = asyncio.get_running_loop()
+        try:
+            pids = await asyncio.gather(*[
+                loop.run_in_executor(self._executor, _warm_worker) for _ in range(self.workers)
+            ])
+            logger.info(f"PDF render pool ready with {len(set(pids))} warmed workers")
+        except Exception as e:
+            logger.error(f"PDF render pool failed to start, rendering in-process: {str(e)}")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.workers = 0
+
+    async def close(self) -> None:
+        """Shut the worker pool down."""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    async def render(self, html_content: str) -> bytes:
+        """
+        Render HTML to PDF without blocking the event loop.
+
+        Args:
+            html_content: CV content in HTML format
+
+        Returns:
+            bytes: PDF file content
+
+        Raises:
+            RenderQueueFullError: If max_pending renders are already queued or running
+        """
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise RenderQueueFullError("PDF renderer is busy, please retry shortly")
+
+        work = None
+        executor = self._executor
+        try:
+            if executor is None:
+                render = asyncio.ensure_future(asyncio.to_thread(self.pdf_generator.html_to_pdf, html_content))
+            else:
+                work = executor.submit(_render_in_worker, html_content)
+                render = asyncio.wrap_future(work)
+
+            # The slot is held until the render really ends: a timed-out render keeps
+            # its worker busy, so releasing on timeout would let the queue overfill
+            self._pending += 1
+            render.add_done_callback(self._release)
+
+            pdf_bytes = await asyncio.wait_for(asyncio.shield(render), timeout=self.render_timeout)
+        except asyncio.TimeoutError:
+            if work is not None:
+                # Drops a render still waiting for a worker; a running one cannot be stopped
+                work.cancel()
+            raise Exception(f"PDF rendering timed out after {self.render_timeout:g}s")
+        except BrokenProcessPool:
+            self._restart_executor(executor)
+            raise Exception("PDF render worker crashed")
+
+        self.rendered += 1
+        return pdf_bytes
+
+    def _release(self, render: asyncio.Future) -> None:
+        self._pending -= 1
+        if not render.cancelled():
+            # Mark the error of a render nobody waits for any more as retrieved
+            render.exception()
+
+    def stats(self) -> dict:
+        """Return pool and queue counters for monitoring."""
+        return {
+            "workers": self.workers,
+            "pool_running": self._executor is not None,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "rendered": self.rendered,
+            "rejected": self.rejected,
+        }
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn avoids forking a process that already runs an event loop and threads
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+
+    def _restart_executor(self, broken: ProcessPoolExecutor) -> None:
+        # Every render queued on a broken pool fails with BrokenProcessPool; only the
+        # first to see it replaces the pool, the others must not touch its successor
+        if self._executor is not broken:
+            return
+        logger.error("PDF render worker died, restarting the pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
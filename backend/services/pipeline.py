@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+from fastapi import UploadFile
+
+from services.cv_processor import CVLimitError, CVProcessor
+from services.job_scraper import JobScraper
+from services.model_chain import served_models
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PipelineInputError(ValueError):
+    """Raised when the uploaded CV or the job posting cannot be used; maps to an HTTP 4xx."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one job URL in a batch; exactly one of result and error is set."""
+    index: int
+    job_url: str
+    ctx: "PipelineContext"
+    result: Any = None
+    error: Optional[Exception] = None
+
+
+@dataclass
+class PipelineContext:
+    """Inputs shared by the generation stages of a single request, plus stage timings."""
+    cv_content: str = ""
+    job_description: str = ""
+    cv_id: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Models that answered the generation stages, in completion order
+    models: List[str] = field(default_factory=list)
+
+    def format_timings(self) -> str:
+        """Render stage timings, and the serving models, for log lines."""
+        timings = ", ".join(f"{stage}={ms:.0f}ms" for stage, ms in self.timings.items())
+        if self.models:
+            timings += f", model={'+'.join(self.models)}"
+        return timings
+
+    def server_timing(self) -> str:
+        """Render stage timings as a Server-Timing header value; the llm stage names the serving models."""
+        entries = []
+        for stage, ms in self.timings.items():
+            entry = f"{stage};dur={ms:.1f}"
+            if stage == "llm" and self.models:
+                entry += f';desc="{"+".join(self.models)}"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+class RequestPipeline:
+    """Orchestrates CV extraction, job scraping and generation for the API endpoints."""
+
+    SUPPORTED_CONTENT_TYPES = ["application/pdf", "text/plain"]
+
+    def __init__(self, cv_processor: CVProcessor, job_scraper: JobScraper):
+        self.cv_processor = cv_processor
+        self.job_scraper = job_scraper
+
+        # Batch limits: URLs per request, concurrent scrapes per job site host and
+        # concurrent LLM calls per batch
+        self.batch_max_urls = int(os.getenv("BATCH_MAX_URLS", "30"))
+        self.batch_per_host_concurrency = int(os.getenv("BATCH_PER_HOST_CONCURRENCY", "2"))
+        self.batch_llm_concurrency = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+    async def prepare(self, cv_file: Optional[UploadFile], job_url: str, cv_id: Optional[str] = None) -> PipelineContext:
+        """
+        Extract the CV and scrape the job description concurrently.
+
+        Both stages start together; if either fails the other is cancelled and the
+        error is raised immediately.
+
+        Args:
+            cv_file: Uploaded PDF or TXT CV, or None when cv_id is given
+            job_url: URL to the job description
+            cv_id: Handle of a CV previously uploaded to /api/cv
+
+        Returns:
+            PipelineContext: Extracted CV text, job description and stage timings
+        """
+        self.validate_cv_source(cv_file, cv_id)
+
+        ctx = PipelineContext()
+        started = time.perf_counter()
+
+        extract_task = asyncio.create_task(self.run_stage(
+            ctx, "cv_extract", self._load_cv(ctx, cv_file, cv_id)))
+        scrape_task = asyncio.create_task(self.run_stage(
+            ctx, "job_scrape", self.job_scraper.scrape_job_description(job_url)))
+        tasks = {extract_task, scrape_task}
+
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                error = task.exception()
+                if isinstance(error, CVLimitError):
+                    raise PipelineInputError(str(error))
+                if error is not None:
+                    raise error
+            ctx.cv_content = extract_task.result()
+            ctx.job_description = scrape_task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        ctx.timings["prepare"] = (time.perf_counter() - started) * 1000
+
+        if not ctx.cv_content.strip():
+            raise PipelineInputError("Could not extract text from the CV file.")
+        if not ctx.job_description.strip():
+            raise PipelineInputError("Could not extract job description from the provided URL.")
+
+        return ctx
+
+    async def execute(
+        self,
+        cv_file: Optional[UploadFile],
+        job_url: str,
+        generate: Callable[[PipelineContext], Awaitable[T]],
+        cv_id: Optional[str] = None
+    ) -> Tuple[PipelineContext, T]:
+        """
+        Run the full pipeline: prepare the inputs, then the generation stage.
+
+        Args:
+            cv_file: Uploaded PDF or TXT CV, or None when cv_id is given
+            job_url: URL to the job description
+            generate: Coroutine factory receiving the prepared context
+            cv_id: Handle of a CV previously uploaded to /api/cv
+
+        Returns:
+            Tuple of the pipeline context and the generation result
+        """
+        ctx = await self.prepare(cv_file, job_url, cv_id)
+        result = await self.run_stage(ctx, "llm", generate(ctx))
+        return ctx, result
+
+    async def prepare_cv(self, cv_file: Optional[UploadFile], cv_id: Optional[str] = None) -> PipelineContext:
+        """
+        Resolve only the CV, for flows that scrape several job postings against it.
+
+        Args:
+            cv_file: Uploaded PDF or TXT CV, or None when cv_id is given
+            cv_id: Handle of a CV previously uploaded to /api/cv
+
+        Returns:
+            PipelineContext: Context holding the CV text and its extraction timing
+        """
+        self.validate_cv_source(cv_file, cv_id)
+
+        ctx = PipelineContext()
+        try:
+            ctx.cv_content = await self.run_stage(ctx, "cv_extract", self._load_cv(ctx, cv_file, cv_id))
+        except CVLimitError as e:
+            raise PipelineInputError(str(e))
+
+        if not ctx.cv_content.strip():
+            raise PipelineInputError("Could not extract text from the CV file.")
+        return ctx
+
+    async def iter_batch(
+        self,
+        cv_ctx: PipelineContext,
+        job_urls: List[str],
+        generate: Callable[[PipelineContext], Awaitable[Any]]
+    ) -> AsyncIterator[BatchItemResult]:
+        """
+        Scrape and generate for many job URLs against one CV, yielding in completion order.
+
+        Scrapes run concurrently with at most batch_per_host_concurrency per host and
+        generations are capped at batch_llm_concurrency. A failing item is reported
+        through its BatchItemResult and does not stop the rest of the batch.
+
+        Args:
+            cv_ctx: Context from prepare_cv
+            job_urls: Job posting URLs
+            generate: Coroutine factory receiving the per-item context
+
+        Yields:
+            BatchItemResult: One per URL, as each completes
+        """
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        llm_limit = asyncio.Semaphore(self.batch_llm_concurrency)
+
+        async def run_item(index: int, job_url: str) -> BatchItemResult:
+            ctx = PipelineContext(cv_content=cv_ctx.cv_content, cv_id=cv_ctx.cv_id)
+            item = BatchItemResult(index=index, job_url=job_url, ctx=ctx)
+            try:
+                host = urlparse(job_url).netloc.lower()
+                host_limit = host_limits.setdefault(
+                    host, asyncio.Semaphore(self.batch_per_host_concurrency))
+                async with host_limit:
+                    ctx.job_description = await self.run_stage(
+                        ctx, "job_scrape", self.job_scraper.scrape_job_description(job_url))
+                if not ctx.job_description.strip():
+                    raise PipelineInputError("Could not extract job description from the provided URL.")
+
+                async with llm_limit:
+                    item.result = await self.run_stage(ctx, "llm", generate(ctx))
+            except Exception as e:
+                logger.warning(f"Batch item {index} ({job_url}) failed: {str(e)}")
+                item.error = e
+            return item
+
+        tasks = [asyncio.create_task(run_item(index, url)) for index, url in enumerate(job_urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def run_parallel(self, ctx: PipelineContext, stages: Dict[str, Awaitable[Any]]) -> Dict[str, Any]:
+        """
+        Run independent stages concurrently, timing each one.
+
+        If any stage fails the others are cancelled and the error is raised.
+
+        Args:
+            ctx: Pipeline context receiving the stage timings
+            stages: Stage name to awaitable
+
+        Returns:
+            Dict mapping each stage name to its result
+        """
+        tasks = {
+            name: asyncio.create_task(self.run_stage(ctx, name, awaitable))
+            for name, awaitable in stages.items()
+        }
+        try:
+            done, _ = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+            return {name: task.result() for name, task in tasks.items()}
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+
+    def validate_cv_source(self, cv_file: Optional[UploadFile], cv_id: Optional[str]) -> None:
+        """Reject missing, ambiguous or unsupported CV inputs before any work starts."""
+        if cv_file is not None and cv_id:
+            raise PipelineInputError("Provide either cv_file or cv_id, not both.")
+        if cv_file is None and not cv_id:
+            raise PipelineInputError("Provide either cv_file or cv_id.")
+        if cv_file is not None and cv_file.content_type not in self.SUPPORTED_CONTENT_TYPES:
+            raise PipelineInputError("Invalid file type. Please upload a PDF or TXT file.")
+
+    async def _load_cv(self, ctx: PipelineContext, cv_file: Optional[UploadFile], cv_id: Optional[str]) -> str:
+        """Resolve the CV text from an upload or a cached cv_id."""
+        if cv_id:
+            text = self.cv_processor.get_cached_text(cv_id)
+            if text is None:
+                raise PipelineInputError(
+                    "Unknown or expired cv_id. Please upload the CV again.", status_code=404)
+            ctx.cv_id = cv_id.strip().lower()
+            return text
+
+        ctx.cv_id, text = await self.cv_processor.register_file(cv_file)
+        return text
+
+    async def run_stage(self, ctx: PipelineContext, stage: str, awaitable: Awaitable[Any]) -> Any:
+        """
+        Await a stage and record its duration in milliseconds, even when it fails.
+
+        Models serving generations inside the stage are recorded on the context.
+        """
+        started = time.perf_counter()
+        token = served_models.set(ctx.models)
+        try:
+            return await awaitable
+        finally:
+            served_models.reset(token)
+            ctx.timings[stage] = (time.perf_counter() - started) * 1000
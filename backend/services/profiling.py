@@ -0,0 +1,169 @@
+import asyncio
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_server_timing(value: str) -> Dict[str, Dict[str, Any]]:
+    """Parse a Server-Timing header into {stage: {"dur_ms": ..., "desc": ...}}."""
+    stages = {}
+    for entry in value.split(","):
+        parts = [part.strip() for part in entry.split(";") if part.strip()]
+        if not parts:
+            continue
+        stage = {}
+        for param in parts[1:]:
+            key, _, raw = param.partition("=")
+            if key == "dur":
+                stage["dur_ms"] = float(raw)
+            elif key == "desc":
+                stage["desc"] = raw.strip('"')
+        stages[parts[0]] = stage
+    return stages
+
+
+class ProfilingMiddleware:
+    """
+    Runs selected requests under cProfile and writes the profile to a directory.
+
+    A request is profiled when it carries X-Profile with the admin token, or when
+    it is picked by sample_rate. Only one profile runs at a time; other requests
+    arriving meanwhile run normally. Next to each .prof file a JSON file records
+    the route, status, total time and the stage timings the pipeline reported in
+    Server-Timing.
+
+    cProfile sees the whole event loop thread, so work for concurrent requests
+    is included in a profile; the sidecar records how many were in flight. Work
+    in the CV extraction and PDF render worker processes is not profiled.
+
+    Install this middleware only when profiling is enabled, so it costs nothing
+    otherwise.
+    """
+
+    HEADER = b"x-profile"
+
+    def __init__(self, app: Any, directory: str, admin_token: Optional[str], sample_rate: float, max_files: int = 100):
+        self.app = app
+        self.directory = Path(directory)
+        self.admin_token = admin_token or None
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self._active = False
+        self._in_flight = 0
+        self.profiles_written = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._in_flight += 1
+        try:
+            trigger = self._trigger(scope)
+            if trigger is None or self._active:
+                await self.app(scope, receive, send)
+                return
+            await self._profile(scope, receive, send, trigger)
+        finally:
+            self._in_flight -= 1
+
+    def _trigger(self, scope: Dict[str, Any]) -> Optional[str]:
+        if self.admin_token is not None:
+            for name, value in scope.get("headers") or []:
+                if name == self.HEADER:
+                    if hmac.compare_digest(value.decode("latin-1"), self.admin_token):
+                        return "requested"
+                    logger.warning("Ignoring X-Profile header with an invalid token")
+                    break
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def _profile(self, scope: Dict[str, Any], receive: Any, send: Any, trigger: str) -> None:
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        response: Dict[str, Any] = {"status": None, "server_timing": ""}
+
+        async def send_annotated(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = list(message.get("headers") or [])
+                for name, value in headers:
+                    if name.lower() == b"server-timing":
+                        response["server_timing"] = value.decode("latin-1")
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        self._active = True
+        concurrent = self._in_flight - 1
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_annotated)
+        finally:
+            profiler.disable()
+            self._active = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            annotations = {
+                "profile_id": profile_id,
+                "trigger": trigger,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": response["status"],
+                "duration_ms": round(elapsed_ms, 1),
+                "stages": parse_server_timing(response["server_timing"]),
+                "concurrent_requests_at_start": concurrent,
+            }
+            try:
+                await asyncio.to_thread(self._write, profiler, profile_id, scope["path"], annotations)
+            except Exception as e:
+                logger.error(f"Failed to write profile {profile_id}: {str(e)}")
+
+    def _write(self, profiler: cProfile.Profile, profile_id: str, path: str, annotations: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", path).strip("-") or "root"
+        base = self.directory / f"{profile_id}-{slug}"
+        profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}.json", "w", encoding="utf-8") as f:
+            json.dump(annotations, f, indent=2)
+        self.profiles_written += 1
+        logger.info(f"Wrote profile {base}.prof ({annotations['duration_ms']}ms, {annotations['trigger']})")
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles: List[Path] = sorted(self.directory.glob("*.prof"))
+        for stale in profiles[:max(len(profiles) - self.max_files, 0)]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".json").unlink(missing_ok=True)
+
+
+def install_profiling(app: Any) -> None:
+    """Add ProfilingMiddleware to the app if PROFILING_ENABLED is set."""
+    if os.getenv("PROFILING_ENABLED", "false").lower() != "true":
+        return
+
+    admin_token = os.getenv("PROFILING_ADMIN_TOKEN")
+    sample_rate = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    if not admin_token and sample_rate <= 0:
+        logger.warning("Profiling enabled without PROFILING_ADMIN_TOKEN or PROFILING_SAMPLE_RATE; nothing will be profiled")
+
+    directory = os.getenv("PROFILING_DIR", "profiles")
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=directory,
+        admin_token=admin_token,
+        sample_rate=sample_rate,
+        max_files=int(os.getenv("PROFILING_MAX_FILES", "100"))
+    )
+    logger.info(f"Request profiling enabled, writing to {directory}")
@@ -0,0 +1,217 @@
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _heading(pattern: str) -> re.Pattern:
+    return re.compile(rf"(?:{pattern})\s*:?", re.IGNORECASE)
+
+
+# Lines that belong to a benefits section: short and naming a perk
+BENEFIT_ITEM_PATTERN = re.compile(
+    r"\b(insurance|health ?care|medical|dental|vision|pension|401\(?k\)?|retirement|holidays?|vacation|"
+    r"leave|paid time off|PTO|time off|days off|lunch(es)?|meals?|snacks|gym|fitness|wellness|well-?being|"
+    r"cycle to work|bonus(es)?|equity|stock|shares?|share options|salary|compensation|remote|hybrid|flexible|"
+    r"flexi-?time|learning budget|training budget|development budget|allowance|discounts?|parental|maternity|"
+    r"paternity|childcare|laptop|equipment|perks?|benefits?|sabbatical|volunteering|commuter|relocation|"
+    r"life assurance|employee assistance)\b",
+    re.IGNORECASE
+)
+BENEFIT_ITEM_MAX_WORDS = 15
+
+# Lines that belong to an equal opportunity, diversity or accessibility statement
+EEO_ITEM_PATTERN = re.compile(
+    r"\b(equal|opportunit|divers|inclusi|equit|belonging|race|colou?r|religio|gender|sex|sexual orientation|"
+    r"disabilit|veteran|national origin|ethnic|accommodat|adjustment|accessib|discriminat|protected|"
+    r"underrepresented)",
+    re.IGNORECASE
+)
+
+# Section headings that carry no signal for adapting a CV, each with the test a
+# following line must pass to count as part of the section. Headings are matched
+# against a whole line, so a requirement that merely mentions benefits is kept,
+# and the section ends at the first line that is not one of its items; at worst
+# a stray perk survives, never a requirement.
+BOILERPLATE_SECTIONS = [
+    (_heading(r"(our |the |your )?(benefits|perks)( (and|&) (benefits|perks))?( package)?"), "benefits"),
+    (_heading(r"what we offer( you)?"), "benefits"),
+    (_heading(r"what'?s in it for you\??"), "benefits"),
+    (_heading(r"(equal (employment )?opportunit(y|ies)|EEO)( employer| statement| policy)?"), "eeo"),
+    (_heading(r"(our commitment to )?(diversity|inclusion)(,? (and |& )?(equity|inclusion|belonging))*( statement| at \w+)?"), "eeo"),
+    (_heading(r"(accessibility|reasonable adjustments|accommodations)( statement)?"), "eeo"),
+]
+
+# Single sentences that are always boilerplate, wherever they appear
+BOILERPLATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\bis an equal (employment )?opportunit(y|ies) employer\b",
+    r"\bwithout regard to (race|color|colour|religion|sex|gender|age|national origin|disability)\b",
+    r"\bregardless of (race|age|gender|sex|religion|disability|sexual orientation)\b",
+    r"\bparticipates in E-?Verify\b",
+    r"\bwe use cookies\b",
+    r"\b(accept|reject|manage) (all )?cookies\b",
+    r"\bcookie (settings|preferences)\b",
+    r"^(show (more|less)|report this job|similar jobs|people also viewed)$",
+    r"\bsee who .* hired\b",
+    r"\bby clicking (apply|continue)\b",
+)]
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9•\-])|\n+|\s*•\s*")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text locally, without calling the provider.
+
+    Blends the character-based (~4 characters per token) and word-based
+    (~0.75 words per token) rules of thumb for English prose.
+    """
+    if not text:
+        return 0
+    by_chars = len(text) / 4
+    by_words = len(text.split()) * 4 / 3
+    return int(max(by_chars, by_words)) + 1
+
+
+@dataclass
+class CompactionResult:
+    """A compacted job description and the token accounting for it."""
+    job_description: str
+    original_tokens: int
+    compacted_tokens: int
+    truncated: bool = False
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+
+class PromptCompactor:
+    """Drops boilerplate and duplicate text from job descriptions and enforces a token budget."""
+
+    def __init__(self):
+        self.enabled = os.getenv("PROMPT_COMPACTION_ENABLED", "true").lower() == "true"
+        # Budget for the whole prompt (system prompt, task template, CV and job description)
+        self.token_budget = int(os.getenv("PROMPT_TOKEN_BUDGET", "8000"))
+        # The job description is never cut below this, even if the CV is very long
+        self.min_job_tokens = int(os.getenv("PROMPT_MIN_JOB_TOKENS", "400"))
+        self.requests = 0
+        self.tokens_saved = 0
+        self.truncations = 0
+
+    def compact(self, job_description: str, fixed_text: str) -> CompactionResult:
+        """
+        Compact a job description so the whole prompt fits the token budget.
+
+        The CV is never cut: every fact in it may be needed in the output. Only the
+        job description is cleaned and, if still too long, truncated at a sentence
+        boundary.
+
+        Args:
+            job_description: Scraped job description text
+            fixed_text: Everything else in the prompt: system prompt and the task prompt
+                (template, CV and instructions) built without the job description
+
+        Returns:
+            CompactionResult: The compacted text and the estimated tokens saved
+        """
+        original_tokens = estimate_tokens(job_description)
+        if not self.enabled:
+            return CompactionResult(job_description, original_tokens, original_tokens)
+
+        lines = self._drop_boilerplate_sections(job_description.splitlines())
+        sentences = self._dedupe(self._drop_boilerplate(self._split_sentences("\n".join(lines))))
+
+        job_budget = max(self.token_budget - estimate_tokens(fixed_text), self.min_job_tokens)
+        kept, truncated = self._fit(sentences, job_budget)
+        if not kept:
+            # Everything was dropped as boilerplate, or the first sentence alone is over
+            # budget; better the original text than an empty job description
+            logger.warning("Prompt compaction left no job description text, keeping the original up to the budget")
+            kept, truncated = self._fit(self._split_sentences(job_description), job_budget)
+            if not kept:
+                kept, truncated = [self._cut_at_word(job_description.strip(), job_budget * 4)], True
+
+        compacted = "\n".join(kept)
+        result = CompactionResult(compacted, original_tokens, estimate_tokens(compacted), truncated)
+
+        self.requests += 1
+        self.tokens_saved += max(result.saved_tokens, 0)
+        if truncated:
+            self.truncations += 1
+        logger.info(
+            f"Prompt compaction saved ~{result.saved_tokens} input tokens "
+            f"({result.original_tokens} -> {result.compacted_tokens}{', truncated' if truncated else ''})")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Return cumulative compaction counters."""
+        return {
+            "requests": self.requests,
+            "tokens_saved": self.tokens_saved,
+            "truncations": self.truncations,
+            "token_budget": self.token_budget,
+        }
+
+    def _fit(self, sentences: List[str], budget: int) -> Tuple[List[str], bool]:
+        """Keep leading sentences while they fit the budget; also report whether any were cut."""
+        kept: List[str] = []
+        used = 0
+        for sentence in sentences:
+            cost = estimate_tokens(sentence)
+            if used + cost > budget:
+                return kept, True
+            kept.append(sentence)
+            used += cost
+        return kept, False
+
+    @staticmethod
+    def _cut_at_word(text: str, max_chars: int) -> str:
+        if len(text) <= max_chars:
+            return text
+        cut = text[:max_chars]
+        return cut[:cut.rfind(" ")] if " " in cut else cut
+
+    def _split_sentences(self, text: str) -> List[str]:
+        return [sentence.strip() for sentence in SENTENCE_SPLIT.split(text) if sentence and sentence.strip()]
+
+    def _drop_boilerplate_sections(self, lines: List[str]) -> List[str]:
+        """Drop recognised boilerplate headings and the lines directly under them that are items of that section."""
+        kept = []
+        section = None
+        for line in lines:
+            stripped = line.strip()
+            heading = next((kind for pattern, kind in BOILERPLATE_SECTIONS if pattern.fullmatch(stripped)), None)
+            if heading is not None:
+                section = heading
+                continue
+            if section is not None and (not stripped or self._is_section_item(section, stripped)):
+                continue
+            section = None
+            kept.append(line)
+        return kept
+
+    @staticmethod
+    def _is_section_item(section: str, line: str) -> bool:
+        if section == "benefits":
+            return len(line.split()) <= BENEFIT_ITEM_MAX_WORDS and BENEFIT_ITEM_PATTERN.search(line) is not None
+        return EEO_ITEM_PATTERN.search(line) is not None
+
+    def _drop_boilerplate(self, sentences: List[str]) -> List[str]:
+        return [
+            sentence for sentence in sentences
+            if not any(pattern.search(sentence) for pattern in BOILERPLATE_PATTERNS)
+        ]
+
+    def _dedupe(self, sentences: List[str]) -> List[str]:
+        seen = set()
+        unique = []
+        for sentence in sentences:
+            key = re.sub(r"[\W_]+", " ", sentence.lower()).strip()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            unique.append(sentence)
+        return unique
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import aiohttp
+from google.genai import errors as genai_errors
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Statuses that signal overload or a transient upstream fault rather than a bad request
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """An HTTP error answer from an upstream, with its status and any Retry-After hint."""
+
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class UpstreamTimeoutError(Exception):
+    """An upstream call that exceeded its deadline."""
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the upstream while its circuit breaker is open; maps to HTTP 503."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} is temporarily unavailable, please retry shortly")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException, retry_timeouts: bool = True) -> bool:
+    """
+    Decide whether an upstream failure is transient and worth another attempt.
+
+    Args:
+        error: The exception raised by the upstream call
+        retry_timeouts: Whether timeouts count as transient
+
+    Returns:
+        bool: True for throttling, 5xx answers, timeouts and connection failures
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, UpstreamError):
+        return error.status in RETRYABLE_STATUSES
+    if isinstance(error, genai_errors.APIError):
+        return error.code in RETRYABLE_STATUSES
+    if isinstance(error, (UpstreamTimeoutError, asyncio.TimeoutError)):
+        return retry_timeouts
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, ConnectionError))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds; HTTP dates are ignored."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before retry number attempt + 1.
+
+        A Retry-After hint from the upstream is respected when it is longer than the
+        jittered delay, up to max_delay.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return min(delay, self.max_delay)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream.
+
+    After failure_threshold transient failures in a row the breaker opens and calls
+    fail fast for reset_seconds. It then lets a single probe through (half-open):
+    success closes it, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        if self.state == self.CLOSED:
+            return
+
+        remaining = self.opened_at + self.reset_seconds - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+
+        self.rejected += 1
+        raise CircuitOpenError(self.name, max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(
+                    f"Circuit for {self.name} opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Give up a half-open probe that was cancelled before it finished."""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class ResilientCaller:
+    """Runs upstream calls with retries and a circuit breaker per upstream name."""
+
+    def __init__(
+        self,
+        policy: RetryPolicy,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        retry_timeouts: bool = True
+    ):
+        self.policy = policy
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.retry_timeouts = retry_timeouts
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+
+    def breaker(self, upstream: str) -> CircuitBreaker:
+        """Return the breaker for an upstream, creating it on first use."""
+        breaker = self.breakers.get(upstream)
+        if breaker is None:
+            breaker = CircuitBreaker(upstream, self.failure_threshold, self.reset_seconds)
+            self.breakers[upstream] = breaker
+        return breaker
+
+    async def call(self, upstream: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call an upstream through its breaker, retrying transient failures.
+
+        Args:
+            upstream: Breaker name, e.g. the host or model
+            fn: Zero-argument coroutine factory making one attempt
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+            Exception: The last error once attempts run out, or the first non-retryable one
+        """
+        breaker = self.breaker(upstream)
+        for attempt in range(self.policy.attempts):
+            breaker.check()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except Exception as e:
+                if not is_retryable(e, retry_timeouts=True):
+                    # The upstream answered; the request itself was at fault
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt + 1 >= self.policy.attempts or not is_retryable(e, self.retry_timeouts):
+                    raise
+
+                delay = self.policy.backoff(attempt, getattr(e, "retry_after", None))
+                self.retries += 1
+                logger.warning(
+                    f"{upstream} attempt {attempt + 1} failed ({str(e)}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return retry counts and the state of every breaker."""
+        return {
+            "retries": self.retries,
+            "breakers": {name: breaker.stats() for name, breaker in self.breakers.items()},
+        }
@@ -0,0 +1,155 @@
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+# Subtrees that never hold the main content
+SKIPPED_TAGS = {
+    "head", "script", "style", "noscript", "template", "svg", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+}
+
+# Elements that start a new block of text; everything else is inline and its
+# text counts towards the nearest enclosing block
+BLOCK_TAGS = {
+    "html", "body", "main", "article", "section", "div", "p", "blockquote", "pre",
+    "ul", "ol", "li", "dl", "dt", "dd", "table", "tbody", "thead", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6", "center", "figure", "figcaption",
+}
+
+# A block counts as content when it has at least this much text and at most this
+# share of it inside links; shorter or link-heavy blocks are navigation and chrome
+MIN_BLOCK_CHARS = 25
+MAX_LINK_DENSITY = 0.5
+
+# Characters of text per tag at which a block counts fully. Prose has few tags per
+# sentence; listing cards and widgets wrap every short field in its own tag, so
+# their score is scaled down in proportion.
+FULL_TEXT_DENSITY = 20.0
+
+
+class _Block:
+    __slots__ = ("element", "chars", "link_chars", "tags")
+
+    def __init__(self, element: etree._Element):
+        self.element = element
+        self.chars = 0
+        self.link_chars = 0
+        self.tags = 0
+
+    def score(self) -> float:
+        """Non-link characters weighted by text density, or 0 for blocks that are not content."""
+        if self.chars < MIN_BLOCK_CHARS or self.link_chars > self.chars * MAX_LINK_DENSITY:
+            return 0.0
+        density = self.chars / max(self.tags, 1)
+        return (self.chars - self.link_chars) * min(density / FULL_TEXT_DENSITY, 1.0)
+
+
+def _text_length(text: Optional[str]) -> int:
+    return len(text.strip()) if text else 0
+
+
+def find_content_element(root: etree._Element) -> Optional[etree._Element]:
+    """
+    Find the element holding the main text of a page, in one pass over the tree.
+
+    Each block is measured by the text and tags directly inside it (including
+    inline markup such as links and emphasis, excluding nested blocks). Blocks
+    with enough text and a low link density score their non-link characters,
+    scaled down when the text-to-tag ratio is low, for themselves, their parent
+    and, at half weight, their grandparent, so the container whose children
+    carry the most prose wins. Memory is bounded by the depth of the tree plus
+    one score per block that held content.
+
+    Args:
+        root: Parsed lxml document or element
+
+    Returns:
+        The highest scoring element, or None if no block looked like content
+    """
+    scores: Dict[etree._Element, float] = {}
+    stack: List[_Block] = []
+    link_depth = 0
+
+    walker = etree.iterwalk(root, events=("start", "end", "comment", "pi"))
+    for event, element in walker:
+        tag = element.tag
+        if not isinstance(tag, str):
+            # Comments and processing instructions hold no text, but the text after
+            # them (as after the <!----> markers of server-rendered pages) does
+            if stack:
+                tail = _text_length(element.tail)
+                stack[-1].chars += tail
+                if link_depth:
+                    stack[-1].link_chars += tail
+            continue
+        tag = tag.lower()
+
+        if event == "start":
+            if tag in SKIPPED_TAGS:
+                walker.skip_subtree()
+                continue
+            if tag in BLOCK_TAGS or not stack:
+                stack.append(_Block(element))
+            stack[-1].tags += 1
+            if tag == "a":
+                link_depth += 1
+            chars = _text_length(element.text)
+            stack[-1].chars += chars
+            if link_depth:
+                stack[-1].link_chars += chars
+            continue
+
+        # "end": close the element, then account for the text following it
+        if tag not in SKIPPED_TAGS:
+            if tag == "a":
+                link_depth -= 1
+            if stack and stack[-1].element is element:
+                points = stack.pop().score()
+                if points > 0:
+                    _credit(scores, element, points)
+
+        if stack:
+            tail = _text_length(element.tail)
+            stack[-1].chars += tail
+            if link_depth:
+                stack[-1].link_chars += tail
+
+    if not scores:
+        return None
+    return max(scores, key=scores.get)
+
+
+def _credit(scores: Dict[etree._Element, float], element: etree._Element, points: float) -> None:
+    scores[element] = scores.get(element, 0.0) + points
+    parent = element.getparent()
+    if parent is not None:
+        scores[parent] = scores.get(parent, 0.0) + points
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0.0) + points / 2
+
+
+def visible_text(element: etree._Element) -> str:
+    """Text of an element with skipped subtrees left out and block boundaries kept as newlines."""
+    parts: List[str] = []
+    walker = etree.iterwalk(element, events=("start", "end", "comment", "pi"))
+    for event, node in walker:
+        tag = node.tag
+        if not isinstance(tag, str):
+            # Keep the text following a comment or processing instruction
+            if node is not element and node.tail:
+                parts.append(node.tail)
+            continue
+        tag = tag.lower()
+        if event == "start":
+            if tag in SKIPPED_TAGS:
+                walker.skip_subtree()
+            elif node.text:
+                parts.append(node.text)
+            continue
+        if tag in BLOCK_TAGS:
+            parts.append("\n")
+        # The element's own tail lies outside the requested element
+        if node is not element and node.tail:
+            parts.append(node.tail)
+    return "".join(parts).strip()
@@ -0,0 +1,168 @@
+import os
+import unittest
+from unittest import mock
+
+from google.genai import errors
+
+from services.context_cache import ContextCacheRegistry, FakeContextCacheProvider
+from services.llm_adapter import GenerationRequest, LLMAdapter
+
+MODEL = "test-model"
+# Well above CONTEXT_CACHE_MIN_TOKENS as set below
+SHARED_CONTEXT = "Senior Backend Engineer. Python, PostgreSQL, Kubernetes. " * 40
+
+TEST_ENV = {
+    "GOOGLE_AI_API_KEY": "test-key",
+    "GEMINI_MODEL_ID": MODEL,
+    "GEMINI_MODEL_CHAIN": "",
+    "CONTEXT_CACHE_ENABLED": "true",
+    "CONTEXT_CACHE_MIN_TOKENS": "100",
+    "CONTEXT_CACHE_MIN_USES": "2",
+}
+
+
+class FailingContextCacheProvider(FakeContextCacheProvider):
+    """Rejects every upload, like a model without caching support."""
+
+    async def create(self, model: str, text: str, ttl_seconds: float) -> str:
+        self.created += 1
+        raise errors.ClientError(400, {"error": {"code": 400, "message": "Caching not supported", "status": "INVALID_ARGUMENT"}})
+
+
+class ContextCacheRegistryTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, TEST_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.provider = FakeContextCacheProvider()
+        self.registry = ContextCacheRegistry(self.provider)
+
+    async def test_uploads_on_second_sighting(self):
+        self.assertIsNone(await self.registry.get_or_create(MODEL, SHARED_CONTEXT))
+        self.assertEqual(self.provider.created, 0)
+
+        name = await self.registry.get_or_create(MODEL, SHARED_CONTEXT)
+        self.assertIsNotNone(name)
+        self.assertEqual(self.provider.contents[name], SHARED_CONTEXT)
+
+        self.assertEqual(await self.registry.get_or_create(MODEL, SHARED_CONTEXT), name)
+        self.assertEqual(self.provider.created, 1)
+        self.assertEqual(self.registry.stats()["hits"], 1)
+
+    async def test_short_context_is_never_uploaded(self):
+        for _ in range(3):
+            self.assertIsNone(await self.registry.get_or_create(MODEL, "Short CV"))
+        self.assertEqual(self.provider.created, 0)
+
+    async def test_invalidated_handle_is_uploaded_again(self):
+        await self.registry.get_or_create(MODEL, SHARED_CONTEXT)
+        name = await self.registry.get_or_create(MODEL, SHARED_CONTEXT)
+
+        self.registry.invalidate(name)
+        self.assertEqual(self.registry.stats()["entries"], 0)
+
+        renewed = await self.registry.get_or_create(MODEL, SHARED_CONTEXT)
+        self.assertIsNotNone(renewed)
+        self.assertNotEqual(renewed, name)
+        self.assertEqual(self.provider.created, 2)
+
+    async def test_failed_upload_is_not_retried(self):
+        provider = FailingContextCacheProvider()
+        registry = ContextCacheRegistry(provider)
+        for _ in range(3):
+            self.assertIsNone(await registry.get_or_create(MODEL, SHARED_CONTEXT))
+        self.assertEqual(provider.created, 1)
+        self.assertEqual(registry.stats()["failures"], 1)
+
+    async def test_close_deletes_live_handles(self):
+        await self.registry.get_or_create(MODEL, SHARED_CONTEXT)
+        await self.registry.get_or_create(MODEL, SHARED_CONTEXT)
+        await self.registry.close()
+        self.assertEqual(self.provider.contents, {})
+        self.assertEqual(self.provider.deleted, 1)
+
+
+class LLMAdapterContextCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, TEST_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.provider = FakeContextCacheProvider()
+        self.adapter = LLMAdapter(context_cache_provider=self.provider)
+        self.request = GenerationRequest(
+            system_prompt="You are a CV writer.",
+            prompt=f"{SHARED_CONTEXT}\n\nAdapt the CV.",
+            shared_context=SHARED_CONTEXT,
+            task_prompt="Adapt the CV."
+        )
+        self.calls = []
+        self.reject_cached = False
+
+        async def call_model(model, contents, config=None):
+            cache_name = config.cached_content if config is not None else None
+            self.calls.append(cache_name)
+            if cache_name is not None and self.reject_cached:
+                raise errors.ClientError(403, {"error": {"code": 403, "message": "CachedContent not found", "status": "PERMISSION_DENIED"}})
+            return "<h1>CV</h1>"
+
+        self.adapter._call_model = call_model
+
+    async def test_second_call_references_cached_context(self):
+        await self.adapter._generate_with_context_cache(self.request, MODEL)
+        await self.adapter._generate_with_context_cache(self.request, MODEL)
+
+        self.assertIsNone(self.calls[0])
+        self.assertIn(self.calls[1], self.provider.contents)
+
+    async def test_rejected_cache_falls_back_to_full_prompt_and_is_invalidated(self):
+        await self.adapter._generate_with_context_cache(self.request, MODEL)
+        self.reject_cached = True
+
+        result = await self.adapter._generate_with_context_cache(self.request, MODEL)
+
+        self.assertEqual(result, "<h1>CV</h1>")
+        rejected = self.calls[1]
+        self.assertIsNotNone(rejected)
+        self.assertIsNone(self.calls[2])
+        self.assertEqual(self.adapter.context_cache.stats()["entries"], 0)
+
+        # The next call uploads a fresh handle instead of reusing the rejected one
+        self.reject_cached = False
+        await self.adapter._generate_with_context_cache(self.request, MODEL)
+        self.assertNotIn(self.calls[3], (None, rejected))
+
+    async def test_failed_upload_sends_full_prompt(self):
+        provider = FailingContextCacheProvider()
+        self.adapter.context_cache = ContextCacheRegistry(provider)
+
+        for _ in range(3):
+            await self.adapter._generate_with_context_cache(self.request, MODEL)
+
+        self.assertEqual(self.calls, [None, None, None])
+        self.assertEqual(provider.created, 1)
+
+    async def test_tasks_share_context_when_job_description_is_truncated(self):
+        self.adapter.prompt_compactor.token_budget = 1500
+        self.adapter.prompt_compactor.min_job_tokens = 100
+        job_description = " ".join(f"Requirement {i}: five years of Python in production." for i in range(400))
+
+        requests = [
+            self.adapter._prepare_request(
+                self.adapter._get_cv_system_prompt(), self.adapter._create_adaptation_prompt,
+                SHARED_CONTEXT, job_description, None),
+            self.adapter._prepare_request(
+                self.adapter._get_cover_letter_system_prompt(), self.adapter._create_cover_letter_prompt,
+                SHARED_CONTEXT, job_description, None),
+            self.adapter._prepare_request(
+                self.adapter._get_general_purpose_system_prompt(), self.adapter._create_general_purpose_prompt,
+                SHARED_CONTEXT, job_description, "Summarise the fit in three bullet points."),
+        ]
+
+        self.assertEqual(len({request.shared_context for request in requests}), 1)
+        self.assertEqual(self.adapter.prompt_compactor.stats()["truncations"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import unittest
+from unittest import mock
+
+from services.cv_processor import CVProcessor
+
+CV_TEXT = b"Jane Doe\nSenior Backend Engineer\nPython, PostgreSQL, Kubernetes"
+
+TEST_ENV = {
+    "CV_EXTRACT_WORKERS": "0",
+    "CV_CACHE_TTL_SECONDS": "3600",
+}
+
+
+class CVProcessorCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, TEST_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.processor = CVProcessor()
+
+    async def test_content_type_is_part_of_the_cv_id(self):
+        cv_id, text = await self.processor.extract_text_from_bytes(CV_TEXT, "text/plain")
+        self.assertIn("Senior Backend Engineer", text)
+
+        # The same bytes uploaded as a PDF must not be served the cached text
+        with self.assertRaises(ValueError):
+            await self.processor.extract_text_from_bytes(CV_TEXT, "application/pdf")
+
+        self.assertEqual((await self.processor.extract_text_from_bytes(CV_TEXT, "text/plain"))[0], cv_id)
+
+    async def test_expiry_counts_from_the_first_upload(self):
+        with mock.patch("services.cache.time") as clock:
+            clock.monotonic.return_value = 1000.0
+            cv_id, _ = await self.processor.extract_text_from_bytes(CV_TEXT, "text/plain")
+            self.assertEqual(self.processor.expires_in_seconds(cv_id), 3600)
+
+            clock.monotonic.return_value = 2000.0
+            again, _ = await self.processor.extract_text_from_bytes(CV_TEXT, "text/plain")
+            self.assertEqual(again, cv_id)
+            self.assertEqual(self.processor.expires_in_seconds(cv_id), 2600)
+
+            clock.monotonic.return_value = 5000.0
+            self.assertEqual(self.processor.expires_in_seconds(cv_id), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from prometheus_client import REGISTRY
+
+from services import metrics
+from services.resilience import CircuitOpenError, ResilientCaller, RetryPolicy, UpstreamError
+
+
+class CircuitRejectionMetricsTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_open_circuit_rejections_are_counted(self):
+        caller = ResilientCaller(RetryPolicy(attempts=1), failure_threshold=1, reset_seconds=60)
+        metrics._count_rejections(caller, lambda domain: f"jobsite:{metrics.site_label(domain)}")
+        before = self.rejections()
+
+        async def fail():
+            raise UpstreamError("Service unavailable", 503)
+
+        with self.assertRaises(UpstreamError):
+            await caller.call("www.reed.co.uk", fail)
+        for _ in range(2):
+            with self.assertRaises(CircuitOpenError):
+                await caller.call("www.reed.co.uk", fail)
+
+        self.assertEqual(self.rejections() - before, 2)
+
+    def rejections(self) -> float:
+        labels = {"upstream": "jobsite:reed", "kind": "circuit_open"}
+        return REGISTRY.get_sample_value("cv_maker_upstream_errors_total", labels) or 0.0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import re
+import unittest
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+from unittest import mock
+
+from services.job_scraper import JobScraper
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+SITES = {
+    "www.linkedin.com": "linkedin.html",
+    "uk.indeed.com": "indeed.html",
+    "www.reed.co.uk": "reed.html",
+}
+JSON_LD_BLOCK = re.compile(rb'<script[^>]*application/ld\+json[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+
+TEST_ENV = {
+    "SCRAPER_EARLY_STOP": "true",
+}
+
+
+class FakeContent:
+
+    def __init__(self, body: bytes, chunk_size: int):
+        self.body = body
+        self.chunk_size = chunk_size
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+
+class FakeResponse:
+    """The parts of aiohttp.ClientResponse that JobScraper._read_body uses."""
+
+    def __init__(self, body: bytes, chunk_size: int = 64 * 1024, content_length: Optional[int] = None, headers: Optional[Dict[str, str]] = None):
+        self.content = FakeContent(body, chunk_size)
+        self.content_length = content_length
+        self.headers = headers or {}
+
+
+class EarlyStopTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, TEST_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scraper = JobScraper()
+
+    async def read(self, domain: str, body: bytes, **kwargs) -> bytes:
+        return await self.scraper._read_body(FakeResponse(body, **kwargs), domain)
+
+    def parse(self, domain: str, body: bytes) -> str:
+        return self.scraper._parse_job_page(domain, body.decode("utf-8"))
+
+    async def test_early_stopped_fixtures_parse_like_full_pages(self):
+        for domain, fixture in SITES.items():
+            page = (FIXTURES / fixture).read_bytes()
+            without_json_ld = JSON_LD_BLOCK.sub(b"", page)
+            self.assertNotEqual(without_json_ld, page)
+            for variant, full in (("json-ld", page), ("html", without_json_ld)):
+                for chunk_size in (4 * 1024, 64 * 1024):
+                    with self.subTest(site=domain, variant=variant, chunk_size=chunk_size):
+                        stopped = self.scraper.pages_stopped_early
+                        body = await self.read(domain, full, chunk_size=chunk_size)
+                        self.assertEqual(self.scraper.pages_stopped_early, stopped + 1)
+                        self.assertLess(len(body), len(full))
+                        self.assertEqual(self.parse(domain, body), self.parse(domain, full))
+
+    async def test_placeholder_job_posting_reads_on_to_the_description(self):
+        domain = "www.reed.co.uk"
+        page = JSON_LD_BLOCK.sub(b"", (FIXTURES / SITES[domain]).read_bytes())
+        placeholder = json.dumps({"@context": "https://schema.org/", "@type": "JobPosting", "title": "Senior Backend Engineer", "description": "See below."})
+        page = page.replace(b"</head>", f'<script type="application/ld+json">{placeholder}</script></head>'.encode("utf-8"), 1)
+
+        body = await self.read(domain, page, chunk_size=4 * 1024)
+
+        self.assertIn(b'data-qa="job-description"', body)
+        self.assertNotIn("See below.", self.parse(domain, body))
+        self.assertEqual(self.parse(domain, body), self.parse(domain, page))
+
+    async def test_compressed_content_length_does_not_prevent_early_stop(self):
+        # Content-Length is the gzip size, far below the decompressed bytes already read
+        domain = "www.linkedin.com"
+        page = (FIXTURES / SITES[domain]).read_bytes()
+
+        body = await self.read(domain, page, content_length=len(page) // 8, headers={"Content-Encoding": "gzip"})
+
+        self.assertLess(len(body), len(page))
+        self.assertEqual(self.scraper.pages_stopped_early, 1)
+
+    async def test_small_remainder_is_read_to_the_end(self):
+        domain = "www.reed.co.uk"
+        page = (FIXTURES / SITES[domain]).read_bytes()
+
+        body = await self.read(domain, page, content_length=len(page))
+
+        self.assertEqual(body, page)
+        self.assertEqual(self.scraper.pages_stopped_early, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
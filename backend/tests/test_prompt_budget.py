@@ -0,0 +1,103 @@
+import os
+import unittest
+from unittest import mock
+
+from services.prompt_budget import PromptCompactor
+
+TEST_ENV = {
+    "PROMPT_COMPACTION_ENABLED": "true",
+    "PROMPT_TOKEN_BUDGET": "8000",
+    "PROMPT_MIN_JOB_TOKENS": "400",
+}
+
+
+class PromptCompactorTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, TEST_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.compactor = PromptCompactor()
+
+    def compact(self, job_description: str) -> str:
+        return self.compactor.compact(job_description, "").job_description
+
+    def test_perks_section_ends_at_unlisted_heading(self):
+        job_description = "\n".join([
+            "Data Engineer at Foo",
+            "Perks",
+            "Free lunch and gym",
+            "About us",
+            "Foo builds analytics for retailers.",
+            "Your profile",
+            "5+ years of Python and Spark",
+            "Must have",
+            "AWS certification",
+        ])
+        compacted = self.compact(job_description)
+        self.assertNotIn("Free lunch", compacted)
+        for line in ("About us", "Your profile", "5+ years of Python and Spark", "Must have", "AWS certification"):
+            self.assertIn(line, compacted)
+
+    def test_benefits_section_ends_at_first_non_benefit_line(self):
+        job_description = "\n".join([
+            "Data Engineer",
+            "Benefits",
+            "Health insurance",
+            "What we need from you",
+            "Strong SQL skills and dbt",
+        ])
+        self.assertEqual(self.compact(job_description), "Data Engineer\nWhat we need from you\nStrong SQL skills and dbt")
+
+    def test_equal_opportunity_section_is_dropped(self):
+        job_description = "\n".join([
+            "Backend Engineer",
+            "Requirements:",
+            "Go and PostgreSQL in production",
+            "Diversity & Inclusion",
+            "We welcome applicants of every background, gender identity and disability status.",
+            "Reasonable accommodations are available on request.",
+        ])
+        self.assertEqual(self.compact(job_description), "Backend Engineer\nRequirements:\nGo and PostgreSQL in production")
+
+    def test_job_description_without_headings_keeps_requirements(self):
+        job_description = (
+            "We are hiring a privacy counsel. You will draft and maintain our privacy policy and cookie consent flows. "
+            "You will advise on health insurance data and PTO policy compliance. "
+            "Experience with diversity and inclusion programmes is a plus. "
+            "Acme is an equal opportunity employer."
+        )
+        compacted = self.compact(job_description)
+        self.assertIn("privacy policy and cookie consent flows", compacted)
+        self.assertIn("health insurance data and PTO policy compliance", compacted)
+        self.assertIn("diversity and inclusion programmes", compacted)
+        self.assertNotIn("equal opportunity employer", compacted)
+
+    def test_job_board_chrome_and_duplicates_are_dropped(self):
+        job_description = "Python developer\nShow more\nBuild APIs in FastAPI.\nBuild APIs in FastAPI.\nWe use cookies to improve your experience."
+        self.assertEqual(self.compact(job_description), "Python developer\nBuild APIs in FastAPI.")
+
+    def test_long_job_description_is_truncated_at_a_sentence(self):
+        sentences = [f"Requirement number {i} is experience with distributed systems." for i in range(2000)]
+        result = self.compactor.compact(" ".join(sentences), "")
+        self.assertTrue(result.truncated)
+        self.assertLessEqual(result.compacted_tokens, self.compactor.token_budget)
+        self.assertTrue(result.job_description.endswith("distributed systems."))
+
+    def test_all_boilerplate_falls_back_to_original_sentences(self):
+        job_description = "Acme is an equal opportunity employer. We use cookies to improve your experience."
+        with self.assertLogs("services.prompt_budget", level="WARNING"):
+            compacted = self.compact(job_description)
+        self.assertEqual(compacted, "Acme is an equal opportunity employer.\nWe use cookies to improve your experience.")
+
+    def test_single_sentence_over_budget_is_cut_at_a_word(self):
+        self.compactor.token_budget = 0
+        self.compactor.min_job_tokens = 10
+        with self.assertLogs("services.prompt_budget", level="WARNING"):
+            compacted = self.compact("word " * 200)
+        self.assertLessEqual(len(compacted), 40)
+        self.assertTrue(compacted.endswith("word"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from lxml import html as lxml_html
+
+from services.job_scraper import JobScraper
+from services.text_density import find_content_element, visible_text
+
+DESCRIPTION = (
+    "We are looking for a senior engineer to design and operate our payment APIs. "
+    "You will own services written in Python and Go, run them on Kubernetes and "
+    "mentor other engineers on the team."
+)
+
+
+def parse(page: str) -> lxml_html.HtmlElement:
+    return lxml_html.document_fromstring(page)
+
+
+class TextDensityTest(unittest.TestCase):
+
+    def test_text_after_comment_inside_paragraph_is_kept(self):
+        document = parse(
+            "<html><body><article><p>Senior engineer wanted.<!-- tracking --> "
+            f"{DESCRIPTION}</p></article></body></html>")
+
+        content = find_content_element(document)
+
+        self.assertIsNotNone(content)
+        self.assertEqual(visible_text(content), f"Senior engineer wanted. {DESCRIPTION}")
+
+    def test_server_rendered_markers_do_not_hide_the_description(self):
+        # Frameworks such as Vue and Svelte separate rendered text nodes with empty comments
+        page = (
+            "<html><body><div id='app'><h1><!---->Senior Engineer<!----></h1>"
+            "<div class='description'>"
+            + "".join(f"<p><!---->{sentence}.<!----> <!---->Apply today.</p>" for sentence in DESCRIPTION.split(". "))
+            + "</div></div></body></html>"
+        )
+
+        text = JobScraper()._scrape_with_selectors(page, [])
+
+        self.assertIn("design and operate our payment APIs", text)
+        self.assertIn("mentor other engineers on the team", text)
+
+    def test_scripts_and_styles_are_skipped(self):
+        document = parse(
+            "<html><head><style>p { color: red; }</style></head><body><main>"
+            "<script>window.__STATE__ = {\"jobs\": [\"" + "x" * 500 + "\"]};</script>"
+            f"<p>{DESCRIPTION}</p><style>.hidden {{ display: none; }}</style>"
+            "</main></body></html>")
+
+        text = visible_text(find_content_element(document))
+
+        self.assertIn(DESCRIPTION, text)
+        self.assertNotIn("__STATE__", text)
+        self.assertNotIn("display: none", text)
+
+    def test_link_heavy_block_is_not_content(self):
+        links = "".join(f"<a href='/jobs/{i}'>Senior Python engineer role number {i} in London</a> " for i in range(20))
+        document = parse(
+            f"<html><body><div id='related'>{links}</div>"
+            f"<div id='description'><p>{DESCRIPTION}</p></div></body></html>")
+
+        text = visible_text(find_content_element(document))
+
+        self.assertEqual(text, DESCRIPTION)
+
+
+if __name__ == "__main__":
+    unittest.main()